@@ -0,0 +1,273 @@
+"""
+Microbenchmarks of the data, preprocessing and model hot paths.
+Every case runs on synthetic hourly data from one day to ten years, without network access.
+Records the best and median time and the peak traced memory, writes the results as JSON and
+compares them against a stored baseline.
+
+Usage:
+    python -m benchmarks.bench_hotpaths [--sizes 1d 1w 1y] [--cases fit_model predict] [--output results.json]
+    python -m benchmarks.bench_hotpaths --save-baseline         # store the results as the baseline
+    python -m benchmarks.bench_hotpaths --fail-on-regression    # exit with 1 if a case got slower than the threshold
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import pytz
+
+from benchmarks.synthetic import make_weather, make_inverter, make_suntimes, make_training_frame, make_inference_frame
+
+SIZES = {"1d": 1, "1w": 7, "1m": 30, "1y": 365, "10y": 3650}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# cases slower than this are not repeated
+REPEAT_LIMIT_S = 1.0
+
+LATITUDE, LONGITUDE, ALTITUDE = 37.5, 127.0, 30.0
+TIMEZONE = pytz.timezone("Asia/Seoul")
+
+
+def _model_config(n_epochs=None):
+    from solar_pred.core.ai_models._models_config import get_model_config
+
+    model_config = get_model_config(model_name="neural_network")
+    if n_epochs is not None:
+        model_config["n_epochs"] = n_epochs
+    return model_config
+
+
+# every case is (setup(n_days) -> state, run(state)). Only run is measured
+def _setup_suntimes(n_days):
+    start = date(2024, 1, 1)
+    return start, start + timedelta(days=n_days - 1)
+
+
+def _run_suntimes(dates):
+    from solar_pred.core.get_data import get_suntimes_by_date
+    get_suntimes_by_date(LATITUDE, LONGITUDE, ALTITUDE, TIMEZONE, dates[0], dates[1])
+
+
+def _setup_daylight(n_days):
+    from solar_pred.core.preprocessing.weather_preprocessing import preprocess_weather
+    from solar_pred.core.preprocessing.sunset_sunrise_preprocessing import preprocess_sunset_sunrise
+    return preprocess_weather(make_weather(n_days=n_days)), preprocess_sunset_sunrise(make_suntimes(n_days=n_days))
+
+
+def _run_daylight(state):
+    from solar_pred.core.preprocessing._utils_preprocess import filter_daylight_hours
+    filter_daylight_hours(*state)
+
+
+def _setup_features(n_days):
+    from solar_pred.core.preprocessing import FEATURES
+    from solar_pred.core.preprocessing.weather_preprocessing import preprocess_weather
+    # the default input columns plus every registered derived feature
+    return preprocess_weather(make_weather(n_days=n_days)), _model_config()["features_to_use"] + list(FEATURES)
+
+
+def _run_features(state):
+    from solar_pred.core.preprocessing import build_feature_matrix
+    build_feature_matrix(*state)
+
+
+def _setup_preprocess(n_days):
+    return make_weather(n_days=n_days), make_suntimes(n_days=n_days), make_inverter(n_days=n_days)
+
+
+def _run_preprocess(state):
+    from solar_pred.core.preprocessing import preprocess_datasets
+    weather, suntimes, inverter = state
+    preprocess_datasets(weather=weather, sunset_sunrise=suntimes, inverter=inverter)
+
+
+def _setup_split(n_days):
+    return make_training_frame(n_days=n_days), _model_config()
+
+
+def _run_split(state):
+    from solar_pred.core.ai_models._models_general import TrainingDataset, train_val_split, normalize_train_val
+    frame, model_config = state
+    dataset = TrainingDataset.from_frame(frame, model_config["features_to_use"], model_config["target_col"])
+    train_set, val_set = train_val_split(dataset, model_config)
+    scaler = model_config["scaler"]
+    normalize_train_val(train_set, val_set, type(scaler)(), type(scaler)(), model_config)
+
+
+def _setup_fit(n_days):
+    return make_training_frame(n_days=n_days)
+
+
+def _run_fit(frame):
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+    NeuralNetwork(_model_config()).fit_model(frame)
+
+
+def _trained_model(n_days):
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+    # one epoch is enough, the weights do not change the cost of what is measured
+    return NeuralNetwork(_model_config(n_epochs=1)).fit_model(make_training_frame(n_days=max(n_days, 7)))
+
+
+def _setup_predict(n_days):
+    return _trained_model(1), make_inference_frame(n_days=n_days)
+
+
+def _run_predict(state):
+    model, frame = state
+    model.predict(frame)
+
+
+def _setup_save_load(n_days):
+    # the checkpoint holds the train/val splits, so its size grows with the training history
+    return _trained_model(n_days), tempfile.TemporaryDirectory()
+
+
+def _run_save_load(state):
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+    model, directory = state
+    model.save_model(directory.name)
+    NeuralNetwork.load_from_file(directory.name)
+
+
+def _release(state) -> None:
+    """Remove the temporary directories a setup created, once its case was measured."""
+    for item in state if isinstance(state, tuple) else (state,):
+        if isinstance(item, tempfile.TemporaryDirectory):
+            item.cleanup()
+
+
+CASES = {
+    "get_suntimes_by_date": (_setup_suntimes, _run_suntimes),
+    "filter_daylight_hours": (_setup_daylight, _run_daylight),
+    "build_features": (_setup_features, _run_features),
+    "preprocess_datasets": (_setup_preprocess, _run_preprocess),
+    "train_val_split+normalize": (_setup_split, _run_split),
+    "fit_model": (_setup_fit, _run_fit),
+    "predict": (_setup_predict, _run_predict),
+    "save_model+load_from_file": (_setup_save_load, _run_save_load),
+}
+
+
+def measure(run, state, repeat: int) -> dict:
+    """Best and median time over up to `repeat` runs, then peak traced memory of one more run."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+        if times[-1] > REPEAT_LIMIT_S:
+            break
+
+    # tracing slows the code down, so memory is measured in a separate run
+    gc.collect()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"time_s": min(times), "median_s": statistics.median(times), "runs": len(times), "peak_mem_mb": peak / 2**20}
+
+
+def run(cases, sizes, repeat: int) -> dict:
+    import numpy
+    import pandas
+    import torch
+    from solar_pred.core.exceptions import TrainSizeError
+
+    results = {}
+    for case in cases:
+        setup, run_case = CASES[case]
+        results[case] = {}
+        for size in sizes:
+            state = None
+            try:
+                state = setup(SIZES[size])
+                results[case][size] = measure(run_case, state, repeat)
+            except TrainSizeError as e:
+                # one day is too short to train on
+                results[case][size] = {"error": str(e)}
+                print(f"{case:28s} {size:>4s} skipped: {e}")
+                continue
+            finally:
+                _release(state)
+            result = results[case][size]
+            print(f"{case:28s} {size:>4s} {result['time_s'] * 1000:12.2f} ms {result['peak_mem_mb']:10.2f} MB")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": numpy.__version__,
+            "pandas": pandas.__version__,
+            "torch": torch.__version__
+        },
+        "results": results
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print the change against the baseline. Returns the (case, size) pairs that got slower than the threshold."""
+    regressions = []
+    print(f"\n{'case':28s} {'size':>4s} {'baseline ms':>12s} {'now ms':>12s} {'change':>8s} {'mem change':>10s}")
+    for case, sizes in results["results"].items():
+        for size, result in sizes.items():
+            reference = baseline.get("results", {}).get(case, {}).get(size)
+            if reference is None or "error" in reference or "error" in result:
+                continue
+            change = result["time_s"] / reference["time_s"] - 1 if reference["time_s"] > 0 else 0.0
+            mem_change = result["peak_mem_mb"] / reference["peak_mem_mb"] - 1 if reference["peak_mem_mb"] > 0 else 0.0
+            flag = "  REGRESSION" if change > threshold else ""
+            if flag:
+                regressions.append((case, size))
+            print(
+                f"{case:28s} {size:>4s} {reference['time_s'] * 1000:12.2f} {result['time_s'] * 1000:12.2f} "
+                f"{change:+8.1%} {mem_change:+10.1%}{flag}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data, preprocessing and model hot paths")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="Cases to run")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES), help="Data sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case, cases slower than 1s run once")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown (fraction) reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with 1 if there are regressions")
+    args = parser.parse_args()
+
+    results = run(args.cases, args.sizes, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
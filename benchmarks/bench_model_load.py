@@ -0,0 +1,100 @@
+"""
+Model load benchmark.
+Loads a saved model in fresh interpreters, once with its training state and once for inference only
+(INFERENCE_ONLY), and reports the load time and the resident memory the model adds to the process.
+torch and the model module are imported before the measurement, so only the model itself is counted.
+
+Usage: python -m benchmarks.bench_model_load [--runs 3] [--days 365] [--output model_load.json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+MODES = ("full", "inference_only")
+
+CHILD_CODE = """
+import gc, sys, time, json
+from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+from solar_pred.core.metrics import process_rss_bytes
+
+gc.collect()
+rss_before = process_rss_bytes()
+start = time.perf_counter()
+model = NeuralNetwork.load_from_file(sys.argv[1], inference_only=sys.argv[2] == "inference_only")
+load_s = time.perf_counter() - start
+gc.collect()
+
+print(json.dumps({
+    "load_s": load_s,
+    "rss_mb": (process_rss_bytes() - rss_before) / 2**20,
+    "optimizer": model.optimizer is not None,
+    "requires_grad": any(parameter.requires_grad for parameter in model.parameters())
+}))
+"""
+
+
+def _prepare_model(model_dir: str, n_days: int) -> None:
+    """Train a model on synthetic data, its checkpoint holds the training history of n_days."""
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+    from solar_pred.core.ai_models._models_config import get_model_config
+    from benchmarks.synthetic import make_training_frame
+
+    model_config = get_model_config(model_name="neural_network")
+    model = NeuralNetwork(model_CONFIG={**model_config, "n_epochs": 1, "max_history_rows": n_days * 24})
+    model.fit_model(make_training_frame(n_days=n_days))
+    model.save_model(model_dir)
+
+
+def run(runs: int, n_days: int) -> dict:
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "LOG_LEVEL": "WARNING", "PYTHONPATH": repo_root}
+    with tempfile.TemporaryDirectory() as model_dir:
+        _prepare_model(model_dir, n_days)
+        checkpoint_mb = sum(os.path.getsize(os.path.join(model_dir, name)) for name in os.listdir(model_dir)) / 2**20
+
+        results = {}
+        for mode in MODES:
+            samples = []
+            for _ in range(runs):
+                result = subprocess.run(
+                    [sys.executable, "-c", CHILD_CODE, model_dir, mode], env=env, cwd=repo_root,
+                    capture_output=True, text=True, check=True
+                )
+                samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+            results[mode] = {
+                "load_s": statistics.median(sample["load_s"] for sample in samples),
+                "rss_mb": statistics.median(sample["rss_mb"] for sample in samples),
+                "optimizer": samples[0]["optimizer"],
+                "requires_grad": samples[0]["requires_grad"],
+                "samples": samples
+            }
+    return {"runs": runs, "days": n_days, "checkpoint_mb": checkpoint_mb, "modes": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full and inference-only model loading")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreter runs per mode")
+    parser.add_argument("--days", type=int, default=365, help="Days of training history saved with the model")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.runs, args.days)
+    print(f"checkpoint {results['checkpoint_mb']:.1f} MB ({args.days} days of history)")
+    for mode, stats in results["modes"].items():
+        print(
+            f"{mode:16s} load {stats['load_s'] * 1000:8.1f} ms  model RSS {stats['rss_mb']:7.1f} MB  "
+            f"optimizer {stats['optimizer']!s:5s}  requires_grad {stats['requires_grad']}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Shared weights benchmark.
+Loads a saved model for inference only in N concurrent processes, like N uvicorn workers, once with the weights
+copied into every process and once memory-mapped from the checkpoint (SHARED_WEIGHTS). While all processes hold the
+model, it reports the private memory the model adds to each process and their proportional set size (shared pages
+are divided between the processes that map them). torch and the model module are imported before the measurement.
+
+Usage: python -m benchmarks.bench_shared_weights [--workers 1 2 4 8] [--ensemble-size 1] [--output shared_weights.json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+MODES = ("copied", "shared")
+
+CHILD_CODE = """
+import gc, sys, json
+from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+
+def rollup():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return fields
+
+gc.collect()
+print(json.dumps(rollup()), flush=True)
+model = NeuralNetwork.load_from_file(sys.argv[1], inference_only=True, shared_weights=sys.argv[2] == "shared")
+# touch every weight, as serving does
+sum(float(parameter.sum()) for parameter in model.parameters())
+gc.collect()
+print("loaded", flush=True)
+sys.stdin.readline()
+"""
+
+
+def _private_bytes(fields: dict) -> int:
+    return fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+
+
+def _read_rollup(pid: int) -> dict:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return fields
+
+
+def _prepare_model(model_dir: str, ensemble_size: int) -> None:
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+    from solar_pred.core.ai_models._models_config import get_model_config
+    from benchmarks.synthetic import make_training_frame
+
+    model_config = get_model_config(model_name="neural_network")
+    model = NeuralNetwork(model_CONFIG={**model_config, "n_epochs": 1, "ensemble_size": ensemble_size})
+    model.fit_model(make_training_frame(n_days=60))
+    model.save_model(model_dir)
+
+
+def _measure(model_dir: str, mode: str, n_workers: int, env: dict, cwd: str) -> dict:
+    """Start n_workers loaders, wait until all hold the model and measure them side by side."""
+    children, baselines = [], []
+    try:
+        for _ in range(n_workers):
+            children.append(subprocess.Popen(
+                [sys.executable, "-c", CHILD_CODE, model_dir, mode], env=env, cwd=cwd,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+            ))
+        for child in children:
+            baselines.append(json.loads(child.stdout.readline()))
+            if child.stdout.readline().strip() != "loaded":
+                raise RuntimeError(f"Worker {child.pid} failed to load the model")
+
+        private_mb, pss_mb = [], []
+        for child, baseline in zip(children, baselines):
+            fields = _read_rollup(child.pid)
+            private_mb.append((_private_bytes(fields) - _private_bytes(baseline)) / 2**20)
+            pss_mb.append((fields.get("Pss", 0) - baseline.get("Pss", 0)) / 2**20)
+    finally:
+        for child in children:
+            if child.poll() is None:
+                child.stdin.close()
+                child.wait()
+    return {
+        "private_mb_per_worker": statistics.median(private_mb),
+        "pss_mb_per_worker": statistics.median(pss_mb),
+        "pss_mb_total": sum(pss_mb)
+    }
+
+
+def run(worker_counts: list, ensemble_size: int) -> dict:
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "LOG_LEVEL": "WARNING", "PYTHONPATH": repo_root}
+    with tempfile.TemporaryDirectory() as model_dir:
+        _prepare_model(model_dir, ensemble_size)
+        weights_mb = os.path.getsize(os.path.join(model_dir, "neural_network_weights.pt")) / 2**20
+        results = {
+            mode: {str(n_workers): _measure(model_dir, mode, n_workers, env, repo_root) for n_workers in worker_counts}
+            for mode in MODES
+        }
+    return {"ensemble_size": ensemble_size, "weights_mb": weights_mb, "modes": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark copied and memory-mapped model weights across worker processes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Concurrent worker processes")
+    parser.add_argument("--ensemble-size", type=int, default=1, help="Ensemble members, scales the size of the weights")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.workers, args.ensemble_size)
+    print(f"weights file {results['weights_mb']:.2f} MB (ensemble size {args.ensemble_size})")
+    for mode, by_workers in results["modes"].items():
+        for n_workers, stats in by_workers.items():
+            print(
+                f"{mode:7s} {n_workers:>3s} workers  private {stats['private_mb_per_worker']:7.2f} MB/worker  "
+                f"PSS {stats['pss_mb_per_worker']:7.2f} MB/worker  {stats['pss_mb_total']:7.2f} MB total"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
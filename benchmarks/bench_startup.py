@@ -0,0 +1,98 @@
+"""
+Startup benchmark.
+Measures, in fresh interpreters, the import time of solar_pred.main, the time until the model is loaded
+and warmed up (readiness) and the time to the first successful prediction.
+
+Usage: python -m benchmarks.bench_startup [--runs 5] [--output startup.json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+CHILD_CODE = """
+import time, json
+process_start = time.perf_counter()
+import solar_pred.main as main
+import_s = time.perf_counter() - process_start
+
+main.start_app_handler(main.app)()
+main.app.state.model_loaded.wait()
+ready_s = time.perf_counter() - process_start
+
+from benchmarks.synthetic import make_inference_frame
+frame = make_inference_frame(n_days=2)
+prediction_start = time.perf_counter()
+main.app.state.model.predict(frame)
+first_prediction_latency_s = time.perf_counter() - prediction_start
+first_prediction_s = time.perf_counter() - process_start
+
+print(json.dumps({
+    "import_s": import_s,
+    "ready_s": ready_s,
+    "first_prediction_s": first_prediction_s,
+    "first_prediction_latency_s": first_prediction_latency_s,
+    "model_status": main.app.state.model_status
+}))
+"""
+
+
+def _prepare_volume(volume_path: str) -> None:
+    """Train a small model on synthetic data so startup loads a trained model."""
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+    from solar_pred.core.ai_models._models_config import get_model_config
+    from benchmarks.synthetic import make_training_frame
+
+    model = NeuralNetwork(model_CONFIG=get_model_config(model_name="neural_network"))
+    model.fit_model(make_training_frame(n_days=30))
+    model.save_model(os.path.join(volume_path, "models"))
+
+
+def run(runs: int) -> dict:
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as volume_path:
+        _prepare_volume(volume_path)
+        env = {
+            **os.environ,
+            "VOLUME_PATH": volume_path,
+            "MODEL_DIR": os.path.join(volume_path, "models"),
+            "LOG_LEVEL": "WARNING",
+            "PYTHONPATH": repo_root
+        }
+
+        samples = []
+        for _ in range(runs):
+            result = subprocess.run(
+                [sys.executable, "-c", CHILD_CODE], env=env, cwd=repo_root,
+                capture_output=True, text=True, check=True
+            )
+            samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    summary = {}
+    for metric in ("import_s", "ready_s", "first_prediction_s", "first_prediction_latency_s"):
+        values = [sample[metric] for sample in samples]
+        summary[metric] = {"median": statistics.median(values), "min": min(values), "max": max(values)}
+    return {"runs": runs, "summary": summary, "samples": samples}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API server startup")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreter runs")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    for metric, stats in results["summary"].items():
+        print(f"{metric:28s} median {stats['median']:.3f}s  min {stats['min']:.3f}s  max {stats['max']:.3f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Thread count benchmark.
+Runs `concurrency` processes (standing in for uvicorn workers) that predict in a loop, for every
+combination of torch/BLAS threads per process and concurrency, and reports throughput and latency.
+Oversubscription shows up as falling throughput once threads * concurrency exceeds the CPUs.
+
+Usage: python -m benchmarks.bench_threads [--threads 1 2 4] [--concurrency 1 2 4] [--requests 200] [--output threads.json]
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import multiprocessing
+
+from solar_pred.core.runtime import RuntimeConfig, available_cpus, init_worker_process
+
+
+def _init_worker(runtime: RuntimeConfig, model_dir: str, n_days: int) -> None:
+    global _model, _frame
+    init_worker_process(runtime)
+
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+    from benchmarks.synthetic import make_inference_frame
+
+    _model = NeuralNetwork.load_from_file(model_dir)
+    _frame = make_inference_frame(n_days=n_days)
+    _model.predict_compact(_frame)
+
+
+def _predict_loop(n_requests: int) -> list:
+    latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        _model.predict_compact(_frame)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_case(model_dir: str, threads: int, concurrency: int, n_requests: int, n_days: int) -> dict:
+    runtime = RuntimeConfig(
+        cpus=available_cpus(), workers=concurrency, executor_workers=1,
+        torch_threads=threads, torch_interop_threads=1, blas_threads=threads
+    )
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(concurrency, initializer=_init_worker, initargs=(runtime, model_dir, n_days)) as pool:
+        # every worker is warmed up by its initializer, wait until all of them are running
+        pool.map(_predict_loop, [1] * concurrency)
+        start = time.perf_counter()
+        results = pool.map(_predict_loop, [n_requests] * concurrency, chunksize=1)
+        wall_s = time.perf_counter() - start
+
+    latencies = [latency for worker in results for latency in worker]
+    return {
+        "threads": threads,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / wall_s,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000
+    }
+
+
+def _prepare_model(model_dir: str) -> None:
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+    from solar_pred.core.ai_models._models_config import get_model_config
+    from benchmarks.synthetic import make_training_frame
+
+    model = NeuralNetwork(model_CONFIG=get_model_config(model_name="neural_network"))
+    model.fit_model(make_training_frame(n_days=30))
+    model.save_model(model_dir)
+
+
+def main():
+    cpus = available_cpus()
+    default_threads = sorted({1, 2, 4, cpus})
+    parser = argparse.ArgumentParser(description="Sweep torch/BLAS threads against request concurrency")
+    parser.add_argument("--threads", type=int, nargs="+", default=default_threads, help="Threads per process")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=sorted({1, 2, 4, cpus}), help="Parallel processes")
+    parser.add_argument("--requests", type=int, default=200, help="Predictions per process")
+    parser.add_argument("--days", type=int, default=7, help="Forecast days per prediction")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as model_dir:
+        _prepare_model(model_dir)
+        print(f"{cpus} CPUs available")
+        print(f"{'threads':>8s} {'concurrency':>12s} {'rps':>10s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+        for concurrency in args.concurrency:
+            for threads in args.threads:
+                result = run_case(model_dir, threads, concurrency, args.requests, args.days)
+                results.append(result)
+                print(
+                    f"{threads:8d} {concurrency:12d} {result['throughput_rps']:10.1f} "
+                    f"{result['p50_ms']:9.2f} {result['p95_ms']:9.2f} {result['p99_ms']:9.2f}"
+                )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpus": cpus, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
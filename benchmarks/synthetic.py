@@ -0,0 +1,62 @@
+"""Synthetic data generators, so benchmarks run without network access."""
+
+import numpy as np
+import pandas as pd
+
+WEATHER_COLUMNS = [
+    'global_tilted_irradiance_instant',
+    'global_tilted_irradiance',
+    'cloud_cover_mid',
+    'cloud_cover_high',
+    'uv_index',
+    'diffuse_radiation',
+    'direct_radiation_instant'
+]
+
+
+def _daylight_curve(index: pd.DatetimeIndex) -> np.ndarray:
+    hours = index.hour.to_numpy() + index.minute.to_numpy() / 60
+    return np.clip(np.sin((hours - 6) / 12 * np.pi), 0, None)
+
+
+def make_weather(start: str = "2024-01-01", n_days: int = 1, seed: int = 0) -> pd.DataFrame:
+    """Hourly weather in the format returned by get_weather_data_by_date (timestamp column, one column per variable)."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start=start, periods=n_days * 24, freq="1h")
+    daylight = _daylight_curve(index)
+    data = {"timestamp": index}
+    for i, column in enumerate(WEATHER_COLUMNS):
+        data[column] = (daylight * (100 + 50 * i) + rng.normal(0, 5, len(index))).clip(0).astype(np.float32)
+    return pd.DataFrame(data)
+
+
+def make_inverter(start: str = "2024-01-01", n_days: int = 1, seed: int = 0) -> pd.DataFrame:
+    """Hourly inverter output with a datetime index and a solar_power column."""
+    rng = np.random.default_rng(seed + 1)
+    index = pd.date_range(start=start, periods=n_days * 24, freq="1h", name="timestamp")
+    power = _daylight_curve(index) * 20 + rng.normal(0, 0.5, len(index))
+    return pd.DataFrame({"solar_power": power.clip(0)}, index=index)
+
+
+def make_suntimes(start: str = "2024-01-01", n_days: int = 1) -> pd.DataFrame:
+    """Sunrise/sunset table in the format returned by get_suntimes_by_date, fixed at 06:00/18:00."""
+    dates = pd.date_range(start=start, periods=n_days, freq="1D")
+    return pd.DataFrame({
+        "timestamp": dates.strftime("%Y-%m-%d"),
+        "sunrise": "06:00:00",
+        "sunset": "18:00:00"
+    })
+
+
+def make_training_frame(start: str = "2024-01-01", n_days: int = 1, seed: int = 0) -> pd.DataFrame:
+    """Preprocessed training frame (weather features + solar_power) as returned by DataProcessor.preprocess_training_input."""
+    weather = make_weather(start, n_days, seed).set_index("timestamp")
+    inverter = make_inverter(start, n_days, seed)
+    frame = weather.join(inverter, how="inner")
+    # keep daylight hours only, like the real pipeline
+    return frame[_daylight_curve(frame.index) > 0]
+
+
+def make_inference_frame(start: str = "2024-01-01", n_days: int = 1, seed: int = 0) -> pd.DataFrame:
+    """Preprocessed inference frame (weather features only)."""
+    return make_training_frame(start, n_days, seed).drop(columns=["solar_power"])
@@ -0,0 +1,166 @@
+"""
+Traffic driver for a running service.
+Sends a weighted mix of /predict, /predict/batch and /train calls from `concurrency` parallel clients for a fixed
+duration, for every concurrency level, and reports throughput, errors and p50/p95/p99 latency per endpoint.
+Point the service at loadtest/fake_openmeteo.py to keep the real weather API out of the measurement.
+
+Usage:
+    python -m loadtest.driver [--url http://localhost:8010/] [--concurrency 1 4 16] [--duration 30]
+                              [--mix predict=8,batch=1,train=1] [--locations 50] [--output loadtest.json]
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# around the quickstart plant
+LATITUDE = 37.759586
+LONGITUDE = 126.777767
+ALTITUDE = 38.0
+TRAIN_DATA_PATH = "datasets/training_input.json"
+OPERATIONS = ("predict", "batch", "train")
+
+
+def parse_mix(mix: str) -> dict:
+    """'predict=8,batch=1' -> {'predict': 8.0, 'batch': 1.0}"""
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name}. Available operations: {OPERATIONS}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def _percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class TrafficDriver:
+    def __init__(self, url: str, mix: dict, n_locations: int, batch_size: int, predict_days: int, seed: int = 0):
+        self.url = url.rstrip("/") + "/"
+        self.mix = mix
+        self.batch_size = batch_size
+        self.predict_days = predict_days
+        self.seed = seed
+        rng = random.Random(seed)
+        # distinct locations decide how much of the traffic the prediction cache can absorb
+        self.locations = [
+            (LATITUDE + rng.uniform(-0.5, 0.5), LONGITUDE + rng.uniform(-0.5, 0.5)) for _ in range(n_locations)
+        ]
+        self.train_rows = None
+        if "train" in mix:
+            with open(TRAIN_DATA_PATH, "r") as f:
+                self.train_rows = json.load(f)
+
+    def _panel(self, rng: random.Random, inverter_id: str) -> dict:
+        latitude, longitude = rng.choice(self.locations)
+        return {
+            "inverter_id": inverter_id,
+            "plant_id": "loadtest",
+            "latitude": latitude,
+            "longitude": longitude,
+            "altitude": ALTITUDE,
+            "predict_days": rng.randint(1, self.predict_days)
+        }
+
+    def _request(self, session: requests.Session, rng: random.Random, operation: str) -> requests.Response:
+        if operation == "predict":
+            return session.post(self.url + "predict", json=self._panel(rng, "loadtest"), timeout=300)
+        if operation == "batch":
+            panels = [self._panel(rng, f"loadtest-{i}") for i in range(self.batch_size)]
+            return session.post(self.url + "predict/batch", json=panels, timeout=300)
+        body = {"panel_metadata": self._panel(rng, "loadtest"), "panel_output": self.train_rows}
+        return session.post(self.url + "train", json=body, timeout=3600)
+
+    def _client(self, client_id: int, deadline: float) -> list:
+        rng = random.Random(self.seed * 1000 + client_id)
+        operations, weights = zip(*self.mix.items())
+        samples = []
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                operation = rng.choices(operations, weights)[0]
+                start = time.perf_counter()
+                try:
+                    status = self._request(session, rng, operation).status_code
+                except requests.RequestException:
+                    status = 0
+                samples.append((operation, status, time.perf_counter() - start))
+        return samples
+
+    def run(self, concurrency: int, duration_s: float) -> dict:
+        """Run `concurrency` clients for `duration_s` seconds. Requests still running at the deadline are finished and counted."""
+        start = time.perf_counter()
+        deadline = start + duration_s
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(self._client, range(concurrency), [deadline] * concurrency))
+        wall_s = time.perf_counter() - start
+
+        samples = [sample for client in results for sample in client]
+        report = {"concurrency": concurrency, "wall_s": wall_s, "total": _summary(samples, wall_s)}
+        for operation in self.mix:
+            report[operation] = _summary([sample for sample in samples if sample[0] == operation], wall_s)
+        return report
+
+
+def _summary(samples: list, wall_s: float) -> dict:
+    if not samples:
+        return {"requests": 0}
+    latencies = [latency for _, _, latency in samples]
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    return {
+        "requests": len(samples),
+        "errors": len(samples) - ok,
+        "statuses": statuses,
+        "throughput_rps": len(samples) / wall_s,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test a running solar prediction service")
+    parser.add_argument("--url", default="http://localhost:8010/", help="Base URL of the service")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Parallel clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per concurrency level")
+    parser.add_argument("--mix", default="predict=8,batch=1,train=1", help="Weighted operations, e.g. predict=8,batch=1,train=1")
+    parser.add_argument("--locations", type=int, default=50, help="Distinct plant locations")
+    parser.add_argument("--batch-size", type=int, default=20, help="Inverters per /predict/batch call")
+    parser.add_argument("--days", type=int, default=3, help="Max forecast days per prediction")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    driver = TrafficDriver(args.url, parse_mix(args.mix), args.locations, args.batch_size, args.days, args.seed)
+    reports = []
+    print(f"{'concurrency':>12s} {'operation':>10s} {'requests':>9s} {'errors':>7s} {'rps':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for concurrency in args.concurrency:
+        report = driver.run(concurrency, args.duration)
+        reports.append(report)
+        for operation in ("total", *driver.mix):
+            summary = report[operation]
+            if summary["requests"] == 0:
+                continue
+            print(
+                f"{concurrency:12d} {operation:>10s} {summary['requests']:9d} {summary['errors']:7d} "
+                f"{summary['throughput_rps']:9.2f} {summary['p50_ms']:9.1f} {summary['p95_ms']:9.1f} {summary['p99_ms']:9.1f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"url": args.url, "mix": driver.mix, "results": reports}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Local stand-in for the Open-Meteo forecast and historical forecast APIs.
+Serves synthetic hourly weather in the length-prefixed FlatBuffers format `openmeteo_requests` decodes,
+with configurable latency and injected failures, so the service can be load tested without the real API.
+
+Start the service with the weather URLs pointing here:
+    WEATHER_FORECAST_URL=http://localhost:8090/v1/forecast
+    WEATHER_HISTORICAL_URL=http://localhost:8090/v1/forecast
+
+Usage: python -m loadtest.fake_openmeteo [--port 8090] [--latency-ms 50] [--jitter-ms 20] [--error-rate 0.01] [--rate-limit-rate 0.01]
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from zoneinfo import ZoneInfo
+
+import flatbuffers
+import numpy as np
+
+from benchmarks.synthetic import make_weather
+
+HOUR_S = 3600
+
+# field slots of the openmeteo_sdk tables, in schema order
+RESPONSE_FIELDS = 12 # latitude, longitude, elevation, generation_time_ms, location_id, model, utc_offset_seconds, timezone, timezone_abbreviation, current, daily, hourly
+SLOT_LATITUDE, SLOT_LONGITUDE, SLOT_ELEVATION, SLOT_GENERATION_TIME = 0, 1, 2, 3
+SLOT_UTC_OFFSET, SLOT_TIMEZONE, SLOT_HOURLY = 6, 7, 11
+SLOT_TIME, SLOT_TIME_END, SLOT_INTERVAL, SLOT_VARIABLES = 0, 1, 2, 3
+SLOT_VALUES = 3
+
+
+def encode_response(latitude: float, longitude: float, timezone: str, utc_offset: int,
+                    start: int, end: int, values: list, generation_ms: float = 0.0) -> bytes:
+    """
+    One WeatherApiResponse message with hourly variables, prefixed with its length like the real API.
+
+    Args:
+        start (int): unix time of the first hour
+        end (int): unix time after the last hour
+        values (list): one float32 array per requested variable, in request order
+    """
+    builder = flatbuffers.Builder(1024)
+    variables = []
+    for array in values:
+        vector = builder.CreateNumpyVector(np.asarray(array, dtype=np.float32))
+        builder.StartObject(SLOT_VALUES + 1)
+        builder.PrependUOffsetTRelativeSlot(SLOT_VALUES, vector, 0)
+        variables.append(builder.EndObject())
+
+    builder.StartVector(4, len(variables), 4)
+    for variable in reversed(variables):
+        builder.PrependUOffsetTRelative(variable)
+    variables_vector = builder.EndVector()
+
+    builder.StartObject(SLOT_VARIABLES + 1)
+    builder.PrependInt64Slot(SLOT_TIME, start, 0)
+    builder.PrependInt64Slot(SLOT_TIME_END, end, 0)
+    builder.PrependInt32Slot(SLOT_INTERVAL, HOUR_S, 0)
+    builder.PrependUOffsetTRelativeSlot(SLOT_VARIABLES, variables_vector, 0)
+    hourly = builder.EndObject()
+
+    timezone_name = builder.CreateString(timezone)
+    builder.StartObject(RESPONSE_FIELDS)
+    builder.PrependFloat32Slot(SLOT_LATITUDE, latitude, 0.0)
+    builder.PrependFloat32Slot(SLOT_LONGITUDE, longitude, 0.0)
+    builder.PrependFloat32Slot(SLOT_GENERATION_TIME, generation_ms, 0.0)
+    builder.PrependInt32Slot(SLOT_UTC_OFFSET, utc_offset, 0)
+    builder.PrependUOffsetTRelativeSlot(SLOT_TIMEZONE, timezone_name, 0)
+    builder.PrependUOffsetTRelativeSlot(SLOT_HOURLY, hourly, 0)
+    builder.Finish(builder.EndObject())
+
+    message = builder.Output()
+    return len(message).to_bytes(4, byteorder="little") + message
+
+
+def _date_range(params: dict, today: date) -> tuple:
+    """First and last day (inclusive) of a request, either start_date/end_date or past_days/forecast_days."""
+    if "start_date" in params:
+        start = date.fromisoformat(params["start_date"][0])
+        end = date.fromisoformat(params.get("end_date", params["start_date"])[0])
+    else:
+        past_days = int(params.get("past_days", ["0"])[0])
+        forecast_days = int(params.get("forecast_days", ["7"])[0])
+        start = today - timedelta(days=past_days)
+        end = today + timedelta(days=forecast_days - 1)
+    if end < start:
+        raise ValueError(f"end date {end} is before start date {start}")
+    return start, end
+
+
+def build_forecast(params: dict) -> bytes:
+    """Synthetic weather for a parsed query string. Values depend on the location, so locations differ."""
+    started = time.perf_counter()
+    latitude = float(params["latitude"][0])
+    longitude = float(params["longitude"][0])
+    timezone = params.get("timezone", ["GMT"])[0]
+    variables = [name for value in params.get("hourly", []) for name in value.split(",") if name]
+
+    tz = ZoneInfo(timezone)
+    start, end = _date_range(params, datetime.now(tz).date())
+    n_days = (end - start).days + 1
+    start_local = datetime(start.year, start.month, start.day, tzinfo=tz)
+    start_ts = int(start_local.timestamp())
+    utc_offset = int(start_local.utcoffset().total_seconds())
+
+    seed = int(abs(latitude * 1000) + abs(longitude * 1000)) % 2**32
+    weather = make_weather(start=start.isoformat(), n_days=n_days, seed=seed)
+    values = []
+    for i, name in enumerate(variables):
+        # variables the generator does not know get a copy of a known curve
+        column = name if name in weather.columns else weather.columns[1 + i % (len(weather.columns) - 1)]
+        values.append(weather[column].to_numpy())
+
+    return encode_response(
+        latitude, longitude, timezone, utc_offset, start_ts, start_ts + n_days * 24 * HOUR_S, values,
+        generation_ms=(time.perf_counter() - started) * 1000
+    )
+
+
+class FakeOpenMeteoHandler(BaseHTTPRequestHandler):
+    # set by serve()
+    options = None
+    stats = None
+    stats_lock = threading.Lock()
+
+    def do_GET(self):
+        self._handle(parse_qs(urlparse(self.path).query))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self._handle(parse_qs(self.rfile.read(length).decode()))
+
+    def _handle(self, params: dict) -> None:
+        options = self.options
+        delay = options.latency_ms + random.uniform(-options.jitter_ms, options.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        draw = random.random()
+        if draw < options.error_rate:
+            self._count("error")
+            return self._send(500, b"Internal Server Error", "text/plain")
+        if draw < options.error_rate + options.rate_limit_rate:
+            self._count("rate_limited")
+            body = {"error": True, "reason": "Minutely API request limit exceeded. Please try again in one minute."}
+            return self._send(429, json.dumps(body).encode(), "application/json")
+
+        try:
+            body = build_forecast(params)
+        except (KeyError, ValueError) as e:
+            self._count("bad_request")
+            return self._send(400, json.dumps({"error": True, "reason": str(e)}).encode(), "application/json")
+        self._count("ok")
+        self._send(200, body, "application/octet-stream")
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self, outcome: str) -> None:
+        with self.stats_lock:
+            self.stats[outcome] = self.stats.get(outcome, 0) + 1
+
+    def log_message(self, format, *args):
+        if self.options.verbose:
+            super().log_message(format, *args)
+
+
+def serve(options) -> None:
+    FakeOpenMeteoHandler.options = options
+    FakeOpenMeteoHandler.stats = {}
+    server = ThreadingHTTPServer((options.host, options.port), FakeOpenMeteoHandler)
+    server.daemon_threads = True
+    print(f"Fake Open-Meteo listening on http://{options.host}:{options.port}/v1/forecast")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Responses: {FakeOpenMeteoHandler.stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Open-Meteo API")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8090, help="Port to listen on")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    serve(parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Offline batch forecasts, without the HTTP server.
+Reads a CSV or Parquet list of plants (inverter_id, plant_id, latitude, longitude, altitude and optionally
+predict_days), groups them by snapped location and sends shards of whole locations to a process pool.
+Every worker loads the model once, fetches the weather of a location once for all its plants and predicts the
+shard in one forward pass. The plant list is read in chunks and predictions are written to Parquet one shard at a
+time, so neither the input nor the output has to fit in memory. The memory budget caps the number of workers and
+shards in flight: workers start from an estimate of their size (`batch_worker_mb`) and report their resident memory
+with every shard, and the pool is restarted with fewer workers when the measured total goes over the budget.
+
+Usage: python -m solar_pred.batch plants.csv predictions.parquet [--days 1] [--memory-mb 4096] [--weather-provider replay]
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from solar_pred.core.config import config
+from solar_pred.core.exceptions import ValidationError
+from solar_pred.core.logging_config import get_logger
+from solar_pred.core.metrics import process_rss_bytes
+from solar_pred.core.prediction_cache import snap_location
+from solar_pred.core.runtime import worker_process_runtime, create_process_pool
+
+REQUIRED_COLUMNS = ("inverter_id", "plant_id", "latitude", "longitude", "altitude")
+OUTPUT_SCHEMA = (("inverter_id", "string"), ("plant_id", "string"), ("timestamp", "timestamp[ns]"), ("solar_power", "float64"))
+
+# model and data processor of a worker process, loaded once by the pool initializer
+_model = None
+_processor = None
+
+
+def iter_plants(path: str, default_days: int, chunk_rows: int = 65536) -> Iterator[pd.DataFrame]:
+    """Read the plant list from a .csv or .parquet file in chunks of about chunk_rows plants."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows))
+    else:
+        chunks = pd.read_csv(path, dtype={"inverter_id": str, "plant_id": str}, chunksize=chunk_rows)
+    for plants in chunks:
+        yield _check_plants(plants, default_days)
+
+
+def read_plants(path: str, default_days: int) -> pd.DataFrame:
+    """Read the whole plant list from a .csv or .parquet file."""
+    return pd.concat(list(iter_plants(path, default_days)), ignore_index=True)
+
+
+def _check_plants(plants: pd.DataFrame, default_days: int) -> pd.DataFrame:
+    missing = [column for column in REQUIRED_COLUMNS if column not in plants.columns]
+    if missing:
+        raise ValidationError(f"Plant list is missing the columns {missing}")
+    if "predict_days" not in plants.columns:
+        plants["predict_days"] = default_days
+    plants["predict_days"] = plants["predict_days"].fillna(default_days).astype(int)
+    plants["inverter_id"] = plants["inverter_id"].astype(str)
+    plants["plant_id"] = plants["plant_id"].astype(str)
+    return plants[list(REQUIRED_COLUMNS) + ["predict_days"]]
+
+
+def make_shards(plants: pd.DataFrame, shard_size: int) -> List[List[dict]]:
+    """
+    Split plants into shards of about shard_size plants. Plants at the same snapped location stay in one shard,
+    so their weather is fetched once. Coordinates are replaced by the snapped ones.
+    """
+    groups = {}
+    for plant in plants.to_dict(orient="records"):
+        location = snap_location(plant["latitude"], plant["longitude"], plant["altitude"])
+        plant["latitude"], plant["longitude"], plant["altitude"] = location
+        groups.setdefault(location, []).append(plant)
+
+    shards = []
+    shard = []
+    for location in sorted(groups):
+        if shard and len(shard) + len(groups[location]) > shard_size:
+            shards.append(shard)
+            shard = []
+        shard.extend(groups[location])
+    if shard:
+        shards.append(shard)
+    return shards
+
+
+def _init_batch_worker(model_dir: str, weather_provider: Optional[str]) -> None:
+    global _model, _processor
+    from solar_pred.core.choose_models import initialize_model, warm_up_model
+    from solar_pred.core.get_data import create_weather_provider
+    from solar_pred.core.preprocessing.processor import DataProcessor
+
+    # workers only predict, the optimizer and training history are not loaded
+    _model = initialize_model(chosen_model="neural_network", weights_dir=model_dir, inference_only=True)
+    warm_up_model(_model)
+    _processor = DataProcessor(create_weather_provider(weather_provider))
+
+
+def _forecast_shard(shard: List[dict]) -> Tuple[pd.DataFrame, Dict[str, str], int, float]:
+    """
+    Predict a shard in a worker.
+    Returns (predictions in long format, {inverter_id: error}, worker pid, resident memory of the worker in bytes).
+    """
+    from solar_pred.core.input_validation import PanelMetadata
+
+    if not _model.is_trained:
+        # the parent does not import torch, so a missing model is reported from here
+        raise ValidationError("No trained model in the model directory")
+    panels = [PanelMetadata(**plant) for plant in shard]
+    plant_ids = {plant["inverter_id"]: plant["plant_id"] for plant in shard}
+
+    # panels are grouped by their (snapped) location, every location is fetched and preprocessed once
+    inference_data, errors = _processor.preprocess_batch_inference_input(panels)
+    frames = []
+    if inference_data:
+        predictions = _model.predict_batch(inference_data, compact=True)
+        for inverter_id, output in predictions.items():
+            frames.append(pd.DataFrame({
+                "inverter_id": inverter_id,
+                "plant_id": plant_ids[inverter_id],
+                "timestamp": inference_data[inverter_id].index,
+                "solar_power": output["values"]
+            }))
+    result = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[name for name, _ in OUTPUT_SCHEMA])
+    return result, errors, os.getpid(), process_rss_bytes()
+
+
+def iter_shards(plants: Union[pd.DataFrame, Iterable[pd.DataFrame]], shard_size: int) -> Iterator[List[dict]]:
+    """
+    Shards of a plant list or of chunks of one. Locations are grouped within a chunk, a location whose plants
+    are spread over several chunks has its weather fetched once per chunk.
+    """
+    for chunk in [plants] if isinstance(plants, pd.DataFrame) else plants:
+        yield from make_shards(chunk, shard_size)
+
+
+def _processes_within_budget(budget: float, parent_rss: float, worker_rss: float, n_processes: int) -> int:
+    """Workers that fit in the budget next to the parent, fewer than n_processes."""
+    return max(1, min(n_processes - 1, int((budget - parent_rss) // max(worker_rss, 1.0))))
+
+
+def run_batch(
+        plants: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+        output_path: str,
+        model_dir: Optional[str] = None,
+        weather_provider: Optional[str] = None,
+        memory_mb: Optional[int] = None,
+        shard_size: Optional[int] = None
+    ) -> dict:
+    """
+    Forecast every plant and write the predictions to output_path (Parquet).
+    plants is a DataFrame or an iterable of DataFrame chunks (see iter_plants), chunks are read as shards are needed.
+    Arguments left as None are taken from Settings.
+
+    Returns:
+        dict: plants, predicted and failed counts, errors per inverter_id, rows written, timings and peak memory
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    logger = get_logger(__name__)
+    start = time.perf_counter()
+    model_dir = model_dir or config.model_dir
+    memory_mb = memory_mb or config.batch_memory_mb
+    budget = memory_mb * 2**20
+    shards = iter_shards(plants, shard_size or config.batch_shard_size)
+
+    # measured sizes are not known before the first shards, start from the estimate and keep a worker's share
+    # of the budget for the parent and the results in flight
+    max_processes = max(1, memory_mb // config.batch_worker_mb - 1)
+    if isinstance(plants, pd.DataFrame):
+        shards = list(shards)
+        max_processes = min(len(shards), max_processes)
+    n_processes = worker_process_runtime(max_processes).executor_workers
+    initial_processes = n_processes
+    logger.info(f"Forecasting on {n_processes} processes within {memory_mb} MB")
+
+    schema = pa.schema([pa.field(name, pa.type_for_alias(kind)) for name, kind in OUTPUT_SCHEMA])
+    errors = {}
+    n_plants = 0
+    rows = 0
+    worker_rss = {}
+    peak_bytes = 0.0
+
+    def write(shard: List[dict], result) -> None:
+        nonlocal n_plants, rows
+        frame, shard_errors, pid, rss = result
+        n_plants += len(shard)
+        errors.update(shard_errors)
+        worker_rss[pid] = rss
+        if not frame.empty:
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            rows += len(frame)
+
+    def memory_in_use() -> Tuple[float, float]:
+        """(parent RSS, largest worker RSS), workers of a pool are alike, the largest one stands for all of them."""
+        nonlocal peak_bytes
+        parent_rss = process_rss_bytes()
+        largest = max(worker_rss.values(), default=0.0)
+        peak_bytes = max(peak_bytes, parent_rss + largest * n_processes)
+        return parent_rss, largest
+
+    with pq.ParquetWriter(output_path, schema) as writer:
+        if n_processes == 1:
+            # a single worker would only add the cost of starting a process
+            _init_batch_worker(model_dir, weather_provider)
+            for shard in shards:
+                write(shard, _forecast_shard(shard))
+                memory_in_use()
+        else:
+            shards = iter(shards)
+            while True:
+                shrink_to = None
+                worker_rss.clear()
+                with create_process_pool(n_processes, initializer=_init_batch_worker, initargs=(model_dir, weather_provider)) as executor:
+                    # shards are written in input order, at most 2 results per worker wait in memory
+                    pending = deque()
+                    for shard in shards:
+                        if len(pending) >= 2 * n_processes:
+                            write(*_result(pending.popleft()))
+                            parent_rss, largest = memory_in_use()
+                            if n_processes > 1 and parent_rss + largest * n_processes > budget:
+                                shrink_to = _processes_within_budget(budget, parent_rss, largest, n_processes)
+                        pending.append((shard, executor.submit(_forecast_shard, shard)))
+                        if shrink_to is not None:
+                            break
+                    while pending:
+                        write(*_result(pending.popleft()))
+                        memory_in_use()
+                if shrink_to is None:
+                    break
+                logger.warning(
+                    f"Workers use {largest / 2**20:.0f} MB each, over the budget of {memory_mb} MB on {n_processes} "
+                    f"processes, continuing on {shrink_to}"
+                )
+                n_processes = shrink_to
+
+    elapsed = time.perf_counter() - start
+    peak_mb = peak_bytes / 2**20
+    if peak_mb > memory_mb:
+        logger.warning(f"Batch run used about {peak_mb:.0f} MB at its peak, over the budget of {memory_mb} MB")
+    return {
+        "plants": n_plants,
+        "predicted": n_plants - len(errors),
+        "failed": len(errors),
+        "rows": rows,
+        "processes": n_processes,
+        "initial_processes": initial_processes,
+        "elapsed_s": elapsed,
+        "plants_per_s": n_plants / elapsed if elapsed > 0 else 0.0,
+        "peak_memory_mb": peak_mb,
+        "memory_budget_mb": memory_mb,
+        "errors": errors
+    }
+
+
+def _result(item) -> tuple:
+    shard, future = item
+    return shard, future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast a list of plants without the HTTP server")
+    parser.add_argument("plants", help="CSV or Parquet file with inverter_id, plant_id, latitude, longitude, altitude[, predict_days]")
+    parser.add_argument("output", help="Parquet file to write the predictions to")
+    parser.add_argument("--days", type=int, default=1, help="predict_days of plants that do not set it")
+    parser.add_argument("--model-dir", help="Model directory, defaults to MODEL_DIR")
+    parser.add_argument("--weather-provider", help="Weather provider, defaults to WEATHER_PROVIDER")
+    parser.add_argument("--memory-mb", type=int, help="Memory budget, defaults to BATCH_MEMORY_MB")
+    parser.add_argument("--shard-size", type=int, help="Plants per task, defaults to BATCH_SHARD_SIZE")
+    parser.add_argument("--report", help="Write the run report (including errors per inverter) to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        plants = iter_plants(args.plants, args.days, config.batch_read_rows)
+        report = run_batch(plants, args.output, args.model_dir, args.weather_provider, args.memory_mb, args.shard_size)
+    except ValidationError as e:
+        print(e.message, file=sys.stderr)
+        return 2
+
+    print(
+        f"{report['predicted']}/{report['plants']} plants forecast in {report['elapsed_s']:.1f}s "
+        f"({report['plants_per_s']:.1f} plants/s) on {report['processes']} processes, "
+        f"{report['rows']} rows written to {args.output}, peak memory about {report['peak_memory_mb']:.0f} MB"
+    )
+    if report["failed"]:
+        print(f"{report['failed']} plants failed, e.g. {dict(list(report['errors'].items())[:3])}", file=sys.stderr)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["predicted"] > 0 or not report["plants"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
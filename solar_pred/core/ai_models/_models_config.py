@@ -1,21 +1,25 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from pydantic import BaseModel, Field, field_validator
 from pydantic_settings import BaseSettings
-from sklearn.preprocessing import StandardScaler
-import torch.cuda
+
+# torch and sklearn are slow to import, they are imported when a config is created
+if TYPE_CHECKING:
+    from sklearn.preprocessing import StandardScaler
 
 
 # Device Detection Utility
 def get_device() -> str:
     """Detect available device for model training/inference."""
+    import torch.cuda
     if torch.cuda.is_available():
         return "cuda"
     return "cpu"
 
 
 # Scaler Factory Functions
-def create_standard_scaler() -> StandardScaler:
+def create_standard_scaler() -> "StandardScaler":
     """Create a new StandardScaler instance."""
+    from sklearn.preprocessing import StandardScaler
     return StandardScaler()
 
 
@@ -48,7 +52,7 @@ class BaseMLConfig(BaseModel):
             raise ValueError('Feature names cannot be empty strings')
         return v
     
-    def create_scaler(self) -> StandardScaler:
+    def create_scaler(self) -> "StandardScaler":
         """Create a new scaler instance."""
         return create_standard_scaler()
 
@@ -59,6 +63,13 @@ class NeuralNetworkConfig(BaseMLConfig):
     batch_size: int = Field(default=32, ge=1, le=1024, description="Training batch size")
     learning_rate: float = Field(default=0.002, gt=0, le=1, description="Learning rate for optimizer")
     dropout_rate: float = Field(default=0.1, ge=0, lt=1, description="Dropout rate for regularization")
+    ensemble_size: int = Field(default=1, ge=1, le=64, description="Number of members trained in parallel with different seeds and bootstrap samples")
+    # incremental training
+    incremental_epochs: int = Field(default=3, ge=1, le=100, description="Epochs of an incremental update")
+    replay_size: int = Field(default=512, ge=0, description="Rows of stored history replayed with the new rows in an incremental update")
+    max_history_rows: int = Field(default=17520, ge=1, description="Most recent rows kept with the model for replay and full retrains")
+    full_retrain_every: int = Field(default=30, ge=1, description="Incremental updates before the next full retrain")
+    drift_factor: float = Field(default=2.0, gt=1, description="Full retrain when the loss on new rows exceeds drift_factor times the validation loss")
     
 
 
@@ -69,6 +80,7 @@ class MLConfigSettings(BaseSettings):
     nn_batch_size: Optional[int] = Field(default=None, alias="ML_NN_BATCH_SIZE")
     nn_learning_rate: Optional[float] = Field(default=None, alias="ML_NN_LEARNING_RATE")
     nn_dropout_rate: Optional[float] = Field(default=None, alias="ML_NN_DROPOUT_RATE")
+    nn_ensemble_size: Optional[int] = Field(default=None, alias="ML_NN_ENSEMBLE_SIZE")
     
     # Base ML overrides
     val_size: Optional[int] = Field(default=None, alias="ML_VAL_SIZE")
@@ -114,6 +126,8 @@ class ModelConfigFactory:
             config_data["learning_rate"] = cls._settings.nn_learning_rate
         if cls._settings.nn_dropout_rate is not None:
             config_data["dropout_rate"] = cls._settings.nn_dropout_rate
+        if cls._settings.nn_ensemble_size is not None:
+            config_data["ensemble_size"] = cls._settings.nn_ensemble_size
         if cls._settings.val_size is not None:
             config_data["val_size"] = cls._settings.val_size
         if cls._settings.normalize is not None:
@@ -1,24 +1,103 @@
+from dataclasses import dataclass, replace
+from typing import Optional, Sequence, Tuple
+
 import numpy as np
+import pandas as pd
+
+from solar_pred.core.preprocessing._feature_registry import build_feature_matrix
+
+
+@dataclass(frozen=True)
+class TrainingDataset:
+    """
+    Training rows of a model as contiguous arrays: float32 features (rows, features), float32 target and
+    int64 timestamps (nanoseconds, UTC). Slicing returns views, so splits do not copy the data.
+    """
+    X: np.ndarray
+    y: np.ndarray
+    timestamps: np.ndarray
+    features: Tuple[str, ...]
+    target_col: str
+    # timezone of the original index, to rebuild it
+    tz: Optional[object] = None
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, features: Sequence[str], target_col: str) -> "TrainingDataset":
+        """Build the features (see the feature registry) and target of a preprocessed training frame."""
+        if not isinstance(frame.index, pd.DatetimeIndex):
+            raise ValueError("DataFrame must have a datetime index")
+        return cls(
+            X=build_feature_matrix(frame, features),
+            y=frame[target_col].to_numpy(dtype=np.float32),
+            timestamps=frame.index.asi8.copy(),
+            features=tuple(features),
+            target_col=target_col,
+            tz=frame.index.tz
+        )
+
+    @classmethod
+    def concat(cls, datasets: Sequence["TrainingDataset"]) -> "TrainingDataset":
+        first = datasets[0]
+        return replace(
+            first,
+            X=np.concatenate([dataset.X for dataset in datasets]),
+            y=np.concatenate([dataset.y for dataset in datasets]),
+            timestamps=np.concatenate([dataset.timestamps for dataset in datasets])
+        )
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+    def __getitem__(self, rows: slice) -> "TrainingDataset":
+        """Rows of a slice, as views."""
+        if not isinstance(rows, slice):
+            raise TypeError("TrainingDataset rows are selected with a slice, use take() for indices")
+        return replace(self, X=self.X[rows], y=self.y[rows], timestamps=self.timestamps[rows])
 
-def train_val_split(train_set, model_CONFIG):
+    def take(self, indices: np.ndarray) -> "TrainingDataset":
+        """Rows at the given positions (a copy)."""
+        return replace(self, X=self.X[indices], y=self.y[indices], timestamps=self.timestamps[indices])
+
+    def copy(self) -> "TrainingDataset":
+        """The rows in memory, e.g. of a memory-mapped dataset."""
+        return replace(self, X=np.array(self.X), y=np.array(self.y), timestamps=np.array(self.timestamps))
+
+    def sort_dedupe(self) -> "TrainingDataset":
+        """Rows sorted by timestamp, of rows with the same timestamp the last one is kept."""
+        order = np.argsort(self.timestamps, kind="stable")
+        sorted_timestamps = self.timestamps[order]
+        last = np.append(sorted_timestamps[1:] != sorted_timestamps[:-1], True)
+        return self.take(order[last])
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        index = pd.DatetimeIndex(self.timestamps)
+        return index.tz_localize("UTC").tz_convert(self.tz) if self.tz is not None else index
+
+    def to_frame(self) -> pd.DataFrame:
+        """Features and target as a DataFrame, e.g. for inspection."""
+        frame = pd.DataFrame(self.X, index=self.index, columns=list(self.features))
+        frame[self.target_col] = self.y
+        return frame
+
+
+def train_val_split(train_set: TrainingDataset, model_CONFIG) -> Tuple[TrainingDataset, TrainingDataset]:
     val_size = model_CONFIG['val_size']
     separate_val_set = model_CONFIG['separate_val_set']
 
     # Get the validation set. If separate_val_set is True, then we need to separate the validation set from the training set.
-    val_set = train_set.iloc[-val_size:]
+    # Both are views of train_set.
+    val_set = train_set[-val_size:]
     if separate_val_set:
-        train_index = [element for element in train_set.index if element not in val_set.index]
-        train_set = train_set.loc[train_index]
+        train_set = train_set[:-val_size]
 
     return train_set, val_set
 
-def normalize_train_val(train_set, val_set, scaler_X, scaler_y, model_CONFIG):
+def normalize_train_val(train_set: TrainingDataset, val_set: TrainingDataset, scaler_X, scaler_y, model_CONFIG):
     # Split the data into features and target
-    X_train = train_set[model_CONFIG['features_to_use']].values
-    y_train = train_set[model_CONFIG['target_col']].values
-    X_val = val_set[model_CONFIG['features_to_use']].values
-    y_val = val_set[model_CONFIG['target_col']].values
-    
+    X_train, y_train = train_set.X, train_set.y
+    X_val, y_val = val_set.X, val_set.y
+
     # Normalize if the model_CONFIG['normalize'] is True, otherwise return the data as is
     if model_CONFIG['normalize']:
         X_train = scaler_X.fit_transform(X_train)
@@ -27,4 +106,4 @@ def normalize_train_val(train_set, val_set, scaler_X, scaler_y, model_CONFIG):
         y_train = scaler_y.fit_transform(y_train.reshape(-1, 1)).flatten()
         y_val = scaler_y.transform(y_val.reshape(-1, 1)).flatten()
 
-    return X_train, X_val, y_train, y_val
\ No newline at end of file
+    return X_train, X_val, y_train, y_val
@@ -0,0 +1,114 @@
+"""
+Rolling-origin backtesting.
+For every forecast origin a fresh model is trained on the history before the origin and predicts the
+following `predict_days`. The history comes from the history store, which already holds the weather of every
+row, so no weather is downloaded. Folds run in parallel processes that receive the history once.
+Note that the stored weather is the archived (observed) weather, so scores are an upper bound of the skill
+with forecast weather.
+"""
+
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import torch
+
+from solar_pred.core.ai_models._models_config import get_model_config
+from solar_pred.core.exceptions import TrainSizeError, TestSizeError
+from solar_pred.core.logging_config import get_logger
+from solar_pred.core.runtime import create_process_pool
+
+# history of a pool process
+_history = None
+
+
+def _load_history(history: pd.DataFrame) -> None:
+    global _history
+    _history = history
+
+
+def _run_fold(origin: pd.Timestamp, predict_days: int) -> Dict:
+    """Train on rows before origin, predict the next predict_days. Runs in a pool process."""
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+
+    fold_start = time.perf_counter()
+    end = origin + pd.Timedelta(days=predict_days)
+    train_set = _history.loc[_history.index < origin]
+    test_set = _history.loc[(_history.index >= origin) & (_history.index < end)]
+    fold = {"origin": origin.strftime("%Y%m%d%H%M%S"), "train_rows": len(train_set), "test_rows": len(test_set)}
+
+    try:
+        model = NeuralNetwork(model_CONFIG=get_model_config(model_name="neural_network"))
+        model.fit_model(train_set)
+        fold["train_s"] = time.perf_counter() - fold_start
+
+        predict_start = time.perf_counter()
+        predictions = np.asarray(model.predict_compact(test_set)["values"])
+        fold["predict_s"] = time.perf_counter() - predict_start
+    except (TrainSizeError, TestSizeError) as e:
+        fold["error"] = str(e)
+        fold["total_s"] = time.perf_counter() - fold_start
+        return fold
+
+    fold["horizon_days"] = ((test_set.index - origin) // pd.Timedelta(days=1) + 1).to_numpy()
+    fold["predictions"] = predictions.reshape(-1)
+    fold["targets"] = test_set[model.target_col].to_numpy(dtype=np.float64)
+    fold["total_s"] = time.perf_counter() - fold_start
+    return fold
+
+
+def _is_scored(fold: Dict) -> bool:
+    return "error" not in fold and len(fold["targets"]) > 0
+
+
+def _scores(predictions: np.ndarray, targets: np.ndarray) -> Dict:
+    from solar_pred.core.ai_models.neural_network.model import PercentageErrorLoss
+
+    loss = PercentageErrorLoss()(torch.from_numpy(predictions), torch.from_numpy(targets)).item()
+    return {
+        "rows": int(len(targets)),
+        "mae": float(np.mean(np.abs(predictions - targets))),
+        "percentage_error": loss
+    }
+
+
+def run_backtest(history: pd.DataFrame, origins: List[pd.Timestamp], predict_days: int = 1) -> Dict:
+    """
+    Backtest on a preprocessed history (weather features + target, datetime index).
+
+    Returns:
+        dict: {"folds": per origin rows, scores and timings, "horizons": scores per horizon day,
+               "overall": scores over all folds, "wall_s": float}
+    """
+    logger = get_logger(__name__)
+    wall_start = time.perf_counter()
+    origins = sorted(pd.Timestamp(origin) for origin in origins)
+
+    with create_process_pool(len(origins), initializer=_load_history, initargs=(history,)) as executor:
+        folds = list(executor.map(_run_fold, origins, [predict_days] * len(origins)))
+
+    scored = [fold for fold in folds if _is_scored(fold)]
+    horizons = []
+    if scored:
+        horizon_days = np.concatenate([fold["horizon_days"] for fold in scored])
+        predictions = np.concatenate([fold["predictions"] for fold in scored])
+        targets = np.concatenate([fold["targets"] for fold in scored])
+        for day in range(1, predict_days + 1):
+            mask = horizon_days == day
+            if mask.any():
+                horizons.append({"day": day, **_scores(predictions[mask], targets[mask])})
+        overall = _scores(predictions, targets)
+    else:
+        overall = {"rows": 0, "mae": None, "percentage_error": None}
+
+    report_folds = []
+    for fold in folds:
+        report = {key: value for key, value in fold.items() if key not in ("horizon_days", "predictions", "targets")}
+        if _is_scored(fold):
+            report.update(_scores(fold["predictions"], fold["targets"]))
+        report_folds.append(report)
+
+    wall_s = time.perf_counter() - wall_start
+    logger.info(f"Backtest of {len(origins)} origins, {predict_days} days ahead, took {wall_s:.1f}s")
+    return {"folds": report_folds, "horizons": horizons, "overall": overall, "wall_s": wall_s}
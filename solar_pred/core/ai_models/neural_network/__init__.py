@@ -1,10 +1,10 @@
 
-def load_nr_model(weights_dir):
+def load_nr_model(weights_dir, inference_only=False, shared_weights=False):
     from .model import NeuralNetwork
     try:
-        return NeuralNetwork.load_from_file(file_directory=weights_dir)
+        return NeuralNetwork.load_from_file(file_directory=weights_dir, inference_only=inference_only, shared_weights=shared_weights)
     except FileNotFoundError:
         # load a new model
         from solar_pred.core.ai_models._models_config import get_model_config
         model_config = get_model_config(model_name="neural_network")
-        return NeuralNetwork(model_CONFIG=model_config)
+        return NeuralNetwork(model_CONFIG=model_config, inference_only=inference_only)
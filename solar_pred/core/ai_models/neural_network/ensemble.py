@@ -0,0 +1,96 @@
+"""
+Ensemble of NeuralNetwork members.
+Members are trained in parallel worker processes, each with its own seed and bootstrap sample of the
+(already normalized) training set. Their weights are stacked along a leading member dimension,
+so inference runs all members in one batched forward pass and averages them.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import torch
+
+from solar_pred.core.logging_config import get_logger
+from solar_pred.core.runtime import worker_process_runtime, create_process_pool
+
+# linear layers of NeuralNetwork in forward order, every layer but the last is followed by a relu
+LAYERS = ("fc1", "fc2", "fc3", "fc4")
+
+# training arrays of a worker process, sent once per process instead of once per member
+_train_arrays = None
+
+
+def _init_member_worker(X_train: np.ndarray, y_train: np.ndarray) -> None:
+    global _train_arrays
+    _train_arrays = (X_train, y_train)
+
+
+def _train_member(model_CONFIG: dict, seed: int) -> Dict[str, torch.Tensor]:
+    from .model import NeuralNetwork
+
+    X_train, y_train = _train_arrays
+    member = NeuralNetwork(model_CONFIG, seed=seed)
+    # bootstrap sample, different for every member
+    indices = np.random.default_rng(seed).integers(0, len(X_train), len(X_train))
+    member.train_epochs(X_train[indices], y_train[indices])
+    return {name: tensor.cpu() for name, tensor in member.state_dict().items()}
+
+
+def train_members(model_CONFIG: dict, X_train: np.ndarray, y_train: np.ndarray, seeds: List[int]) -> List[Dict[str, torch.Tensor]]:
+    """
+    Train one member per seed. Members run in parallel processes, the CPUs of this worker are split between them.
+
+    Returns:
+        List[dict]: state dicts of the members, in the order of seeds
+    """
+    global _train_arrays
+    logger = get_logger(__name__)
+
+    runtime = worker_process_runtime(len(seeds))
+    logger.info(
+        f"Training {len(seeds)} ensemble members in {runtime.executor_workers} processes, {runtime.torch_threads} threads each"
+    )
+
+    if runtime.executor_workers == 1:
+        # starting a process costs more than it saves on a single CPU
+        _train_arrays = (X_train, y_train)
+        try:
+            return [_train_member(model_CONFIG, seed) for seed in seeds]
+        finally:
+            _train_arrays = None
+
+    with create_process_pool(len(seeds), initializer=_init_member_worker, initargs=(X_train, y_train)) as executor:
+        return list(executor.map(_train_member, [model_CONFIG] * len(seeds), seeds))
+
+
+def stack_members(state_dicts: List[Dict[str, torch.Tensor]], device: str) -> Dict[str, torch.Tensor]:
+    """Stack the linear layer weights of the members into (members, out, in) and (members, out) tensors."""
+    stacked = {}
+    for layer in LAYERS:
+        for param in ("weight", "bias"):
+            name = f"{layer}.{param}"
+            stacked[name] = torch.stack([state_dict[name] for state_dict in state_dicts]).to(device)
+    return stacked
+
+
+def ensemble_forward(weights: Dict[str, torch.Tensor], X: torch.Tensor) -> torch.Tensor:
+    """
+    Forward pass of all members at once (inference only, dropout is not applied).
+
+    Args:
+        weights (dict): Stacked weights from stack_members
+        X (torch.Tensor): Input of shape (rows, features)
+
+    Returns:
+        torch.Tensor: Mean prediction of the members, shape (rows, 1)
+    """
+    n_members = weights["fc1.weight"].shape[0]
+    hidden = X.unsqueeze(0).expand(n_members, -1, -1)
+    for i, layer in enumerate(LAYERS):
+        # (members, rows, in) @ (members, in, out) + (members, 1, out)
+        hidden = torch.baddbmm(
+            weights[f"{layer}.bias"].unsqueeze(1), hidden, weights[f"{layer}.weight"].transpose(1, 2)
+        )
+        if i < len(LAYERS) - 1:
+            hidden = torch.relu(hidden)
+    return hidden.mean(dim=0)
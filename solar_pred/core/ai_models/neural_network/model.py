@@ -8,10 +8,18 @@ import random
 import copy
 import pickle
 import pandas as pd
-
-from solar_pred.core.ai_models._models_general import train_val_split, normalize_train_val
-from solar_pred.core.exceptions import TrainSizeError, TestSizeError
+import time
+from datetime import datetime
+from typing import Iterable
+
+from solar_pred.core.ai_models._models_general import TrainingDataset, train_val_split, normalize_train_val
+from solar_pred.core.preprocessing._feature_registry import build_feature_matrix, required_columns, feature_spec, check_feature_spec
+from solar_pred.core.ai_models.neural_network.ensemble import train_members, stack_members, ensemble_forward
+from solar_pred.core.exceptions import TrainSizeError, TestSizeError, ModelTrainingError
 from solar_pred.core.logging_config import get_logger
+from solar_pred.core.serialization import compact_prediction, format_timestamps
+from solar_pred.core.checkpoint import atomic_pickle_dump, atomic_torch_save
+from solar_pred.core.metrics import stage_timer, untimed_stages, TRAINING_EPOCH_SECONDS, TRAINING_SAMPLES_PER_SECOND
 
 # Add safe globals for newer PyTorch versions
 if hasattr(torch.serialization, 'add_safe_globals'):
@@ -42,9 +50,16 @@ def set_seed(seed, full_determinism):
             torch.backends.cudnn.benchmark = False
 
 class NeuralNetwork(nn.Module):
-    def __init__(self, model_CONFIG: dict):
+    CHECKPOINT_FILENAME = 'neural_network_model.pkl'
+    # the weights once more, in a file that inference-only processes memory-map and share
+    WEIGHTS_FILENAME = 'neural_network_weights.pt'
+    CHECKPOINT_FILES = (WEIGHTS_FILENAME, CHECKPOINT_FILENAME)
+
+    def __init__(self, model_CONFIG: dict, seed: int = 42, inference_only: bool = False):
         # Set seeds for better reproducibility and if deterministic is true make it fully deterministic.
-        set_seed(42, model_CONFIG['deterministic'])
+        # Inference does not draw random numbers, an inference-only model leaves the global seeds alone.
+        if not inference_only:
+            set_seed(seed, model_CONFIG['deterministic'])
         
         super(NeuralNetwork, self).__init__()
         self.model_CONFIG = model_CONFIG
@@ -66,11 +81,23 @@ class NeuralNetwork(nn.Module):
         self.dropout = nn.Dropout(model_CONFIG['dropout_rate'])
 
         self.learning_rate = model_CONFIG['learning_rate']
-        self.optimizer = optim.Adam(self.parameters(), lr=self.learning_rate)
+        # an inference-only model has no optimizer or training history and cannot be trained
+        self.inference_only = inference_only
+        self.optimizer = None if inference_only else optim.Adam(self.parameters(), lr=self.learning_rate)
 
         self.is_trained = False
+        # changes every time the weights change, used to invalidate cached predictions
+        self.model_version = None
+        # stacked member weights when trained as an ensemble (ensemble_size > 1)
+        self.ensemble_weights = None
+        # incremental updates since the last full training, and how the model was last trained ("full"/"incremental")
+        self.incremental_updates = 0
+        self.last_fit_mode = None
 
         self.to(self.device)
+        if inference_only:
+            self.requires_grad_(False)
+            self.eval()
 
     def forward(self, x):
 
@@ -89,8 +116,20 @@ class NeuralNetwork(nn.Module):
         x = self.fc4(x)
         return x
 
+    def as_dataset(self, data_set) -> TrainingDataset:
+        """TrainingDataset of a preprocessed training frame with the features of this model, datasets are returned as they are."""
+        if isinstance(data_set, TrainingDataset):
+            return data_set
+        return TrainingDataset.from_frame(data_set, self.features_to_use, self.target_col)
+
+    def _check_trainable(self) -> None:
+        if self.inference_only:
+            raise ModelTrainingError("The model was loaded for inference only")
+
     def prepare_train_data(self, train_set):    
-        
+        self._check_trainable()
+        train_set = self.as_dataset(train_set)
+
         # Check if the training set is too small
         min_train_size = self.model_CONFIG['val_size'] + 1
         if len(train_set) < min_train_size:
@@ -99,7 +138,7 @@ class NeuralNetwork(nn.Module):
         # Split the data into training and validation sets
         train_set, val_set = train_val_split(train_set, self.model_CONFIG)
 
-        # save unprocessed train and val sets for visualization
+        # save unnormalized train and val sets (views of the same arrays) for visualization and incremental updates
         self.train_split = train_set
         self.val_split = val_set
 
@@ -118,15 +157,170 @@ class NeuralNetwork(nn.Module):
         train_sets, val_sets = self.prepare_train_data(train_set)
         # Train the model
         X_train, y_train = train_sets
-        
+
+        ensemble_size = self.model_CONFIG.get('ensemble_size', 1)
+        if ensemble_size > 1:
+            member_states = train_members(self.model_CONFIG, X_train, y_train, seeds=[42 + i for i in range(ensemble_size)])
+            # the module itself holds the first member
+            self.load_state_dict(member_states[0])
+            self.ensemble_weights = stack_members(member_states, self.device)
+            self.eval()
+        else:
+            self.train_epochs(X_train, y_train)
+            self.ensemble_weights = None
+
+        # Test on validation set
+        X_val, y_val = val_sets
+        # Store validation metrics for monitoring
+        self.val_loss = self.evaluate(X_val, y_val)
+
+        self.is_trained = True
+        self.incremental_updates = 0
+        self.last_fit_mode = "full"
+        self.model_version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        return self
+
+    def fit_out_of_core(self, dataset: TrainingDataset, chunk_rows: int = 65536, prefetch: int = 2):
+        """
+        Train on a dataset that does not have to fit in memory, e.g. one opened with out_of_core.open_memmap_dataset.
+        Scalers are fitted in a streaming pass and batches are read chunk by chunk, in the same order fit_model uses.
+        The dataset must be in time order, the last val_size rows are the validation set. Only the most recent
+        max_history_rows rows are kept with the model, and only if they are one series: the kept history is
+        de-duplicated on timestamp, rows of several inverters at the same time would collapse into one.
+        Trains a single network, ensemble members need their bootstrap samples in memory.
+        """
+        from solar_pred.core.ai_models.out_of_core import fit_scalers_streaming, PrefetchLoader
+
+        self._check_trainable()
+        logger = get_logger(__name__)
+        min_train_size = self.model_CONFIG['val_size'] + 1
+        if len(dataset) < min_train_size:
+            raise TrainSizeError(f"The training set is too small - {len(dataset)} rows. It must contain at least {min_train_size} rows.")
+        if self.model_CONFIG.get('ensemble_size', 1) > 1:
+            logger.warning("Out-of-core training trains a single network, ensemble_size is ignored")
+
+        train_set, val_set = train_val_split(dataset, self.model_CONFIG)
+        scalers = (None, None)
+        if self.model_CONFIG['normalize']:
+            with stage_timer("scaling"):
+                fit_scalers_streaming(train_set, self.scaler_X, self.scaler_y, chunk_rows)
+            scalers = (self.scaler_X, self.scaler_y)
+        loader = PrefetchLoader(train_set, self.model_CONFIG['batch_size'], chunk_rows, *scalers, prefetch=prefetch)
+        self.train_batches(loader, len(train_set))
+        self.ensemble_weights = None
+
+        self.val_loss = self.evaluate(*self._normalize(val_set.copy()))
+        recent = dataset[-self.model_CONFIG.get('max_history_rows', 17520):].copy()
+        if np.unique(recent.timestamps).size == len(recent):
+            self.train_split, self.val_split = train_val_split(recent, self.model_CONFIG)
+        else:
+            logger.info("The dataset holds several series with the same timestamps, no training history is kept with the model")
+            self.train_split = self.val_split = None
+
+        self.is_trained = True
+        self.incremental_updates = 0
+        self.last_fit_mode = "full"
+        self.model_version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        logger.info(f"Out-of-core training on {len(train_set)} rows, validation loss {self.val_loss:.5f}")
+        return self
+
+    def fit_incremental(self, new_set, history=None):
+        """
+        Update the model with new rows only.
+        Scaler statistics are updated with partial_fit and the network is fine-tuned for a few epochs on the new rows
+        plus a replay sample of the history. Falls back to a full retrain on the history every `full_retrain_every`
+        updates, when the loss on the new rows shows drift, or if the model is not trained yet.
+        The history defaults to the rows kept with the model, pass `history` (including new_set) to use another source.
+        """
+        self._check_trainable()
+        logger = get_logger(__name__)
+        if len(new_set) < 1:
+            raise TrainSizeError("The training set is empty.")
+
+        new_set = self.as_dataset(new_set)
+        if history is None:
+            history = self._merge_history(new_set)
+        else:
+            history = self.as_dataset(history)[-self.model_CONFIG.get('max_history_rows', 17520):]
+        full_retrain_reason = None
+        if not self.is_trained:
+            full_retrain_reason = "model is not trained"
+        elif self.ensemble_weights is not None or not self.model_CONFIG['normalize']:
+            full_retrain_reason = "incremental updates need a single normalized model"
+        elif self.incremental_updates + 1 >= self.model_CONFIG.get('full_retrain_every', 30):
+            full_retrain_reason = "scheduled"
+        else:
+            new_loss = self.evaluate(*self._normalize(new_set))
+            val_loss = getattr(self, 'val_loss', None)
+            if val_loss is not None and new_loss > self.model_CONFIG.get('drift_factor', 2.0) * val_loss:
+                full_retrain_reason = f"drift, loss on new rows {new_loss:.5f} vs validation loss {val_loss:.5f}"
+
+        if full_retrain_reason is not None:
+            logger.info(f"Full retrain on {len(history)} rows: {full_retrain_reason}")
+            return self.fit_model(history)
+
+        # update the running scaler statistics with the new rows
+        with stage_timer("scaling"):
+            self.scaler_X.partial_fit(new_set.X)
+            self.scaler_y.partial_fit(new_set.y.reshape(-1, 1))
+
+        # replay older rows so fine-tuning does not forget them
+        older = history.take(np.flatnonzero(~np.isin(history.timestamps, new_set.timestamps)))
+        n_replay = min(self.model_CONFIG.get('replay_size', 512), len(older))
+        replay = older.take(np.random.RandomState(len(history)).choice(len(older), size=n_replay, replace=False))
+        X_train, y_train = self._normalize(TrainingDataset.concat([new_set, replay]).sort_dedupe())
+        self.train_epochs(X_train, y_train, n_epochs=self.model_CONFIG.get('incremental_epochs', 3))
+
+        # the most recent rows are the validation set
+        val_size = self.model_CONFIG['val_size']
+        self.train_split = history
+        self.val_split = history[-val_size:]
+        self.val_loss = self.evaluate(*self._normalize(self.val_split))
+
+        self.incremental_updates += 1
+        self.last_fit_mode = "incremental"
+        self.model_version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        logger.info(f"Incremental update on {len(new_set)} new and {n_replay} replayed rows, validation loss {self.val_loss:.5f}")
+        return self
+
+    def _merge_history(self, new_set: TrainingDataset) -> TrainingDataset:
+        """Kept history with the new rows added (new rows win on duplicate timestamps), capped to max_history_rows."""
+        kept = [split for split in (getattr(self, 'train_split', None), getattr(self, 'val_split', None)) if split is not None]
+        history = TrainingDataset.concat(kept + [new_set]).sort_dedupe()
+        return history[-self.model_CONFIG.get('max_history_rows', 17520):]
+
+    def _normalize(self, data_set: TrainingDataset):
+        """Normalized features and target of a training dataset, with the current scalers."""
+        X, y = data_set.X, data_set.y
+        if self.model_CONFIG['normalize']:
+            X = self.scaler_X.transform(X)
+            y = self.scaler_y.transform(y.reshape(-1, 1)).flatten()
+        return X, y
+
+    def evaluate(self, X_val: np.ndarray, y_val: np.ndarray) -> float:
+        """Loss on normalized validation arrays."""
+        criterion = PercentageErrorLoss()
+        with torch.no_grad():
+            val_states = torch.FloatTensor(X_val).to(self.device)
+            val_targets = torch.FloatTensor(y_val).to(self.device).unsqueeze(1)
+            val_predictions = self._predict_tensor(val_states)
+            val_loss = criterion(val_predictions, val_targets)
+        return val_loss.item()
+
+    def train_epochs(self, X_train: np.ndarray, y_train: np.ndarray, n_epochs: int = None):
+        """Run the training epochs on normalized arrays, n_epochs defaults to the configured number."""
+        batch_size = self.model_CONFIG['batch_size']
+        batches = [(X_train[i:i+batch_size], y_train[i:i+batch_size]) for i in range(0, len(X_train), batch_size)]
+        return self.train_batches(batches, len(X_train), n_epochs)
+
+    def train_batches(self, batches: Iterable, n_samples: int, n_epochs: int = None):
+        """Run the training epochs on normalized (batch_X, batch_y) pairs. Every epoch iterates over batches once."""
         self.train()  # Set the model to training mode
         criterion = PercentageErrorLoss()
-        for epoch in range(self.model_CONFIG['n_epochs']):
+        for epoch in range(n_epochs or self.model_CONFIG['n_epochs']):
+            epoch_start = time.perf_counter()
             total_loss = 0
-            for i in range(0, len(X_train), self.model_CONFIG['batch_size']):
-                batch_X = X_train[i:i+self.model_CONFIG['batch_size']]
-                batch_y = y_train[i:i+self.model_CONFIG['batch_size']]
-                
+            for batch_X, batch_y in batches:
                 states = torch.FloatTensor(batch_X).to(self.device)
                 targets = torch.FloatTensor(batch_y).to(self.device).unsqueeze(1)
                 
@@ -139,19 +333,10 @@ class NeuralNetwork(nn.Module):
                 
                 total_loss += loss.item()
             self.eval()
-        
-        # Test on validation set
-        X_val, y_val = val_sets
-        with torch.no_grad():
-            val_states = torch.FloatTensor(X_val).to(self.device)
-            val_targets = torch.FloatTensor(y_val).to(self.device).unsqueeze(1)
-            val_predictions = self(val_states)
-            val_loss = criterion(val_predictions, val_targets)
-            
-            # Store validation metrics for monitoring
-            self.val_loss = val_loss.item()
 
-        self.is_trained = True
+            epoch_seconds = time.perf_counter() - epoch_start
+            TRAINING_EPOCH_SECONDS.observe(epoch_seconds)
+            TRAINING_SAMPLES_PER_SECOND.set(n_samples / epoch_seconds if epoch_seconds > 0 else 0.0)
         return self
     
     def prepare_inference_data(self, test):
@@ -160,14 +345,13 @@ class NeuralNetwork(nn.Module):
         if len(test) < 1:
             raise TestSizeError("The test set is too small. It must contain at least 1 row.")
 
-        # We only use the features_to_use to train the model.
-        test = test[self.features_to_use]
-
+        # We only use the features_to_use to train the model, built the same way as for training.
         # We do not need y_test because we can just take the original df to compare the results. And in production we would not have y_test.
-        X_test = test.values
+        X_test = build_feature_matrix(test, self.features_to_use)
 
         if self.model_CONFIG['normalize']:
-            X_test = self.scaler_X.transform(X_test)
+            with stage_timer("scaling"):
+                X_test = self.scaler_X.transform(X_test)
         
         return X_test
 
@@ -176,38 +360,109 @@ class NeuralNetwork(nn.Module):
         X = self.prepare_inference_data(test_set)
 
         # Predict
-        self.eval()
-        with torch.no_grad():
-            X_tensor = torch.FloatTensor(X).to(self.device)
-            predictions = self(X_tensor).cpu().numpy()
-
-        processed_predictions = self.postprocess_predictions(predictions.squeeze())
-        timestamps = test_set.index.strftime("%Y%m%d%H%M%S")
-        output = {timestamp:prediction for timestamp, prediction in zip(timestamps, processed_predictions)}
+        processed_predictions = self.postprocess_predictions(self._forward_inference(X))
+        timestamps = format_timestamps(test_set.index)
+        output = dict(zip(timestamps.tolist(), processed_predictions))
 
         return output
+
+    def predict_compact(self, test_set) -> dict:
+        """Predict and return the compact format (start, freq, offsets, values) instead of one entry per timestamp."""
+        X = self.prepare_inference_data(test_set)
+        processed_predictions = self.postprocess_predictions(self._forward_inference(X))
+        return compact_prediction(test_set.index, processed_predictions)
+
+    def predict_batch(self, test_sets: dict, compact: bool = False) -> dict:
+        """
+        Predict for several inference sets with a single forward pass.
+
+        Args:
+            test_sets (dict): Inference DataFrames keyed by an identifier, e.g. inverter_id
+            compact (bool): Return compact predictions instead of {timestamp: prediction} dictionaries
+
+        Returns:
+            dict: Predictions under the same keys
+        """
+        keys = list(test_sets.keys())
+        combined = pd.concat([test_sets[key] for key in keys])
+
+        X = self.prepare_inference_data(combined)
+        processed_predictions = self.postprocess_predictions(self._forward_inference(X))
+        if not compact:
+            timestamps = format_timestamps(combined.index).tolist()
+
+        # split the flat output back per key
+        outputs = {}
+        offset = 0
+        for key in keys:
+            length = len(test_sets[key])
+            values = processed_predictions[offset:offset+length]
+            if compact:
+                outputs[key] = compact_prediction(test_sets[key].index, values)
+            else:
+                outputs[key] = dict(zip(timestamps[offset:offset+length], values))
+            offset += length
+
+        return outputs
+
+    def warm_up(self, n_rows: int = 24) -> None:
+        """Run an inference on synthetic data to trigger torch's lazy initialisation."""
+        index = pd.date_range(start=pd.Timestamp.today().normalize(), periods=n_rows, freq="1h")
+        columns = required_columns(self.features_to_use)
+        synthetic = pd.DataFrame(np.zeros((n_rows, len(columns)), dtype=np.float32), index=index, columns=columns)
+        # fake traffic, keep it out of the stage latency histograms
+        with untimed_stages():
+            if self.is_trained:
+                self.predict_compact(synthetic)
+            else:
+                # scalers are not fitted before the first training, run the network only
+                self._forward_inference(build_feature_matrix(synthetic, self.features_to_use))
+
+    def _forward_inference(self, X: np.ndarray) -> np.ndarray:
+        self.eval()
+        with torch.no_grad(), stage_timer("forward_pass"):
+            X_tensor = torch.FloatTensor(X).to(self.device)
+            predictions = self._predict_tensor(X_tensor).cpu().numpy()
+        return predictions.squeeze()
+
+    def _predict_tensor(self, X_tensor: torch.Tensor) -> torch.Tensor:
+        # an ensemble averages all members in one batched pass
+        if self.ensemble_weights is not None:
+            return ensemble_forward(self.ensemble_weights, X_tensor)
+        return self(X_tensor)
     
     def postprocess_predictions(self, predictions:np.ndarray):
 
         if self.model_CONFIG['normalize']:
-            predictions = self.scaler_y.inverse_transform(predictions.reshape(-1, 1))
+            with stage_timer("scaling"):
+                predictions = self.scaler_y.inverse_transform(predictions.reshape(-1, 1))
         predictions = predictions.reshape(-1).astype(np.float64)
         rounded_predictions = np.round(predictions, decimals=2)
 
         return rounded_predictions.tolist()
 
     @classmethod
-    def load_from_file(cls, file_directory='saved_weights'):
-        file_path = os.path.join(file_directory, 'neural_network_model.pkl')
+    def load_from_file(cls, file_directory='saved_weights', inference_only: bool = False, shared_weights: bool = False):
+        """
+        Load a saved model. With inference_only, only the weights, scalers and feature list are restored:
+        no optimizer, no train/validation splits, no seeding, and the weights do not require gradients.
+        With shared_weights as well, the weights are memory-mapped read-only from the weights file, so processes
+        loading the same checkpoint share one copy of them through the page cache.
+        """
+        file_path = os.path.join(file_directory, cls.CHECKPOINT_FILENAME)
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"No file found at {file_path}")
 
         # Load the entire model state using pickle
         with open(file_path, 'rb') as f:
             model_state = pickle.load(f)
+
+        # models saved before the feature registry have no spec and only use input columns
+        if model_state.get('feature_spec') is not None:
+            check_feature_spec(model_state['feature_spec'])
         
         # Create a new instance with the loaded config
-        instance = cls(model_state['model_CONFIG'])
+        instance = cls(model_state['model_CONFIG'], inference_only=inference_only)
         
         # Update model attributes
         instance.load_state_dict(model_state['model_state_dict'])
@@ -216,41 +471,100 @@ class NeuralNetwork(nn.Module):
         instance.features_to_use = model_state['features_to_use']
         instance.num_features = model_state['num_features']
         instance.learning_rate = model_state['learning_rate']
+        instance.is_trained = model_state['is_trained']
+        instance.model_version = model_state.get('model_version')
+        if model_state.get('val_loss') is not None:
+            instance.val_loss = model_state['val_loss']
+        if model_state.get('ensemble_weights') is not None:
+            instance.ensemble_weights = {
+                name: tensor.to(instance.device) for name, tensor in model_state['ensemble_weights'].items()
+            }
+        if inference_only:
+            if shared_weights:
+                instance._map_weights(file_directory)
+            # the splits and optimizer state are dropped with model_state
+            return instance
         
-        # Restore train and validation splits if they exist
-        if model_state['train_split'] is not None:
-            instance.train_split = pd.DataFrame.from_dict(model_state['train_split'])
-        if model_state['val_split'] is not None:
-            instance.val_split = pd.DataFrame.from_dict(model_state['val_split'])
+        # Restore train and validation splits if they exist, older checkpoints hold them as DataFrame dicts
+        for split in ('train_split', 'val_split'):
+            if isinstance(model_state[split], dict):
+                model_state[split] = instance.as_dataset(pd.DataFrame.from_dict(model_state[split]))
+            if model_state[split] is not None:
+                setattr(instance, split, model_state[split])
 
         # Update optimizer
         instance.optimizer = optim.Adam(instance.parameters(), lr=instance.learning_rate)
         instance.optimizer.load_state_dict(model_state['optimizer_state_dict'])
-        instance.is_trained = model_state['is_trained']
+        instance.incremental_updates = model_state.get('incremental_updates', 0)
         
         # Move model to appropriate device
         instance.to(instance.device)
         
         return instance
 
-    def save_model(self, file_directory='saved_weights'):
-        os.makedirs(file_directory, exist_ok=True)
-        
-        # Save the entire model state, including scalers
-        model_state = {
-            'model_state_dict': self.state_dict(),
+    def _map_weights(self, file_directory: str) -> None:
+        """Replace the weights with read-only views of the weights file, if it belongs to the loaded version."""
+        file_path = os.path.join(file_directory, self.WEIGHTS_FILENAME)
+        if torch.device(self.device).type != 'cpu' or not os.path.exists(file_path):
+            return
+        weights = torch.load(file_path, map_location='cpu', mmap=True, weights_only=True)
+        # the root files of a model directory are replaced one after the other, they may briefly differ
+        if weights.get('model_version') != self.model_version:
+            get_logger(__name__).warning(f"{file_path} does not belong to model version {self.model_version}, weights are not shared")
+            return
+        # assign keeps the mapped tensors instead of copying them into the parameters
+        self.load_state_dict(weights['model_state_dict'], assign=True)
+        if weights.get('ensemble_weights') is not None:
+            self.ensemble_weights = weights['ensemble_weights']
+
+    def get_checkpoint_state(self) -> dict:
+        """
+        Snapshot of the model state that save_model writes.
+        Weights, optimizer state and scalers are copied, so training can continue while the snapshot is written.
+        The splits are TrainingDatasets, pickled as their arrays.
+        """
+        self._check_trainable()
+        return {
+            'model_state_dict': copy.deepcopy(self.state_dict()),
             'model_CONFIG': self.model_CONFIG,
-            'scaler_X': self.scaler_X,
-            'scaler_y': self.scaler_y,
-            'optimizer_state_dict': self.optimizer.state_dict(),
-            'train_split': self.train_split.to_dict() if hasattr(self.train_split, 'to_dict') else None,
-            'val_split': self.val_split.to_dict() if hasattr(self.val_split, 'to_dict') else None,
+            'scaler_X': copy.deepcopy(self.scaler_X),
+            'scaler_y': copy.deepcopy(self.scaler_y),
+            'optimizer_state_dict': copy.deepcopy(self.optimizer.state_dict()),
+            # splits are replaced, not modified, when the model is trained again
+            'train_split': getattr(self, 'train_split', None),
+            'val_split': getattr(self, 'val_split', None),
             'features_to_use': self.features_to_use,
+            'feature_spec': feature_spec(self.features_to_use),
             'num_features': self.num_features,
             'learning_rate': self.learning_rate,
-            'is_trained': self.is_trained
+            'is_trained': self.is_trained,
+            'model_version': self.model_version,
+            'ensemble_weights': copy.deepcopy(self.ensemble_weights),
+            'incremental_updates': self.incremental_updates,
+            'val_loss': getattr(self, 'val_loss', None)
         }
-        
-        # Save using pickle
-        with open(os.path.join(file_directory, 'neural_network_model.pkl'), 'wb') as f:
-            pickle.dump(model_state, f)
+
+    @classmethod
+    def write_checkpoint(cls, model_state: dict, file_directory: str) -> str:
+        """
+        Write a state from get_checkpoint_state to file_directory atomically, with a separate weights file.
+        Returns the path of the checkpoint file.
+        """
+        os.makedirs(file_directory, exist_ok=True)
+        atomic_torch_save(
+            {
+                'model_version': model_state['model_version'],
+                'model_state_dict': {name: tensor.cpu() for name, tensor in model_state['model_state_dict'].items()},
+                'ensemble_weights': None if model_state['ensemble_weights'] is None else {
+                    name: tensor.cpu() for name, tensor in model_state['ensemble_weights'].items()
+                }
+            },
+            os.path.join(file_directory, cls.WEIGHTS_FILENAME)
+        )
+        file_path = os.path.join(file_directory, cls.CHECKPOINT_FILENAME)
+        atomic_pickle_dump(model_state, file_path)
+        return file_path
+
+    def save_model(self, file_directory='saved_weights'):
+        # Save the entire model state, including scalers
+        self.write_checkpoint(self.get_checkpoint_state(), file_directory)
@@ -0,0 +1,173 @@
+"""
+Out-of-core training.
+Preprocessed training frames are converted to features one at a time and appended to raw float32/int64 files
+under `<volume_path>/datasets/<name>/`, which are opened as a memory-mapped TrainingDataset. Scaler statistics are
+computed in one streaming pass, and mini-batches are read from the maps chunk by chunk by a loader that prepares the
+next chunks in a background thread. Pages of a chunk are released once it was used, so the resident memory depends
+on the chunk size and not on the size of the dataset.
+"""
+
+import os
+import json
+import mmap
+import queue
+import shutil
+import threading
+from typing import Iterable, Iterator, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from solar_pred.core.ai_models._models_general import TrainingDataset
+from solar_pred.core.checkpoint import atomic_json_dump
+from solar_pred.core.exceptions import TrainSizeError
+
+ARRAY_DTYPES = {"X": np.float32, "y": np.float32, "timestamps": np.int64}
+META_FILENAME = "meta.json"
+
+
+def write_memmap_dataset(frames: Iterable[pd.DataFrame], root: str, features: Sequence[str], target_col: str) -> TrainingDataset:
+    """
+    Write the features and target of preprocessed training frames to `root`, frame by frame, and open the result.
+    Only one frame is in memory at a time. An existing dataset in root is replaced once the new one is complete.
+    """
+    tmp_root = root.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_root, ignore_errors=True)
+    os.makedirs(tmp_root)
+
+    rows = 0
+    tz = None
+    files = {name: open(os.path.join(tmp_root, f"{name}.bin"), "wb") for name in ARRAY_DTYPES}
+    try:
+        for frame in frames:
+            if frame.empty:
+                continue
+            chunk = TrainingDataset.from_frame(frame, features, target_col)
+            for name, dtype in ARRAY_DTYPES.items():
+                np.ascontiguousarray(getattr(chunk, name), dtype=dtype).tofile(files[name])
+            rows += len(chunk)
+            tz = tz or chunk.tz
+    finally:
+        for f in files.values():
+            f.close()
+
+    atomic_json_dump(
+        {"rows": rows, "features": list(features), "target_col": target_col, "tz": str(tz) if tz is not None else None},
+        os.path.join(tmp_root, META_FILENAME)
+    )
+    shutil.rmtree(root, ignore_errors=True)
+    os.replace(tmp_root, root)
+    return open_memmap_dataset(root)
+
+
+def open_memmap_dataset(root: str) -> TrainingDataset:
+    """Dataset written by write_memmap_dataset, with read-only memory-mapped arrays."""
+    with open(os.path.join(root, META_FILENAME), "r") as f:
+        meta = json.load(f)
+    rows = meta["rows"]
+    if rows < 1:
+        raise TrainSizeError("The training set is empty.")
+
+    arrays = {
+        name: np.memmap(
+            os.path.join(root, f"{name}.bin"), dtype=dtype, mode="r",
+            shape=(rows, len(meta["features"])) if name == "X" else (rows,)
+        )
+        for name, dtype in ARRAY_DTYPES.items()
+    }
+    return TrainingDataset(**arrays, features=tuple(meta["features"]), target_col=meta["target_col"], tz=meta["tz"])
+
+
+def chunk_bounds(n_rows: int, chunk_rows: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, n_rows, chunk_rows):
+        yield start, min(start + chunk_rows, n_rows)
+
+
+def release_pages(array: np.ndarray) -> None:
+    """Drop the resident pages of a memory-mapped array (or a view of one). They are read from the file again when used."""
+    # np.memmap and its views keep the mmap they were created from
+    mapping = getattr(array, "_mmap", None)
+    if mapping is None or array.nbytes == 0 or not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    offset = array.ctypes.data - np.frombuffer(mapping, dtype=np.uint8).ctypes.data
+    start = offset - offset % mmap.PAGESIZE
+    mapping.madvise(mmap.MADV_DONTNEED, start, offset + array.nbytes - start)
+
+
+def fit_scalers_streaming(dataset: TrainingDataset, scaler_X, scaler_y, chunk_rows: int) -> None:
+    """Fit the scalers on a dataset in one pass over chunks of chunk_rows rows."""
+    for start, stop in chunk_bounds(len(dataset), chunk_rows):
+        chunk = dataset[start:stop]
+        scaler_X.partial_fit(chunk.X)
+        scaler_y.partial_fit(chunk.y.reshape(-1, 1))
+        release_pages(chunk.X)
+        release_pages(chunk.y)
+
+
+class PrefetchLoader:
+    """
+    Mini-batches of a dataset in row order, normalized with the given scalers.
+    Every pass (iteration) reads the dataset in chunks of about chunk_rows rows; a background thread reads and
+    normalizes up to `prefetch` chunks ahead of the batches being used. Chunks are a multiple of batch_size rows,
+    so the batches are the same as slicing the whole normalized arrays.
+    """
+
+    def __init__(self, dataset: TrainingDataset, batch_size: int, chunk_rows: int,
+                 scaler_X=None, scaler_y=None, prefetch: int = 2):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.chunk_rows = max(1, chunk_rows // batch_size) * batch_size
+        self.scaler_X = scaler_X
+        self.scaler_y = scaler_y
+        self.prefetch = max(1, prefetch)
+
+    def __len__(self) -> int:
+        return -(-len(self.dataset) // self.batch_size)
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        chunks = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        reader = threading.Thread(target=self._read_chunks, args=(chunks, stop), name="prefetch-loader", daemon=True)
+        reader.start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    return
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                X, y = chunk
+                for i in range(0, len(X), self.batch_size):
+                    yield X[i:i+self.batch_size], y[i:i+self.batch_size]
+        finally:
+            # the consumer may stop early, let the reader finish
+            stop.set()
+            reader.join()
+
+    def _read_chunks(self, chunks: queue.Queue, stop: threading.Event) -> None:
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for start, stop_row in chunk_bounds(len(self.dataset), self.chunk_rows):
+                chunk = self.dataset[start:stop_row]
+                X, y = self._normalize(chunk.X, chunk.y)
+                release_pages(chunk.X)
+                release_pages(chunk.y)
+                if not put((X, y)):
+                    return
+            put(None)
+        except Exception as e:
+            put(e)
+
+    def _normalize(self, X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # copies out of the maps, the pages can be released afterwards
+        if self.scaler_X is not None:
+            return self.scaler_X.transform(X), self.scaler_y.transform(y.reshape(-1, 1)).flatten()
+        return np.array(X), np.array(y)
@@ -0,0 +1,239 @@
+"""
+Hyperparameter search for the neural network.
+Configurations are sampled around ModelConfigFactory's defaults and evaluated with successive halving:
+every trial is trained for a few epochs, the best 1/eta continue for eta times as many epochs, and so on.
+The training data is normalized once and shared with the pool processes through memory-mapped .npy files.
+The search stops scheduling work when its CPU time budget (summed over all processes) would be exceeded.
+Every trial trains a single network and so does the published winner: ML_NN_ENSEMBLE_SIZE does not apply to the search.
+"""
+
+import os
+import math
+import time
+import shutil
+import random
+import tempfile
+from dataclasses import dataclass, field
+from concurrent.futures import as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+from solar_pred.core.config import config
+from solar_pred.core.ai_models._models_config import ModelConfigFactory
+from solar_pred.core.checkpoint import atomic_json_dump
+from solar_pred.core.logging_config import get_logger
+from solar_pred.core.runtime import create_process_pool
+
+# searched parameters. n_epochs is not sampled, it is the resource successive halving allocates
+SEARCH_SPACE = {
+    "learning_rate": ("log_uniform", 1e-4, 1e-2),
+    "batch_size": ("choice", [16, 32, 64, 128]),
+    "dropout_rate": ("uniform", 0.0, 0.3),
+}
+ARRAY_NAMES = ("X_train", "y_train", "X_val", "y_val")
+BEST_CONFIG_FILENAME = "best_config.json"
+
+# memory-mapped training arrays of a pool process
+_search_arrays = None
+
+
+@dataclass
+class SearchResult:
+    model: object
+    best_params: Dict
+    val_loss: float
+    epochs: int
+    cpu_seconds: float
+    trials: List[Dict] = field(default_factory=list)
+
+
+def sample_params(n_trials: int, seed: int = 0) -> List[Dict]:
+    """Sample n_trials parameter sets from SEARCH_SPACE. The first one is the current default configuration."""
+    rng = random.Random(seed)
+    defaults = ModelConfigFactory.create_config("neural_network")
+    samples = [{name: getattr(defaults, name) for name in SEARCH_SPACE}]
+    while len(samples) < n_trials:
+        params = {}
+        for name, (kind, *args) in SEARCH_SPACE.items():
+            if kind == "log_uniform":
+                params[name] = math.exp(rng.uniform(math.log(args[0]), math.log(args[1])))
+            elif kind == "uniform":
+                params[name] = rng.uniform(args[0], args[1])
+            else:
+                params[name] = rng.choice(args[0])
+        samples.append(params)
+    return samples[:n_trials]
+
+
+def rung_epochs(min_epochs: int, max_epochs: int, eta: int) -> List[int]:
+    """Total epochs a trial has been trained for at the end of each rung, e.g. [2, 6, 18]."""
+    rungs = []
+    epochs = min_epochs
+    while epochs < max_epochs:
+        rungs.append(epochs)
+        epochs *= eta
+    rungs.append(max_epochs)
+    return rungs
+
+
+def _load_search_arrays(data_dir: str) -> None:
+    global _search_arrays
+    # copy-on-write mapping: pages are shared between the processes, torch gets writable arrays
+    _search_arrays = tuple(np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode="c") for name in ARRAY_NAMES)
+
+
+def _run_trial(model_CONFIG: dict, epochs: int, state_path: str) -> Dict:
+    """Train a trial for `epochs` more epochs, continuing from its saved state. Runs in a pool process."""
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+
+    cpu_start = time.process_time()
+    X_train, y_train, X_val, y_val = _search_arrays
+    model = NeuralNetwork({**model_CONFIG, "n_epochs": epochs})
+    if os.path.exists(state_path):
+        state = torch.load(state_path)
+        model.load_state_dict(state["model_state_dict"])
+        model.optimizer.load_state_dict(state["optimizer_state_dict"])
+
+    model.train_epochs(X_train, y_train)
+    val_loss = model.evaluate(X_val, y_val)
+    torch.save({"model_state_dict": model.state_dict(), "optimizer_state_dict": model.optimizer.state_dict()}, state_path)
+    return {"val_loss": val_loss, "cpu_s": time.process_time() - cpu_start}
+
+
+def run_search(
+        train_set,
+        n_trials: Optional[int] = None,
+        cpu_budget_s: Optional[float] = None,
+        eta: Optional[int] = None,
+        min_epochs: Optional[int] = None,
+        max_epochs: Optional[int] = None,
+        seed: int = 0
+    ) -> SearchResult:
+    """
+    Search hyperparameters on a preprocessed training set and return the best model, trained and ready to publish.
+    Arguments left as None are taken from Settings.
+    """
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+
+    logger = get_logger(__name__)
+    n_trials = n_trials or config.search_trials
+    cpu_budget_s = cpu_budget_s or config.search_cpu_budget_s
+    eta = eta or config.search_eta
+    rungs = rung_epochs(min_epochs or config.search_min_epochs, max_epochs or config.search_max_epochs, eta)
+
+    # normalize once, every trial uses the same split and scalers
+    base_config = ModelConfigFactory.create_config("neural_network", ensemble_size=1)
+    base_model_config = {**base_config.model_dump(), "scaler": base_config.create_scaler()}
+    data_model = NeuralNetwork(base_model_config)
+    (X_train, y_train), (X_val, y_val) = data_model.prepare_train_data(train_set)
+
+    search_root = os.path.join(config.volume_path, "search")
+    os.makedirs(search_root, exist_ok=True)
+    work_dir = tempfile.mkdtemp(dir=search_root)
+    try:
+        for name, array in zip(ARRAY_NAMES, (X_train, y_train, X_val, y_val)):
+            np.save(os.path.join(work_dir, f"{name}.npy"), np.ascontiguousarray(array, dtype=np.float32))
+
+        trials = []
+        for trial_id, params in enumerate(sample_params(n_trials, seed)):
+            # validate through the factory, so searched values respect the config bounds
+            trial_config = ModelConfigFactory.create_config("neural_network", **params, ensemble_size=1)
+            trials.append({
+                "trial_id": trial_id,
+                "params": params,
+                "model_CONFIG": {**trial_config.model_dump(), "scaler": base_model_config["scaler"]},
+                "state_path": os.path.join(work_dir, f"trial_{trial_id}.pt"),
+                "epochs": 0,
+                "val_loss": None,
+                "cpu_s": 0.0
+            })
+
+        cpu_used = 0.0
+        active = trials
+        with create_process_pool(n_trials, initializer=_load_search_arrays, initargs=(work_dir,)) as executor:
+            for rung, target_epochs in enumerate(rungs):
+                if rung > 0:
+                    active = sorted(active, key=lambda trial: trial["val_loss"])[:max(1, len(active) // eta)]
+
+                # drop the worst trials if the rung would not fit into the remaining budget
+                epochs_done = sum(trial["epochs"] for trial in trials)
+                cpu_per_epoch = cpu_used / epochs_done if epochs_done > 0 else 0.0
+                # tiny trials can finish within the resolution of process_time, there is nothing to extrapolate then
+                if cpu_per_epoch > 0:
+                    affordable = int((cpu_budget_s - cpu_used) / (cpu_per_epoch * (target_epochs - active[0]["epochs"])))
+                    if affordable < 1:
+                        logger.info(f"CPU budget reached before rung {rung}")
+                        break
+                    active = active[:affordable]
+
+                futures = {
+                    executor.submit(_run_trial, trial["model_CONFIG"], target_epochs - trial["epochs"], trial["state_path"]): trial
+                    for trial in active
+                }
+                finished = []
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    trial = futures[future]
+                    result = future.result()
+                    trial.update(epochs=target_epochs, val_loss=result["val_loss"], cpu_s=trial["cpu_s"] + result["cpu_s"])
+                    cpu_used += result["cpu_s"]
+                    finished.append(trial)
+                    if cpu_used >= cpu_budget_s:
+                        # trials that did not start yet are dropped
+                        for pending in futures:
+                            pending.cancel()
+                logger.info(
+                    f"Rung {rung}: {len(finished)} trials trained to {target_epochs} epochs, "
+                    f"best loss {min(trial['val_loss'] for trial in finished):.5f}, {cpu_used:.1f} CPU seconds used"
+                )
+                active = finished
+                if cpu_used >= cpu_budget_s:
+                    logger.info("CPU budget reached")
+                    break
+
+        # the winner is the best trial of the last rung that was trained
+        best = min(active, key=lambda trial: trial["val_loss"])
+        model = NeuralNetwork({**best["model_CONFIG"], "n_epochs": best["epochs"]})
+        state = torch.load(best["state_path"])
+        model.load_state_dict(state["model_state_dict"])
+        model.optimizer.load_state_dict(state["optimizer_state_dict"])
+        model.scaler_X = data_model.scaler_X
+        model.scaler_y = data_model.scaler_y
+        model.train_split = data_model.train_split
+        model.val_split = data_model.val_split
+        model.val_loss = best["val_loss"]
+        model.eval()
+        model.is_trained = True
+        model.model_version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    logger.info(f"Best trial {best['trial_id']}: {best['params']}, {best['epochs']} epochs, loss {best['val_loss']:.5f}")
+    return SearchResult(
+        model=model,
+        best_params={**best["params"], "n_epochs": best["epochs"]},
+        val_loss=best["val_loss"],
+        epochs=best["epochs"],
+        cpu_seconds=cpu_used,
+        trials=[
+            {key: trial[key] for key in ("trial_id", "params", "epochs", "val_loss", "cpu_s")} for trial in trials
+        ]
+    )
+
+
+def save_best_config(result: SearchResult, weights_dir: str) -> None:
+    """Write the winning configuration and the trial summary next to the published model."""
+    atomic_json_dump(
+        {
+            "model_version": result.model.model_version,
+            "params": result.best_params,
+            "val_loss": result.val_loss,
+            "cpu_seconds": result.cpu_seconds,
+            "trials": result.trials
+        },
+        os.path.join(weights_dir, BEST_CONFIG_FILENAME)
+    )
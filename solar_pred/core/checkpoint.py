@@ -0,0 +1,286 @@
+"""
+Model checkpointing.
+Checkpoints are written through a temporary file and an atomic rename, so a crash during a save never
+leaves a truncated model behind. The manager tracks the version that was saved last, writes new versions
+in a background thread after training and keeps only the newest few versions on disk.
+"""
+
+import os
+import json
+import errno
+import select
+import shutil
+import pickle
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from solar_pred.core.logging_config import get_logger
+
+VERSIONS_DIR = "versions"
+# lists the published versions, replicas sharing the model directory watch it for new models
+MANIFEST_FILENAME = "manifest.json"
+# one datagram socket per serving process, a published version is announced to all of them
+ANNOUNCE_DIR = ".workers"
+
+
+def _atomic_write(file_path: str, write: Callable, mode: str = 'wb') -> None:
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_pickle_dump(obj, file_path: str) -> None:
+    """Pickle obj to file_path. Readers see either the old or the new file, never a partial one."""
+    _atomic_write(file_path, lambda f: pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def atomic_json_dump(obj, file_path: str) -> None:
+    """Write obj as JSON to file_path atomically."""
+    _atomic_write(file_path, lambda f: json.dump(obj, f, indent=2), mode='w')
+
+
+def atomic_parquet_dump(frame, file_path: str) -> None:
+    """Write a DataFrame as Parquet to file_path atomically. The index is not stored."""
+    _atomic_write(file_path, lambda f: frame.to_parquet(f, index=False))
+
+
+def atomic_torch_save(obj, file_path: str) -> None:
+    """torch.save obj to file_path atomically. The file can be loaded with torch.load(mmap=True)."""
+    import torch
+    _atomic_write(file_path, lambda f: torch.save(obj, f))
+
+
+def read_manifest(weights_dir: str) -> Optional[dict]:
+    """Return the manifest of weights_dir, or None if no version was published yet."""
+    try:
+        with open(os.path.join(weights_dir, MANIFEST_FILENAME), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_manifest(weights_dir: str, current_version: str) -> None:
+    """Record current_version as the latest model, with every version still kept on disk."""
+    versions_root = os.path.join(weights_dir, VERSIONS_DIR)
+    manifest = {
+        "current": current_version,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "versions": sorted(os.listdir(versions_root)) if os.path.isdir(versions_root) else []
+    }
+    atomic_json_dump(manifest, os.path.join(weights_dir, MANIFEST_FILENAME))
+
+
+def version_dir(weights_dir: str, version: str) -> str:
+    return os.path.join(weights_dir, VERSIONS_DIR, str(version))
+
+
+def _listener_prefix() -> str:
+    """Start of the socket file names of the listeners on this host."""
+    return f"{socket.gethostname()}-"
+
+
+def announce_version(weights_dir: str, version: str) -> int:
+    """
+    Tell the serving processes on this host that listen on weights_dir (see VersionListener) that version was
+    published, so they reload now instead of at their next manifest poll. Returns the processes reached.
+    """
+    announce_root = os.path.join(weights_dir, ANNOUNCE_DIR)
+    try:
+        names = os.listdir(announce_root)
+    except FileNotFoundError:
+        return 0
+
+    # sockets of other hosts on a shared volume always refuse, only this host's are reachable and cleaned up
+    local_prefix = _listener_prefix()
+    reached = 0
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+        sender.setblocking(False)
+        for name in names:
+            if not name.startswith(local_prefix):
+                continue
+            path = os.path.join(announce_root, name)
+            try:
+                sender.sendto(str(version).encode(), path)
+                reached += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # the process is gone, its socket file was left behind
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            except OSError as e:
+                # the queue of a busy listener is full, it still has an announcement to read
+                if e.errno not in (errno.EAGAIN, errno.ENOBUFS):
+                    get_logger(__name__).warning(f"Could not announce model version {version} to {path}: {e}")
+    return reached
+
+
+class VersionListener:
+    """
+    Datagram socket of one process in `<weights_dir>/.workers/`, woken by announce_version.
+    Unix sockets only reach processes on the same host, replicas elsewhere still see new versions in the manifest.
+    """
+
+    def __init__(self, weights_dir: str):
+        announce_root = os.path.join(weights_dir, ANNOUNCE_DIR)
+        os.makedirs(announce_root, exist_ok=True)
+        self.path = os.path.join(announce_root, f"{_listener_prefix()}{os.getpid()}.sock")
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            self._socket.bind(self.path)
+        except OSError:
+            self._socket.close()
+            raise
+        self._socket.setblocking(False)
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for announcements. Returns True if there were any."""
+        readable, _, _ = select.select([self._socket], [], [], timeout)
+        announced = False
+        while readable:
+            try:
+                self._socket.recv(256)
+                announced = True
+            except BlockingIOError:
+                break
+        return announced
+
+    def wake(self) -> None:
+        """End a wait of this listener, e.g. when its owner stops."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            try:
+                sender.sendto(b"", self.path)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        self._socket.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _replace_file(source: str, destination: str) -> None:
+    """Atomically point destination at the contents of source (hardlink if possible, copy otherwise)."""
+    tmp_path = f"{destination}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, destination)
+
+
+class CheckpointManager:
+    """
+    Saves a model only when it changed since the last save.
+
+    Every checkpoint is written to `<weights_dir>/versions/<model_version>/`, then replaces
+    `<weights_dir>/<checkpoint files>`, which is what the server loads on startup, and is published in the manifest
+    and announced to the serving processes of this host.
+    """
+
+    def __init__(self, weights_dir: str, keep_last: int = 5):
+        self.weights_dir = weights_dir
+        self.keep_last = keep_last
+        self._saved_version = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._pending: Optional[Future] = None
+
+    def mark_saved(self, model) -> None:
+        """Record that the current state of model is already on disk (e.g. it was just loaded)."""
+        with self._lock:
+            self._saved_version = model.model_version
+
+    def is_dirty(self, model) -> bool:
+        with self._lock:
+            return bool(model.is_trained) and model.model_version != self._saved_version
+
+    def checkpoint_async(self, model, on_done: Optional[Callable[[Future], None]] = None) -> Optional[Future]:
+        """
+        Snapshot the model in the calling thread and write it in the background.
+        Returns the future of the write, or None if the model has not changed.
+        on_done is called with the future once the write finished (also if it failed).
+        """
+        if not self.is_dirty(model):
+            return None
+        model_state = model.get_checkpoint_state()
+        with self._lock:
+            self._saved_version = model_state['model_version']
+            self._pending = self._executor.submit(self._write, type(model), model_state)
+            if on_done is not None:
+                self._pending.add_done_callback(on_done)
+            return self._pending
+
+    def checkpoint(self, model) -> None:
+        """Write a checkpoint and wait for it."""
+        future = self.checkpoint_async(model)
+        if future is not None:
+            future.result()
+
+    def wait(self) -> None:
+        """Wait for the checkpoint being written, if any."""
+        with self._lock:
+            pending = self._pending
+        if pending is not None:
+            pending.result()
+
+    def close(self, model=None) -> None:
+        """Finish pending writes and save model if it still has unsaved changes."""
+        logger = get_logger(__name__)
+        try:
+            self.wait()
+        except Exception as e:
+            logger.error(f"Background checkpoint failed: {str(e)}")
+            with self._lock:
+                # the failed version was never written, save it again below
+                self._saved_version = None
+        if model is not None and self.is_dirty(model):
+            self.checkpoint(model)
+            logger.info("Unsaved model changes written during shutdown")
+        self._executor.shutdown(wait=True)
+
+    def _write(self, model_class, model_state: dict) -> None:
+        logger = get_logger(__name__)
+        version = str(model_state['model_version'])
+        target_dir = version_dir(self.weights_dir, version)
+        try:
+            model_class.write_checkpoint(model_state, target_dir)
+            for name in model_class.CHECKPOINT_FILES:
+                if os.path.exists(os.path.join(target_dir, name)):
+                    _replace_file(os.path.join(target_dir, name), os.path.join(self.weights_dir, name))
+            self._prune()
+            write_manifest(self.weights_dir, version)
+            announce_version(self.weights_dir, version)
+            logger.info(f"Checkpoint of model version {version} written to {target_dir}")
+        except Exception:
+            logger.exception(f"Failed to write checkpoint of model version {version}")
+            with self._lock:
+                if self._saved_version == model_state['model_version']:
+                    self._saved_version = None
+            raise
+
+    def _prune(self) -> None:
+        # versions are timestamps, so sorting the names sorts them chronologically
+        versions_root = os.path.join(self.weights_dir, VERSIONS_DIR)
+        versions = sorted(os.listdir(versions_root))
+        for version in versions[:-self.keep_last] if self.keep_last > 0 else []:
+            shutil.rmtree(os.path.join(versions_root, version), ignore_errors=True)
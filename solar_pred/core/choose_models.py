@@ -1,19 +1,36 @@
 import os
+import fcntl
+import threading
+from contextlib import contextmanager
 
+from typing import Optional
 
+from solar_pred.core.config import config
 from solar_pred.core.ai_models.neural_network import load_nr_model
+from solar_pred.core.checkpoint import MANIFEST_FILENAME, VersionListener, read_manifest, version_dir
+from solar_pred.core.exceptions import ModelNotReadyError, TrainingInProgressError, TrainingDisabledError
 from solar_pred.core.logging_config import get_logger
 
 MODELS_AVAILABLE = ["neural_network"]
 
+# model states kept in app.state.model_status
+MODEL_LOADING = "loading"
+MODEL_READY = "ready"
+MODEL_FAILED = "failed"
+
+# lock file in the model directory, held by the replica that is training
+TRAINING_LOCK_FILENAME = ".train.lock"
+
 
 def available_models():
     return MODELS_AVAILABLE
 
 
-def initialize_model(chosen_model: str, weights_dir: str):
+def initialize_model(chosen_model: str, weights_dir: str, inference_only: Optional[bool] = None):
+    """Load a model from weights_dir. inference_only defaults to the `inference_only` setting."""
     logger = get_logger(__name__)
-    logger.info(f"Initialize model {chosen_model} from {weights_dir}")
+    inference_only = config.inference_only if inference_only is None else inference_only
+    logger.info(f"Initialize model {chosen_model} from {weights_dir}{' for inference only' if inference_only else ''}")
     # make sure weights path is a directory, not a file
     if os.path.isfile(weights_dir):
         weights_dir = os.path.dirname(weights_dir)
@@ -27,4 +44,197 @@ def initialize_model(chosen_model: str, weights_dir: str):
 
     match chosen_model:
         case "neural_network":
-            return load_nr_model(weights_dir)
\ No newline at end of file
+            return load_nr_model(weights_dir, inference_only=inference_only, shared_weights=config.shared_weights)
+
+
+def warm_up_model(model) -> None:
+    """
+    Run one inference on synthetic data and import the data pipeline,
+    so the first real request does not pay for lazy initialisation.
+    """
+    model.warm_up()
+
+    # modules of the data pipeline that are imported lazily
+    import ephem
+    import openmeteo_requests
+    import requests_cache
+    import retry_requests
+    import solar_pred.core.preprocessing.processor
+
+
+def check_training_enabled() -> None:
+    """Raise TrainingDisabledError on replicas that load their models for inference only."""
+    if config.inference_only:
+        raise TrainingDisabledError("Training is disabled on inference-only replicas")
+
+
+def get_loaded_model(app_state):
+    """Return the model from app state, raise ModelNotReadyError while it is still loading or if loading failed."""
+    status = getattr(app_state, "model_status", MODEL_READY)
+    model = getattr(app_state, "model", None)
+    if status != MODEL_READY or model is None:
+        raise ModelNotReadyError(f"Model is not ready, status: {status}")
+    return model
+
+
+class TrainingLock:
+    """
+    Inter-process lock on the model directory, so only one replica trains and publishes a model at a time.
+    Uses flock, which is released by the OS if the holder dies.
+    """
+
+    def __init__(self, weights_dir: str):
+        self.path = os.path.join(weights_dir, TRAINING_LOCK_FILENAME)
+        self._fd = None
+
+    def acquire(self) -> bool:
+        """Try to take the lock without waiting. Returns False if another writer holds it."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+def reload_model(app_state, version: str) -> bool:
+    """
+    Load a published model version and swap it into app state.
+    Requests that already hold the previous model finish with it.
+    Returns False if the version is no longer on disk.
+    """
+    logger = get_logger(__name__)
+    model_dir = version_dir(app_state.weights_dir, version)
+    if not os.path.isdir(model_dir):
+        logger.warning(f"Model version {version} is listed in the manifest but not on disk")
+        return False
+
+    model = initialize_model(chosen_model="neural_network", weights_dir=model_dir)
+    warm_up_model(model)
+    app_state.checkpoints.mark_saved(model)
+    app_state.model = model
+    app_state.model_status = MODEL_READY
+    app_state.prediction_cache.invalidate(model.model_version)
+    logger.info(f"Reloaded model version {version}")
+    return True
+
+
+def _published_version(app_state):
+    manifest = read_manifest(app_state.weights_dir)
+    return manifest["current"] if manifest else None
+
+
+@contextmanager
+def exclusive_training(app_state):
+    """
+    Hold the training lock of the model store while training and publishing a new version.
+    Yields the model to train, reloaded first if another replica published a newer one.
+    The model in app state when the block ends is published, so the block may also replace it.
+    The lock is released once the new checkpoint is written, so the next writer starts from it.
+    The in-process `app_state.model_lock` is held for the whole block, background inference (the forecast
+    prefetcher) does not use the model while it is trained in place.
+    """
+    check_training_enabled()
+    lock = TrainingLock(app_state.weights_dir)
+    if not lock.acquire():
+        raise TrainingInProgressError("Another training run holds the model store lock")
+
+    release_now = True
+    app_state.model_lock.acquire()
+    try:
+        model = get_loaded_model(app_state)
+        published = _published_version(app_state)
+        if published is not None and published != model.model_version and not app_state.checkpoints.is_dirty(model):
+            if reload_model(app_state, published):
+                model = get_loaded_model(app_state)
+
+        yield model
+
+        future = app_state.checkpoints.checkpoint_async(get_loaded_model(app_state), on_done=lambda _: lock.release())
+        release_now = future is None
+    finally:
+        app_state.model_lock.release()
+        if release_now:
+            lock.release()
+
+
+class ModelWatcher:
+    """
+    Background thread that polls the mtime of the manifest and reloads the model when
+    another replica publishes a new version. A stat call per interval is cheap on any filesystem,
+    unlike inotify it also works on network volumes.
+    Processes on the same host (uvicorn workers, train_fleet) also announce the versions they publish,
+    which wakes the watcher right away.
+    """
+
+    def __init__(self, app_state, interval: float = 5.0):
+        self.app_state = app_state
+        self.interval = interval
+        self._stop = threading.Event()
+        try:
+            self._listener = VersionListener(app_state.weights_dir)
+        except OSError as e:
+            # e.g. the socket path is too long or the volume does not support sockets, polling still works
+            get_logger(__name__).warning(f"Model versions are not announced to this process, polling only: {e}")
+            self._listener = None
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        # compare versions on the first poll, in case a model was published while this one was loading
+        self._last_mtime = None
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.wake()
+        if self._thread.is_alive():
+            self._thread.join()
+        if self._listener is not None:
+            self._listener.close()
+
+    def _wait(self) -> bool:
+        """Wait for the next poll or an announcement. Returns False once the watcher is stopped."""
+        if self._listener is None:
+            return not self._stop.wait(self.interval)
+        self._listener.wait(self.interval)
+        return not self._stop.is_set()
+
+    def _manifest_mtime(self):
+        try:
+            return os.stat(os.path.join(self.app_state.weights_dir, MANIFEST_FILENAME)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _run(self) -> None:
+        logger = get_logger(__name__)
+        while self._wait():
+            mtime = self._manifest_mtime()
+            if mtime is None or mtime == self._last_mtime:
+                continue
+            try:
+                self.check()
+                self._last_mtime = mtime
+            except Exception:
+                # keep serving the current model and retry on the next poll
+                logger.exception("Failed to reload model from the model store")
+
+    def check(self) -> None:
+        """Reload the model if the manifest points to a version other than the loaded one."""
+        model = getattr(self.app_state, "model", None)
+        published = _published_version(self.app_state)
+        if model is None or published is None or published == model.model_version:
+            return
+        # this replica has a newer model that is still being written
+        if self.app_state.checkpoints.is_dirty(model):
+            return
+        reload_model(self.app_state, published)
@@ -2,6 +2,9 @@ from typing import Optional
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
+# values of the `weather_provider` setting, see core/get_data/weather_providers.py
+WEATHER_PROVIDERS = ("open_meteo", "local", "record", "replay", "record_replay")
+
 class Settings(BaseSettings):
     port: int = 8010
     is_dev: bool = False
@@ -10,6 +13,63 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     file_log_level: Optional[str] = None
     console_log_level: Optional[str] = None
+    log_queue_size: int = 10000 # log records waiting for the writer thread. Records are dropped when it's full
+    checkpoint_keep_last: int = 5 # model versions kept in model_dir/versions
+    model_watch_interval: float = 5.0 # seconds between checks for models published by other replicas. 0 disables reloading
+    inference_only: bool = False # serving-only replica: load weights, scalers and features only, training endpoints are disabled
+    shared_weights: bool = True # inference-only models memory-map their weights read-only, so all workers share one copy
+
+    # weather provider. Point these at a local stand-in (loadtest/fake_openmeteo.py) for load tests
+    weather_forecast_url: str = "https://api.open-meteo.com/v1/forecast" # forecasts and the last 92 days
+    weather_historical_url: str = "https://historical-forecast-api.open-meteo.com/v1/forecast" # dates older than 92 days
+    weather_provider: str = "open_meteo" # open_meteo, local (weather files per location), record (fetch and save), replay (saved only) or record_replay (saved, fetch on a miss)
+    weather_store_path: Optional[str] = None # directory of the local and recorded weather, defaults to volume_path/weather
+
+    # prediction cache
+    prediction_cache_size: int = 4096 # max entries kept in memory
+    prediction_cache_disk: bool = False # share cached predictions between replicas through volume_path
+    forecast_update_hours: int = 3 # how often the weather provider issues a new forecast
+    cache_location_decimals: int = 2 # latitude/longitude are rounded to this many decimals in cache keys
+    cache_altitude_step: float = 10.0 # altitude is rounded to a multiple of this many meters in cache keys
+
+    # forecast prefetch: recently requested plants are predicted again after every forecast update
+    prefetch_plants: int = 1024 # plants remembered for prefetching, 0 disables the scheduler
+    prefetch_plant_ttl_hours: float = 48.0 # plants not requested for this long are forgotten
+    prefetch_concurrency: int = 2 # refreshes running at the same time
+    prefetch_jitter_s: float = 600.0 # refreshes start at a random delay of up to this many seconds after their key changed
+    prefetch_check_interval_s: float = 30.0 # seconds between scheduling passes
+
+    # runtime threads. Thread counts left at 0 are derived from the CPUs available to the container
+    workers: int = 1 # uvicorn worker processes
+    executor_workers: int = 1 # jobs running model work in parallel inside one worker (executor pool size)
+    torch_threads: int = 0 # torch intra-op threads per job
+    torch_interop_threads: int = 0 # torch inter-op threads, 0 means 1
+    blas_threads: int = 0 # OpenMP/MKL/OpenBLAS threads used by numpy and sklearn per job
+    cpu_affinity: Optional[str] = None # pin the server to these CPUs, e.g. "0-3,6"
+
+    # training history store
+    history_compact_parts: int = 8 # part files in a month before it is compacted in the background
+
+    # hyperparameter search
+    search_trials: int = 27 # configurations sampled per search
+    search_eta: int = 3 # successive halving keeps the best 1/eta trials after every rung
+    search_min_epochs: int = 2 # epochs every trial is trained for in the first rung
+    search_max_epochs: int = 18 # epochs of the trials in the last rung
+    search_cpu_budget_s: float = 1800.0 # CPU seconds a search may use, summed over all processes
+
+    # out-of-core training (python -m solar_pred.train_fleet)
+    out_of_core_chunk_rows: int = 65536 # rows read from the memory-mapped dataset at a time
+    out_of_core_prefetch: int = 2 # chunks read and normalized ahead of training
+
+    # offline batch forecasts (python -m solar_pred.batch)
+    batch_memory_mb: int = 4096 # memory budget of a batch run, caps the number of worker processes
+    batch_worker_mb: int = 600 # expected resident memory of one worker process (model, torch, data pipeline)
+    batch_shard_size: int = 256 # plants per task sent to a worker
+    batch_read_rows: int = 65536 # plants read from the input file at a time
+
+    # request profiling
+    profile_sample_rate: float = 0.0 # fraction of /predict and /train requests to profile
+    profile_header: str = "X-Profile" # requests with this header set to 1/true are profiled. Set to empty to disable
 
     @field_validator('port')
     @classmethod
@@ -17,6 +77,13 @@ class Settings(BaseSettings):
         if not 1024 < v <= 65535:
             raise ValueError("Port must be between 1024 and 65535")
         return v
+
+    @field_validator('weather_provider')
+    @classmethod
+    def is_weather_provider_valid(cls, v: str) -> str:
+        if v not in WEATHER_PROVIDERS:
+            raise ValueError(f"Weather provider must be one of {WEATHER_PROVIDERS}")
+        return v
     
     class Config:
         env_file = ".env"
@@ -5,20 +5,87 @@ During startup, you can load the model and start a database connection (depening
 
 from typing import Callable
 import os
+import time
+import threading
 
 from fastapi import FastAPI
-from datetime import datetime
 
 from solar_pred.core.config import config
-from solar_pred.core.choose_models import initialize_model
-from solar_pred.core.logging_config import setup_logger, get_logger
+from solar_pred.core.choose_models import (
+    initialize_model, warm_up_model, ModelWatcher, MODEL_LOADING, MODEL_READY, MODEL_FAILED
+)
+from solar_pred.core.prediction_cache import create_prediction_cache
+from solar_pred.core.prefetch import create_prefetcher
+from solar_pred.core.checkpoint import CheckpointManager
+from solar_pred.core.history_store import create_history_store
+from solar_pred.core.metrics import MODEL_LOAD_SECONDS, MODEL_MEMORY_BYTES, process_rss_bytes
+from solar_pred.core.runtime import configure_runtime, configure_torch
+from solar_pred.core.logging_config import setup_logger, get_logger, stop_logging
+
+def _load_model(app: FastAPI) -> None:
+    logger = get_logger(__name__)
+    try:
+        start = time.perf_counter()
+        configure_torch(app.state.runtime)
+        # the model module imports torch, so it is counted in the load time but not in the model's memory
+        import solar_pred.core.ai_models.neural_network.model
+        rss_before = process_rss_bytes()
+        load_start = time.perf_counter()
+        model_instance = initialize_model(chosen_model="neural_network", weights_dir=app.state.weights_dir)
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+        model_memory = process_rss_bytes() - rss_before
+        MODEL_MEMORY_BYTES.set(model_memory)
+        logger.info(
+            f"Model loaded {'for inference only' if config.inference_only else 'with its training state'} "
+            f"in {time.perf_counter() - load_start:.2f}s, {model_memory / 2**20:.1f} MB resident"
+        )
+
+        # first inference is slow, do it before serving real requests
+        warm_up_model(model_instance)
+
+        # the loaded version is already on disk
+        app.state.checkpoints.mark_saved(model_instance)
+
+        app.state.model = model_instance
+        app.state.model_status = MODEL_READY
+        logger.info(f"Model loaded and warmed up in {time.perf_counter() - start:.2f}s")
+
+        # pick up models that other replicas train on the shared volume
+        if config.model_watch_interval > 0:
+            app.state.model_watcher = ModelWatcher(app.state, interval=config.model_watch_interval)
+            app.state.model_watcher.start()
+    except Exception:
+        app.state.model_status = MODEL_FAILED
+        logger.exception("Failed to load model")
+    finally:
+        app.state.model_loaded.set()
+
 
 def _startup_model(app: FastAPI) -> None:
-    # load model during startup.
-    weights_dir = config.model_dir
-    model_instance = initialize_model(chosen_model="neural_network", weights_dir=weights_dir)
-    app.state.model = model_instance
-    app.state.weights_dir = weights_dir
+    # load the model in the background, so the server answers liveness checks while the model is loading
+    app.state.model = None
+    app.state.weights_dir = config.model_dir
+    app.state.model_status = MODEL_LOADING
+    app.state.model_loaded = threading.Event()
+    # held while the model is trained in place, see exclusive_training
+    app.state.model_lock = threading.Lock()
+    app.state.checkpoints = CheckpointManager(app.state.weights_dir, keep_last=config.checkpoint_keep_last)
+    threading.Thread(target=_load_model, args=(app,), name="model-loader", daemon=True).start()
+
+
+def _startup_cache(app: FastAPI) -> None:
+    app.state.prediction_cache = create_prediction_cache()
+
+
+def _startup_prefetch(app: FastAPI) -> None:
+    # refreshes wait for the model, the scheduler runs idle until it is loaded
+    app.state.prefetcher = create_prefetcher(app.state)
+    if app.state.prefetcher is not None:
+        app.state.prefetcher.start()
+
+
+def _startup_history(app: FastAPI) -> None:
+    app.state.history_store = create_history_store()
 
 
 def _initialize_logger():
@@ -30,18 +97,19 @@ def _initialize_logger():
         log_file_path=log_file_path, 
         log_level=config.log_level,
         console_log_level=config.console_log_level,
-        file_log_level=config.file_log_level
+        file_log_level=config.file_log_level,
+        queue_size=config.log_queue_size
     ) # switch to logging.DEBUG when debugging
 
 
 def _shutdown_model(app: FastAPI) -> None:
     logger = get_logger(__name__)
     try:
-        if hasattr(app.state, 'model') and app.state.model is not None:
-            backup_path = f"{app.state.weights_dir}_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            app.state.model.save_model(backup_path)
-            app.state.model.save_model(app.state.weights_dir)
-            logger.info("Model saved successfully during shutdown")
+        if getattr(app.state, 'model_watcher', None) is not None:
+            app.state.model_watcher.stop()
+        # models are checkpointed after training, only unsaved changes are written here
+        if hasattr(app.state, 'checkpoints'):
+            app.state.checkpoints.close(getattr(app.state, 'model', None))
         app.state.model = None
     except Exception as e:
         logger.error(f"Failed to save model during shutdown: {str(e)}")
@@ -50,13 +118,23 @@ def _shutdown_model(app: FastAPI) -> None:
 def start_app_handler(app: FastAPI) -> Callable:
     def startup() -> None:
         _initialize_logger()
+        # before torch/numpy are imported, so thread limits apply to them
+        app.state.runtime = configure_runtime()
         _startup_model(app)
+        _startup_cache(app)
+        _startup_prefetch(app)
+        _startup_history(app)
 
     return startup
 
 
 def stop_app_handler(app: FastAPI) -> Callable:
     def shutdown() -> None:
+        if getattr(app.state, 'prefetcher', None) is not None:
+            app.state.prefetcher.stop()
         _shutdown_model(app)
+        if hasattr(app.state, 'history_store'):
+            app.state.history_store.close()
+        stop_logging()
 
     return shutdown
\ No newline at end of file
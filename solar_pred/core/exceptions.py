@@ -25,6 +25,26 @@ class DataProcessingError(Exception):
         self.message = message
 
 class ModelTrainingError(Exception):
+    def __init__(self, message: object) -> None:
+        super().__init__(message)
+        self.message = message
+
+class ModelNotReadyError(Exception):
+    def __init__(self, message: object) -> None:
+        super().__init__(message)
+        self.message = message
+
+class TrainingInProgressError(Exception):
+    def __init__(self, message: object) -> None:
+        super().__init__(message)
+        self.message = message
+
+class TrainingDisabledError(Exception):
+    def __init__(self, message: object) -> None:
+        super().__init__(message)
+        self.message = message
+
+class WeatherUnavailableError(DataProcessingError):
     def __init__(self, message: object) -> None:
         super().__init__(message)
         self.message = message
\ No newline at end of file
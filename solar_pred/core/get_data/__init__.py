@@ -1,2 +1,3 @@
 from .get_suntimes import get_suntimes_by_date, get_suntimes_from_inverter
-from .get_weather import get_weather_data_for_df, get_weather_data_by_date
\ No newline at end of file
+from .get_weather import get_weather_data_for_df, get_weather_data_by_date
+from .weather_providers import WeatherProvider, OpenMeteoProvider, LocalStoreProvider, RecordReplayProvider, create_weather_provider, create_local_store
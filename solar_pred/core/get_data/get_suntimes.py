@@ -1,4 +1,3 @@
-import ephem
 from datetime import timedelta
 import pandas as pd
 
@@ -16,6 +15,8 @@ def get_sunset_sunrise(lat, lon, altitude, date, timezone):
     Returns:
         tuple: (sunrise_local, sunset_local) datetime objects
     """
+    import ephem
+
     observer = ephem.Observer()
     observer.lat = str(lat)
     observer.lon = str(lon)
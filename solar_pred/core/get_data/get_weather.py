@@ -1,10 +1,9 @@
-import openmeteo_requests
-import requests_cache
 import pandas as pd
-from retry_requests import retry
 from datetime import datetime
 from typing import  Dict
 
+from solar_pred.core.config import config
+
 
 def _fetch_weather_data(latitude: float, longitude: float, url: str, params: Dict) -> pd.DataFrame:
     """
@@ -19,6 +18,11 @@ def _fetch_weather_data(latitude: float, longitude: float, url: str, params: Dic
     Returns:
         pd.DataFrame: DataFrame containing hourly weather data
     """
+    # the API clients are slow to import, so they are imported on the first fetch
+    import openmeteo_requests
+    import requests_cache
+    from retry_requests import retry
+
     # Setup the Open-Meteo API client with cache and retry on error
     cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
     retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
@@ -98,7 +102,7 @@ def get_weather_data_by_date(latitude: float, longitude: float,
     # Determine which API to use based on the date range
     if days_from_present_start > 92:
         # Use historical forecast API for dates more than 92 days in the past
-        url = "https://historical-forecast-api.open-meteo.com/v1/forecast"
+        url = config.weather_historical_url
         params = {
             **common_params,
             "start_date": start_date,
@@ -106,7 +110,7 @@ def get_weather_data_by_date(latitude: float, longitude: float,
         }
     else:
         # Use regular forecast API for recent past and future dates
-        url = "https://api.open-meteo.com/v1/forecast"
+        url = config.weather_forecast_url
         params = {
             **common_params,
             "past_days": min(days_from_present_start, 92) if days_from_present_start > 0 else 0,
@@ -0,0 +1,154 @@
+"""
+Weather providers.
+DataProcessor gets its weather from a provider instead of calling Open-Meteo directly, so the source can be swapped:
+live Open-Meteo, a local store of weather files per location, or a record/replay provider that saves every fetched
+frame and returns the saved frame for the same request later. Replaying makes benchmarks, backtests and offline
+batch runs reproducible and lets them run without network access.
+All providers return frames in the format of get_weather_data_by_date (timestamp column, one column per variable).
+"""
+
+import os
+import hashlib
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+
+from solar_pred.core.config import config, WEATHER_PROVIDERS as PROVIDERS
+from solar_pred.core.checkpoint import atomic_parquet_dump
+from solar_pred.core.exceptions import ValidationError, WeatherUnavailableError
+from solar_pred.core.logging_config import get_logger
+
+from .get_weather import get_weather_data_by_date
+
+RECORD_MODES = ("record", "replay", "record_replay")
+
+
+class WeatherProvider(ABC):
+    name = "base"
+
+    @abstractmethod
+    def get_weather(self, latitude: float, longitude: float, start_date, end_date) -> pd.DataFrame:
+        """Hourly weather of a location for a period, like get_weather_data_by_date."""
+
+    def get_weather_for_df(self, latitude: float, longitude: float, df: pd.DataFrame) -> pd.DataFrame:
+        """Hourly weather covering the datetime index of df."""
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError("DataFrame must have a datetime index")
+        return self.get_weather(latitude, longitude, str(df.index.min()), str(df.index.max()))
+
+
+class OpenMeteoProvider(WeatherProvider):
+    """Live Open-Meteo forecast and historical forecast APIs."""
+    name = "open_meteo"
+
+    def get_weather(self, latitude: float, longitude: float, start_date, end_date) -> pd.DataFrame:
+        return get_weather_data_by_date(latitude, longitude, start_date, end_date)
+
+
+def _last_day(start_date: date, end_date: date) -> date:
+    # the same period the Open-Meteo routing returns: past periods include end_date, forecasts end the day before it
+    return end_date if end_date <= datetime.now().date() else max(start_date, end_date - timedelta(days=1))
+
+
+class LocalStoreProvider(WeatherProvider):
+    """
+    Weather read from `<root>/<latitude>_<longitude>.parquet`, one file per location with any number of days.
+    Locations are rounded to `decimals` so nearby panels share a file. Files are filled with `save`, e.g. by
+    `python -m solar_pred.import_weather`.
+    """
+    name = "local"
+
+    def __init__(self, root: str, decimals: int = 2):
+        self.root = root
+        self.decimals = decimals
+        os.makedirs(self.root, exist_ok=True)
+
+    def get_weather(self, latitude: float, longitude: float, start_date, end_date) -> pd.DataFrame:
+        start_date = pd.to_datetime(start_date).date()
+        end_date = pd.to_datetime(end_date).date()
+        last_day = _last_day(start_date, end_date)
+
+        path = self._path(latitude, longitude)
+        if not os.path.exists(path):
+            raise WeatherUnavailableError(f"No stored weather for location {(latitude, longitude)}")
+        frame = pd.read_parquet(path)
+        days = frame["timestamp"].dt.date
+        frame = frame[(days >= start_date) & (days <= last_day)].reset_index(drop=True)
+        if frame.empty or frame["timestamp"].iloc[0].date() > start_date or frame["timestamp"].iloc[-1].date() < last_day:
+            raise WeatherUnavailableError(
+                f"Stored weather for location {(latitude, longitude)} does not cover {start_date} to {last_day}"
+            )
+        return frame
+
+    def save(self, latitude: float, longitude: float, weather: pd.DataFrame) -> None:
+        """Merge weather into the file of a location. Rows of weather replace stored rows with the same timestamp."""
+        path = self._path(latitude, longitude)
+        if os.path.exists(path):
+            weather = pd.concat([pd.read_parquet(path), weather], ignore_index=True)
+        weather = weather.drop_duplicates(subset="timestamp", keep="last").sort_values("timestamp")
+        atomic_parquet_dump(weather, path)
+
+    def _path(self, latitude: float, longitude: float) -> str:
+        return os.path.join(self.root, f"{round(latitude, self.decimals)}_{round(longitude, self.decimals)}.parquet")
+
+
+class RecordReplayProvider(WeatherProvider):
+    """
+    Saves the frame of every request fetched from `upstream` and returns it for the same
+    location and dates later, whatever the current date is.
+
+    Modes:
+        record: always fetch and save
+        replay: saved frames only, a request that was not recorded raises WeatherUnavailableError
+        record_replay: saved frames, fetch and save on a miss
+    """
+    name = "record_replay"
+
+    def __init__(self, root: str, mode: str = "record_replay", upstream: Optional[WeatherProvider] = None):
+        if mode not in RECORD_MODES:
+            raise ValidationError(f"Unknown record mode {mode}. Available modes: {RECORD_MODES}")
+        self.root = root
+        self.mode = mode
+        self.upstream = upstream or OpenMeteoProvider()
+        os.makedirs(self.root, exist_ok=True)
+
+    def get_weather(self, latitude: float, longitude: float, start_date, end_date) -> pd.DataFrame:
+        path = self._path(latitude, longitude, start_date, end_date)
+        if self.mode != "record" and os.path.exists(path):
+            return pd.read_parquet(path)
+        if self.mode == "replay":
+            raise WeatherUnavailableError(
+                f"No recorded weather for location {(latitude, longitude)} from {start_date} to {end_date}"
+            )
+
+        weather = self.upstream.get_weather(latitude, longitude, start_date, end_date)
+        atomic_parquet_dump(weather, path)
+        get_logger(__name__).debug(f"Recorded weather to {path}")
+        return weather
+
+    def _path(self, latitude: float, longitude: float, start_date, end_date) -> str:
+        start_date = pd.to_datetime(start_date).date()
+        end_date = pd.to_datetime(end_date).date()
+        key = f"{float(latitude):.6f}|{float(longitude):.6f}|{start_date}|{end_date}"
+        return os.path.join(self.root, f"{hashlib.sha256(key.encode()).hexdigest()[:32]}.parquet")
+
+
+def create_local_store() -> LocalStoreProvider:
+    """Local weather store under `weather_store_path` (default volume_path/weather), read by the `local` provider."""
+    root = config.weather_store_path or os.path.join(config.volume_path, "weather")
+    return LocalStoreProvider(os.path.join(root, "local"), decimals=config.cache_location_decimals)
+
+
+def create_weather_provider(name: Optional[str] = None) -> WeatherProvider:
+    """Provider configured in Settings (`weather_provider`, `weather_store_path`)."""
+    name = name or config.weather_provider
+    root = config.weather_store_path or os.path.join(config.volume_path, "weather")
+    if name == "open_meteo":
+        return OpenMeteoProvider()
+    if name == "local":
+        return create_local_store()
+    if name in RECORD_MODES:
+        return RecordReplayProvider(os.path.join(root, "recorded"), mode=name)
+    raise ValidationError(f"Unknown weather provider {name}. Available providers: {PROVIDERS}")
@@ -1,10 +1,25 @@
 import os
 
 from solar_pred.core.config import config
+from solar_pred.core.choose_models import MODEL_READY, MODEL_FAILED
+
+async def check_model_readiness(app_state):
+    """Check if the model finished loading and warming up. An untrained model is ready to be trained."""
+    status = getattr(app_state, 'model_status', None)
+    if status == MODEL_READY:
+        return {"status": "healthy", "details": "Model loaded"}
+    if status == MODEL_FAILED:
+        return {"status": "unhealthy", "details": "Model failed to load"}
+    return {"status": "unhealthy", "details": f"Model is {status or 'not loaded'}"}
+
 
 async def check_model_health(app_state):
     """Check if model is loaded and ready."""
     try:
+        readiness = await check_model_readiness(app_state)
+        if readiness["status"] != "healthy":
+            return readiness
+
         if not hasattr(app_state, 'model') or app_state.model is None:
             return {"status": "unhealthy", "details": "Model not loaded"}
         
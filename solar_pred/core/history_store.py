@@ -0,0 +1,235 @@
+"""
+Per-inverter training history.
+Preprocessed training rows (weather features + solar_power) are appended to Parquet files under
+`<volume_path>/history/<inverter_id>/<YYYY-MM>/part-*.parquet`, with the inverter id percent-encoded.
+Every append writes new part files, duplicates on timestamp are resolved on read (the newest part wins), and
+months with many small parts are compacted into a single file in the background. Range reads only open the
+months they cover.
+"""
+
+import os
+import time
+import uuid
+import fcntl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, TYPE_CHECKING
+from urllib.parse import quote, unquote
+
+from solar_pred.core.config import config
+from solar_pred.core.exceptions import ValidationError
+from solar_pred.core.logging_config import get_logger
+
+# pandas and pyarrow are imported lazily to keep the API server's import time low
+if TYPE_CHECKING:
+    import pandas as pd
+
+TIMESTAMP_COLUMN = "timestamp"
+PART_PREFIX = "part-"
+COMPACT_LOCK_FILENAME = ".compact.lock"
+
+
+def _safe_name(inverter_id: str) -> str:
+    """
+    Directory name of an inverter. Ids come from requests: percent-encoding keeps them from escaping the store
+    directory and, being reversible, gives distinct ids distinct directories.
+    """
+    name = quote(str(inverter_id), safe="")
+    if not name:
+        raise ValidationError("Empty inverter_id")
+    # a leading dot would hide the directory from listings, or be ".." itself
+    return "%2E" + name[1:] if name.startswith(".") else name
+
+
+class HistoryStore:
+    """Append-only, month-partitioned Parquet store of training rows per inverter."""
+
+    def __init__(self, root: str, compact_parts: int = 8):
+        self.root = root
+        self.compact_parts = compact_parts
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-compaction")
+        self._scheduled = set()
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def append(self, inverter_id: str, rows: "pd.DataFrame") -> int:
+        """
+        Store rows with a datetime index. Returns the number of rows written.
+        Months that reached `compact_parts` part files are compacted in the background.
+        """
+        import pandas as pd
+        import pyarrow as pa
+
+        if rows.empty:
+            return 0
+        inverter_dir = self._inverter_dir(inverter_id)
+        frame = rows.copy()
+        frame.index = pd.DatetimeIndex(frame.index, name=TIMESTAMP_COLUMN)
+        frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+
+        for month, month_rows in frame.groupby(frame.index.strftime("%Y-%m")):
+            month_dir = os.path.join(inverter_dir, month)
+            os.makedirs(month_dir, exist_ok=True)
+            table = pa.Table.from_pandas(month_rows.reset_index(), preserve_index=False)
+            self._write_part(table, month_dir)
+
+            if len(self._parts(month_dir)) >= self.compact_parts:
+                self._schedule_compaction(month_dir)
+        return len(frame)
+
+    def read(self, inverter_id: str, start=None, end=None, columns: Optional[List[str]] = None) -> "pd.DataFrame":
+        """
+        Rows of an inverter with start <= timestamp < end, sorted and de-duplicated on timestamp.
+        Only the month partitions overlapping the range are read.
+        """
+        import pandas as pd
+
+        inverter_dir = self._inverter_dir(inverter_id)
+        if not os.path.isdir(inverter_dir):
+            return pd.DataFrame()
+
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        first_month = start.strftime("%Y-%m") if start is not None else None
+        last_month = end.strftime("%Y-%m") if end is not None else None
+
+        read_columns = None if columns is None else [TIMESTAMP_COLUMN] + [c for c in columns if c != TIMESTAMP_COLUMN]
+        tables = []
+        for month in sorted(os.listdir(inverter_dir)):
+            if month.startswith(".") or (first_month and month < first_month) or (last_month and month > last_month):
+                continue
+            tables.extend(self._read_month(os.path.join(inverter_dir, month), read_columns))
+        if not tables:
+            return pd.DataFrame()
+
+        frame = self._to_frame(tables)
+        if start is not None:
+            frame = frame.loc[frame.index >= start]
+        if end is not None:
+            frame = frame.loc[frame.index < end]
+        return frame
+
+    def inverters(self) -> List[str]:
+        """Inverters with stored history."""
+        return sorted(unquote(name) for name in os.listdir(self.root) if not name.startswith(".") and os.path.isdir(os.path.join(self.root, name)))
+
+    def months(self, inverter_id: str) -> List[str]:
+        """Month partitions ("YYYY-MM") of an inverter, oldest first."""
+        inverter_dir = self._inverter_dir(inverter_id)
+        if not os.path.isdir(inverter_dir):
+            return []
+        return sorted(month for month in os.listdir(inverter_dir) if not month.startswith("."))
+
+    def read_month(self, inverter_id: str, month: str, columns: Optional[List[str]] = None) -> "pd.DataFrame":
+        """Rows of one month partition, sorted and de-duplicated on timestamp. Reads a long history one month at a time."""
+        read_columns = None if columns is None else [TIMESTAMP_COLUMN] + [c for c in columns if c != TIMESTAMP_COLUMN]
+        return self._to_frame(self._read_month(os.path.join(self._inverter_dir(inverter_id), month), read_columns))
+
+    def compact(self, inverter_id: Optional[str] = None) -> int:
+        """Compact every month with more than one part, of one inverter or of all. Returns the months compacted."""
+        inverter_dirs = [self._inverter_dir(inverter_id)] if inverter_id is not None else [
+            os.path.join(self.root, name) for name in os.listdir(self.root) if not name.startswith(".")
+        ]
+        compacted = 0
+        for inverter_dir in inverter_dirs:
+            if not os.path.isdir(inverter_dir):
+                continue
+            for month in os.listdir(inverter_dir):
+                month_dir = os.path.join(inverter_dir, month)
+                if not month.startswith(".") and len(self._parts(month_dir)) > 1:
+                    compacted += self._compact_month(month_dir)
+        return compacted
+
+    def close(self) -> None:
+        """Wait for background compactions."""
+        self._executor.shutdown(wait=True)
+
+    def _inverter_dir(self, inverter_id: str) -> str:
+        return os.path.join(self.root, _safe_name(inverter_id))
+
+    @staticmethod
+    def _parts(month_dir: str) -> List[str]:
+        # part names start with the write time, so sorting them sorts by age
+        try:
+            return sorted(name for name in os.listdir(month_dir) if name.startswith(PART_PREFIX))
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _write_part(table, month_dir: str, name: Optional[str] = None) -> None:
+        import pyarrow.parquet as pq
+
+        name = name or f"{PART_PREFIX}{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        # readers skip dot files, the part appears atomically on rename
+        tmp_path = os.path.join(month_dir, f".{name}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(month_dir, name))
+
+    @staticmethod
+    def _to_frame(tables: list) -> "pd.DataFrame":
+        import pandas as pd
+        import pyarrow as pa
+
+        if not tables:
+            return pd.DataFrame()
+        frame = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+        frame = frame.set_index(TIMESTAMP_COLUMN)
+        # parts are read oldest first, so the last duplicate is the newest value
+        return frame[~frame.index.duplicated(keep="last")].sort_index()
+
+    def _read_month(self, month_dir: str, columns: Optional[List[str]]) -> list:
+        import pyarrow.parquet as pq
+
+        for _ in range(3):
+            try:
+                return [pq.read_table(os.path.join(month_dir, name), columns=columns) for name in self._parts(month_dir)]
+            except FileNotFoundError:
+                # a compaction replaced the parts while they were listed, list them again
+                continue
+        raise RuntimeError(f"History partition {month_dir} kept changing while it was read")
+
+    def _schedule_compaction(self, month_dir: str) -> None:
+        with self._lock:
+            if month_dir in self._scheduled:
+                return
+            self._scheduled.add(month_dir)
+        self._executor.submit(self._background_compaction, month_dir)
+
+    def _background_compaction(self, month_dir: str) -> None:
+        try:
+            self._compact_month(month_dir)
+        except Exception:
+            get_logger(__name__).exception(f"Failed to compact history partition {month_dir}")
+        finally:
+            with self._lock:
+                self._scheduled.discard(month_dir)
+
+    def _compact_month(self, month_dir: str) -> int:
+        """Rewrite the parts of a month as one de-duplicated part. Returns 1 if the month was compacted."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # one compaction per inverter at a time, also across replicas sharing the volume
+        lock_path = os.path.join(os.path.dirname(month_dir), COMPACT_LOCK_FILENAME)
+        with open(lock_path, "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+
+            parts = self._parts(month_dir)
+            if len(parts) < 2:
+                return 0
+            tables = [pq.read_table(os.path.join(month_dir, name)) for name in parts]
+            frame = pa.concat_tables(tables, promote_options="permissive").to_pandas().set_index(TIMESTAMP_COLUMN)
+            frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+
+            # the compacted part is named after the newest part it replaces, so later appends still win
+            self._write_part(pa.Table.from_pandas(frame.reset_index(), preserve_index=False), month_dir, name=parts[-1])
+            for name in parts[:-1]:
+                os.remove(os.path.join(month_dir, name))
+        return 1
+
+
+def create_history_store() -> HistoryStore:
+    return HistoryStore(os.path.join(config.volume_path, "history"), compact_parts=config.history_compact_parts)
@@ -20,11 +20,46 @@ class TrainingInput(BaseModel):
     panel_metadata: PanelMetadata
     panel_output: List[PanelOutput]
 
+class BacktestInput(BaseModel):
+    inverter_id: str
+    # forecast origins, yyyymmdd or yyyymmddhhmmss
+    origins: List[str] = Field(min_length=1)
+    predict_days: int = Field(default=1, ge=1, le=16)
+
 class PredictionOutput(BaseModel):
     prediction: Dict[str, float]
 
+class BatchPredictionOutput(BaseModel):
+    # predictions and errors are keyed by inverter_id
+    predictions: Dict[str, Dict[str, float]]
+    errors: Dict[str, str] = Field(default_factory=dict)
+
 class HealthCheckOutput(BaseModel):
     status: str
     is_healthy: bool
     timestamp: datetime.datetime = Field(default_factory=datetime.datetime.now)
-    details: Optional[Dict[str, Any]] = Field(default=None, description="Detailed health check results")
\ No newline at end of file
+    details: Optional[Dict[str, Any]] = Field(default=None, description="Detailed health check results")
+
+class PrefetchEntryOutput(BaseModel):
+    plant_id: str
+    inverter_id: str
+    latitude: float
+    longitude: float
+    altitude: float
+    predict_days: int
+    # the cached prediction belongs to the latest forecast and the loaded model
+    fresh: bool
+    forecast_issue_time: Optional[str] = None
+    model_version: Optional[str] = None
+    refreshed_at: Optional[str] = None
+    age_s: Optional[float] = None
+    due_at: Optional[str] = None
+    last_seen: str
+    failures: int = 0
+    last_error: Optional[str] = None
+
+class PrefetchStatusOutput(BaseModel):
+    plants: int
+    fresh: int
+    running: int
+    entries: List[PrefetchEntryOutput]
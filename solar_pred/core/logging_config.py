@@ -1,9 +1,39 @@
 import logging
 import sys
-from pathlib import Path
-from logging.handlers import RotatingFileHandler
+import copy
 import json
+import uuid
+import queue
+import atexit
+import contextvars
+from pathlib import Path
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from datetime import datetime
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library encoder
+    orjson = None
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Structured context (request id, plant id, ...) added to every record logged while it is bound
+_log_context: contextvars.ContextVar[dict] = contextvars.ContextVar("log_context", default={})
+# Stage timings of the current request, filled by metrics.stage_timer
+_stage_timings: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("stage_timings", default=None)
+
+# Attributes every LogRecord has. Anything else was passed with `extra=` and is logged as a structured field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "context"}
+
+_listener: Optional[QueueListener] = None
+
+
+def _dumps(obj: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode("utf-8")
+    return json.dumps(obj, default=str)
+
 
 class JSONFormatter(logging.Formatter):
     def format(self, record):
@@ -15,28 +45,99 @@ class JSONFormatter(logging.Formatter):
             "line": record.lineno,
             "message": record.getMessage(),
         }
+        context = getattr(record, "context", None)
+        if context:
+            log_obj.update(context)
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                log_obj[key] = value
         if record.exc_info:
             log_obj['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # exception formatted by AsyncQueueHandler before the record crossed threads
+            log_obj['exception'] = record.exc_text
         if record.stack_info:
             log_obj['stack_info'] = self.formatStack(record.stack_info)
-        return json.dumps(log_obj)
+        return _dumps(log_obj)
+
+
+class ContextFilter(logging.Filter):
+    """Attach the bound log context to records. Filters run in the calling thread, where the context is visible."""
+
+    def filter(self, record):
+        record.context = _log_context.get()
+        return True
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Queue handler with a bounded queue. Formatting and disk writes happen in the listener thread.
+    When the queue is full the record is dropped and counted, instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exception_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        # merge args and render the exception now, the record is formatted later in another thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            from solar_pred.core.metrics import LOG_RECORDS_DROPPED
+            LOG_RECORDS_DROPPED.inc()
+
+
+def bind_log_context(**fields) -> contextvars.Token:
+    """Add fields to the log context of the current request/task. Returns a token for `reset_log_context`."""
+    return _log_context.set({**_log_context.get(), **fields})
+
+
+def reset_log_context(token: contextvars.Token) -> None:
+    _log_context.reset(token)
+
+
+def get_log_context() -> dict:
+    return _log_context.get()
+
+
+def record_stage_timing(stage: str, seconds: float) -> None:
+    """Add a stage duration to the timings of the current request, if one is being tracked."""
+    timings = _stage_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
 
 def setup_logger(
-        log_file_path: str = "app.log",       
+        log_file_path: str = "app.log",
         max_file_size: int = 10 * 1024 * 1024,
         backup_count: int = 10,
         log_level: str = "INFO",
         console_log_level: str = None,
-        file_log_level: str = None
+        file_log_level: str = None,
+        queue_size: int = 10000
     ) -> None:
-    
+    global _listener
+
     # Get absolute path
     log_path = Path(log_file_path).resolve()
     # log_path.parent.mkdir(parents=True, exist_ok=True)
-    
+
     # Configure root logger
     root_logger = logging.getLogger("root")
     root_logger.setLevel(log_level)
+    stop_logging()
     root_logger.handlers.clear()  # Remove any existing handlers
 
     # Console Handler
@@ -47,7 +148,6 @@ def setup_logger(
     )
     console_handler.setFormatter(console_formatter)
     console_handler.setLevel(console_log_level or log_level)
-    root_logger.addHandler(console_handler)
 
     # File Handler
     file_handler = RotatingFileHandler(
@@ -59,10 +159,74 @@ def setup_logger(
     json_formatter = JSONFormatter()
     file_handler.setFormatter(json_formatter)
     file_handler.setLevel(file_log_level or log_level)
-    root_logger.addHandler(file_handler)
-    
+
+    # The root logger only puts records on a bounded queue, a listener thread formats and writes them,
+    # so slow disks don't add latency to requests
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = AsyncQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    root_logger.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+
     # Test logging
     root_logger.info("Logging system initialized")
 
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware that binds a request id (taken from the X-Request-ID header or generated) to the log context,
+    echoes it in the response, and logs one structured line per request with its stage timings.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        context_token = bind_log_context(request_id=request_id)
+        timings = {}
+        timings_token = _stage_timings.set(timings)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if timings:
+                get_logger(__name__).info(
+                    f"{scope['method']} {scope['path']} finished",
+                    extra={"stage_timings": timings}
+                )
+            _stage_timings.reset(timings_token)
+            reset_log_context(context_token)
+
+
 def get_logger(name: str|None = None) -> logging.Logger:
-    return logging.getLogger(name or __name__)
\ No newline at end of file
+    return logging.getLogger(name or __name__)
@@ -0,0 +1,278 @@
+"""
+Prometheus-style metrics.
+Recording a value is a couple of additions under a lock, all formatting happens when /metrics is scraped,
+so instrumentation costs close to nothing when nobody is scraping.
+"""
+
+import os
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from solar_pred.core.logging_config import record_stage_timing
+
+# Upper bounds (seconds) of latency buckets, from sub-millisecond cache hits to long training runs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry: List["_Metric"] = []
+
+# set while running synthetic work (model warm-up) whose stage timings must not be recorded
+_stage_timing_suppressed: contextvars.ContextVar[bool] = contextvars.ContextVar("stage_timing_suppressed", default=False)
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _label_values(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, label_values: tuple, extra: Optional[dict] = None) -> str:
+        pairs = list(zip(self.labelnames, label_values))
+        if extra:
+            pairs.extend(extra.items())
+        if not pairs:
+            return ""
+        escaped = ('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield f"{self.name}{self._format_labels(key)} {value}"
+
+
+class Gauge(_Metric):
+    """Gauge that is either set directly or computed by `callback` at scrape time."""
+    metric_type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        if self._callback is not None:
+            yield f"{self.name} {self._callback()}"
+            return
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield f"{self.name}{self._format_labels(key)} {value}"
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label values: [bucket counts..., +Inf count], sum
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def time(self, **labels) -> "_Timer":
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for upper_bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket{self._format_labels(key, {'le': upper_bound})} {cumulative}"
+            cumulative += counts[-1]
+            yield f"{self.name}_bucket{self._format_labels(key, {'le': '+Inf'})} {cumulative}"
+            yield f"{self.name}_count{self._format_labels(key)} {cumulative}"
+            yield f"{self.name}_sum{self._format_labels(key)} {total}"
+
+
+class _Timer:
+    """Context manager observing the elapsed time into a histogram. A plain class is cheaper than @contextmanager."""
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _StageTimer(_Timer):
+    """Timer that also adds the duration to the stage timings logged at the end of the request."""
+    __slots__ = ()
+
+    def __exit__(self, exc_type, exc, tb):
+        if _stage_timing_suppressed.get():
+            return False
+        elapsed = time.perf_counter() - self.start
+        self.histogram.observe(elapsed, **self.labels)
+        record_stage_timing(self.labels["stage"], elapsed)
+        return False
+
+
+def process_rss_bytes() -> float:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return float(resident_pages * os.sysconf("SC_PAGE_SIZE"))
+    except (OSError, ValueError, IndexError):
+        # not on linux, fall back to the peak RSS
+        import resource
+        return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+REQUEST_LATENCY = Histogram(
+    "solarpred_request_duration_seconds", "Latency of HTTP requests per endpoint", ("endpoint", "method")
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "solarpred_requests_in_flight", "Requests currently being handled per endpoint", ("endpoint",)
+)
+STAGE_LATENCY = Histogram(
+    "solarpred_stage_duration_seconds",
+    "Latency of pipeline stages (weather_fetch, suntimes, preprocessing, scaling, forward_pass, serialization)",
+    ("stage",)
+)
+TRAINING_EPOCH_SECONDS = Histogram(
+    "solarpred_training_epoch_duration_seconds", "Duration of one training epoch"
+)
+TRAINING_SAMPLES_PER_SECOND = Gauge(
+    "solarpred_training_samples_per_second", "Training throughput of the last epoch"
+)
+CACHE_REQUESTS = Counter(
+    "solarpred_prediction_cache_requests_total", "Prediction cache lookups", ("result",)
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "solarpred_model_load_seconds", "Time it took to load the model"
+)
+MODEL_MEMORY_BYTES = Gauge(
+    "solarpred_model_memory_bytes", "Resident memory added by loading the model"
+)
+PREFETCH_PLANTS = Gauge(
+    "solarpred_prefetch_plants", "Recently requested plants whose predictions are prefetched"
+)
+PREFETCH_STALE_PLANTS = Gauge(
+    "solarpred_prefetch_stale_plants", "Registered plants without a cached prediction for the latest forecast and model"
+)
+PREFETCH_REFRESHES = Counter(
+    "solarpred_prefetch_refreshes_total", "Prefetch refreshes (computed, cached, deferred while training or error)", ("result",)
+)
+LOG_RECORDS_DROPPED = Counter(
+    "solarpred_log_records_dropped_total", "Log records dropped because the logging queue was full"
+)
+PROCESS_RSS = Gauge(
+    "solarpred_process_resident_memory_bytes", "Resident memory of this process", callback=process_rss_bytes
+)
+
+
+def stage_timer(stage: str):
+    """Context manager that records the duration of a pipeline stage."""
+    return _StageTimer(STAGE_LATENCY, {"stage": stage})
+
+
+@contextmanager
+def untimed_stages():
+    """Do not record the stage timers run inside, for synthetic work such as the model warm-up."""
+    token = _stage_timing_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _stage_timing_suppressed.reset(token)
+
+
+class MetricsMiddleware:
+    """ASGI middleware that records latency and in-flight requests of each route."""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # only label known routes, so random paths can't blow up the number of series
+        if self._route_paths is None:
+            self._route_paths = {getattr(route, "path", None) for route in scope["app"].routes}
+        endpoint = scope["path"] if scope["path"] in self._route_paths else "other"
+
+        start = time.perf_counter()
+        with REQUESTS_IN_FLIGHT.track_inprogress(endpoint=endpoint):
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint, method=scope["method"])
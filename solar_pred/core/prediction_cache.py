@@ -0,0 +1,195 @@
+"""
+Cache for prediction responses.
+Open-Meteo issues new forecasts only every few hours, so the same location, horizon and model
+produce the same prediction until either a newer forecast is issued or a new model is trained.
+Entries are kept in an in-memory LRU and optionally on disk, so replicas sharing the volume can reuse them.
+"""
+
+import os
+import json
+import hashlib
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from solar_pred.core.config import config
+from solar_pred.core.logging_config import get_logger
+from solar_pred.core.metrics import CACHE_REQUESTS
+
+# format of the cached values, part of the disk cache path. Bump it when the format changes,
+# so entries of the old format (e.g. the {timestamp: value} dicts stored before compact predictions) are not read
+CACHE_FORMAT = "compact-v1"
+
+
+def get_forecast_issue_time(now: Optional[datetime] = None) -> str:
+    """
+    Approximate issue time of the latest upstream forecast.
+    The forecast API does not report when its model run was issued, so the current UTC time is
+    floored to the provider's update cadence (`forecast_update_hours`).
+    """
+    now = now or datetime.now(timezone.utc)
+    issue_hour = now.hour - now.hour % config.forecast_update_hours
+    return now.replace(hour=issue_hour, minute=0, second=0, microsecond=0).strftime("%Y%m%d%H")
+
+
+def snap_location(latitude: float, longitude: float, altitude: float) -> tuple[float, float, float]:
+    """Round coordinates so nearby panels share cache entries and weather fetches."""
+    step = config.cache_altitude_step
+    return (
+        round(latitude, config.cache_location_decimals),
+        round(longitude, config.cache_location_decimals),
+        round(altitude / step) * step if step > 0 else altitude
+    )
+
+
+class CacheKey(NamedTuple):
+    """Key of a cached prediction, built by PredictionCache.make_key."""
+    latitude: float
+    longitude: float
+    altitude: float
+    predict_days: int
+    start_date: str
+    model_version: str
+    issue_time: str
+
+
+class PredictionCache:
+    """
+    Two-tier (memory LRU + optional disk) cache of compact predictions.
+
+    Disk entries are stored as `<cache_dir>/<model_version>/<issue_time>/<key hash>.json`,
+    so invalidating a model version or an old forecast is a directory removal.
+    """
+
+    def __init__(self, max_entries: int = 4096, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(panel_metadata, model_version: Optional[str], issue_time: Optional[str] = None) -> CacheKey:
+        """Build a cache key from a PanelMetadata."""
+        from solar_pred.core.preprocessing.processor import get_prediction_dates
+
+        start_date, _ = get_prediction_dates(panel_metadata.predict_days)
+        latitude, longitude, altitude = snap_location(
+            panel_metadata.latitude, panel_metadata.longitude, panel_metadata.altitude
+        )
+        return CacheKey(
+            latitude,
+            longitude,
+            altitude,
+            panel_metadata.predict_days,
+            start_date.isoformat(),
+            str(model_version),
+            issue_time or get_forecast_issue_time()
+        )
+
+    def get(self, key: CacheKey) -> Optional[dict]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_REQUESTS.inc(result="hit")
+                return value
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(result="miss")
+                return None
+            self.hits += 1
+            CACHE_REQUESTS.inc(result="disk_hit")
+            self._put_memory(key, value)
+        return value
+
+    def contains(self, key: CacheKey) -> bool:
+        """Whether key is cached, without counting a lookup or changing the LRU order."""
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.cache_dir is not None and os.path.exists(self._entry_path(key))
+
+    def set(self, key: CacheKey, value: dict) -> None:
+        with self._lock:
+            self._put_memory(key, value)
+        self._write_disk(key, value)
+
+    def invalidate(self, model_version: Optional[str] = None) -> None:
+        """Drop entries that do not belong to `model_version`, or everything if no version is given."""
+        with self._lock:
+            for key in [key for key in self._entries if key.model_version != str(model_version)]:
+                del self._entries[key]
+
+        if self.cache_dir is None:
+            return
+        for version_dir in os.listdir(self.cache_dir):
+            if model_version is None or version_dir != str(model_version):
+                shutil.rmtree(os.path.join(self.cache_dir, version_dir), ignore_errors=True)
+
+    def clear(self) -> None:
+        self.invalidate(model_version=None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _put_memory(self, key: CacheKey, value: dict) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _entry_path(self, key: CacheKey) -> str:
+        # hashed as a plain tuple, so entries written before CacheKey keep their names
+        key_hash = hashlib.sha1(repr(tuple(key)).encode()).hexdigest()
+        return os.path.join(self.cache_dir, key.model_version, key.issue_time, f"{key_hash}.json")
+
+    def _read_disk(self, key: CacheKey) -> Optional[dict]:
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._entry_path(key), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_disk(self, key: CacheKey, value: dict) -> None:
+        if self.cache_dir is None:
+            return
+        logger = get_logger(__name__)
+        path = self._entry_path(key)
+        issue_dir = os.path.dirname(path)
+        try:
+            if not os.path.isdir(issue_dir):
+                os.makedirs(issue_dir, exist_ok=True)
+                self._remove_older_forecasts(os.path.dirname(issue_dir), key.issue_time)
+
+            # write to a temporary file first so other replicas never read a partial entry
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write prediction cache entry to disk: {str(e)}")
+
+    @staticmethod
+    def _remove_older_forecasts(version_dir: str, issue_time: str) -> None:
+        # issue times are formatted as %Y%m%d%H, so string comparison is chronological
+        for existing in os.listdir(version_dir):
+            if existing < issue_time:
+                shutil.rmtree(os.path.join(version_dir, existing), ignore_errors=True)
+
+
+def create_prediction_cache() -> PredictionCache:
+    cache_dir = os.path.join(config.volume_path, "cache", "predictions", CACHE_FORMAT) if config.prediction_cache_disk else None
+    return PredictionCache(max_entries=config.prediction_cache_size, cache_dir=cache_dir)
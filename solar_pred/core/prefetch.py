@@ -0,0 +1,240 @@
+"""
+Forecast prefetch.
+Most /predict traffic is a morning burst for the same plants. Plants requested recently are kept in a registry and
+a background scheduler predicts for them again whenever their cache key changes: a new forecast was issued (every
+`forecast_update_hours`), the prediction day rolled over or another model was loaded. This fetches the new forecast
+weather and stores the prediction in the PredictionCache, so the burst is served from the cache.
+Refreshes start after a random delay of up to `prefetch_jitter_s`, so plants and replicas do not all call the weather
+provider at the same moment, and at most `prefetch_concurrency` run at a time. Training updates the model in place,
+so refreshes only predict while they can take `app_state.model_lock` and are deferred to a later pass otherwise.
+"""
+
+import time
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from solar_pred.core.config import config
+from solar_pred.core.choose_models import MODEL_READY
+from solar_pred.core.logging_config import get_logger
+from solar_pred.core.metrics import PREFETCH_PLANTS, PREFETCH_REFRESHES, PREFETCH_STALE_PLANTS
+from solar_pred.core.prediction_cache import CacheKey, snap_location
+
+
+@dataclass
+class PrefetchEntry:
+    """A registered plant and the cache entry that was last refreshed for it."""
+    panel: object
+    last_seen: float
+    cache_key: Optional[CacheKey] = None
+    refreshed_at: Optional[float] = None
+    due_at: Optional[float] = None
+    running: bool = False
+    failures: int = 0
+    last_error: Optional[str] = None
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp is not None else None
+
+
+class ForecastPrefetcher:
+    """
+    Registry of recently requested plants and the thread that keeps their predictions cached.
+    Plants at the same (snapped) location with the same horizon share a cache entry, so they are registered once.
+    """
+
+    def __init__(self, app_state, max_plants: int = 1024, ttl_hours: float = 48.0, concurrency: int = 2,
+                 jitter_s: float = 600.0, check_interval_s: float = 30.0):
+        self.app_state = app_state
+        self.max_plants = max_plants
+        self.ttl_s = ttl_hours * 3600
+        self.jitter_s = jitter_s
+        self.check_interval_s = check_interval_s
+        self._plants: "OrderedDict[tuple, PrefetchEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="prefetch")
+        self._thread = threading.Thread(target=self._run, name="prefetch-scheduler", daemon=True)
+
+    @staticmethod
+    def plant_key(panel) -> tuple:
+        return (*snap_location(panel.latitude, panel.longitude, panel.altitude), panel.predict_days)
+
+    def register(self, panel, cache_key: Optional[CacheKey] = None) -> None:
+        """
+        Remember a requested plant. cache_key is the key the request was served with, a plant whose entry
+        is already cached is not refreshed until the key changes.
+        """
+        if panel.predict_days is None:
+            return
+        now = time.time()
+        key = self.plant_key(panel)
+        with self._lock:
+            entry = self._plants.get(key)
+            if entry is None:
+                entry = self._plants[key] = PrefetchEntry(panel=panel, last_seen=now)
+            entry.panel = panel
+            entry.last_seen = now
+            if cache_key is not None and cache_key != entry.cache_key and not entry.running:
+                entry.cache_key = cache_key
+                entry.refreshed_at = now
+                entry.due_at = None
+            self._plants.move_to_end(key)
+            while len(self._plants) > self.max_plants:
+                self._plants.popitem(last=False)
+            PREFETCH_PLANTS.set(len(self._plants))
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        """
+        One scheduling pass: forget plants that were not requested within the TTL, give plants with a changed
+        cache key a jittered due time and start the refreshes that are due. Returns the refreshes started.
+        """
+        now = now or time.time()
+        model = self._ready_model()
+        started = 0
+        stale = 0
+        with self._lock:
+            for key in [key for key, entry in self._plants.items() if entry.last_seen < now - self.ttl_s]:
+                del self._plants[key]
+            PREFETCH_PLANTS.set(len(self._plants))
+            if model is None:
+                return 0
+
+            for key, entry in self._plants.items():
+                if entry.running:
+                    continue
+                cache_key = self.app_state.prediction_cache.make_key(entry.panel, model.model_version)
+                if cache_key == entry.cache_key:
+                    continue
+                stale += 1
+                if entry.due_at is None:
+                    entry.due_at = now + random.uniform(0, self.jitter_s)
+                if entry.due_at <= now:
+                    entry.running = True
+                    self._executor.submit(self._refresh, key, entry, model, cache_key)
+                    started += 1
+        PREFETCH_STALE_PLANTS.set(stale)
+        return started
+
+    def status(self) -> dict:
+        """How fresh the cached prediction of every registered plant is."""
+        now = time.time()
+        model = self._ready_model()
+        with self._lock:
+            entries = list(self._plants.values())
+
+        plants = []
+        for entry in entries:
+            current_key = self.app_state.prediction_cache.make_key(entry.panel, model.model_version) if model else None
+            plants.append({
+                "plant_id": entry.panel.plant_id,
+                "inverter_id": entry.panel.inverter_id,
+                "latitude": entry.panel.latitude,
+                "longitude": entry.panel.longitude,
+                "altitude": entry.panel.altitude,
+                "predict_days": entry.panel.predict_days,
+                "fresh": current_key is not None and entry.cache_key == current_key,
+                "forecast_issue_time": entry.cache_key.issue_time if entry.cache_key else None,
+                "model_version": entry.cache_key.model_version if entry.cache_key else None,
+                "refreshed_at": _isoformat(entry.refreshed_at),
+                "age_s": round(now - entry.refreshed_at, 1) if entry.refreshed_at is not None else None,
+                "due_at": _isoformat(entry.due_at),
+                "last_seen": _isoformat(entry.last_seen),
+                "failures": entry.failures,
+                "last_error": entry.last_error
+            })
+        return {
+            "plants": len(plants),
+            "fresh": sum(plant["fresh"] for plant in plants),
+            "running": sum(entry.running for entry in entries),
+            "entries": plants
+        }
+
+    def _ready_model(self):
+        if getattr(self.app_state, "model_status", None) != MODEL_READY:
+            return None
+        return getattr(self.app_state, "model", None)
+
+    def _run(self) -> None:
+        logger = get_logger(__name__)
+        while not self._stop.wait(self.check_interval_s):
+            try:
+                started = self.run_pending()
+                if started:
+                    logger.debug(f"Started {started} forecast prefetches")
+            except Exception:
+                logger.exception("Forecast prefetch scheduling failed")
+
+    def _refresh(self, key: tuple, entry: PrefetchEntry, model, cache_key: CacheKey) -> None:
+        logger = get_logger(__name__)
+        cache = self.app_state.prediction_cache
+        try:
+            # a request may have computed the entry while the refresh was waiting
+            if cache.contains(cache_key):
+                PREFETCH_REFRESHES.inc(result="cached")
+            else:
+                from solar_pred.core.preprocessing.processor import DataProcessor
+
+                inference_data = DataProcessor().preprocess_inference_input(entry.panel)
+                if not self._predict_into_cache(model, inference_data, cache_key):
+                    PREFETCH_REFRESHES.inc(result="deferred")
+                    return
+                PREFETCH_REFRESHES.inc(result="computed")
+            with self._lock:
+                entry.cache_key = cache_key
+                entry.refreshed_at = time.time()
+                entry.failures = 0
+                entry.last_error = None
+        except Exception as e:
+            PREFETCH_REFRESHES.inc(result="error")
+            logger.warning(f"Forecast prefetch failed for plant {entry.panel.plant_id} at {key[:3]}: {str(e)}")
+            with self._lock:
+                entry.failures += 1
+                entry.last_error = str(e)
+        finally:
+            with self._lock:
+                entry.running = False
+                entry.due_at = None
+
+
+    def _predict_into_cache(self, model, inference_data, cache_key: CacheKey) -> bool:
+        """Predict and cache unless the model is being trained or was replaced. Returns False if it was not."""
+        model_lock = self.app_state.model_lock
+        if not model_lock.acquire(blocking=False):
+            return False
+        try:
+            # a model trained or reloaded since the pass would be cached under the key of the old one
+            if self.app_state.model is not model or str(model.model_version) != cache_key.model_version:
+                return False
+            self.app_state.prediction_cache.set(cache_key, model.predict_compact(inference_data))
+            return True
+        finally:
+            model_lock.release()
+
+
+def create_prefetcher(app_state) -> Optional[ForecastPrefetcher]:
+    """Prefetcher configured from the settings, or None if prefetching is disabled."""
+    if config.prefetch_plants <= 0:
+        return None
+    return ForecastPrefetcher(
+        app_state,
+        max_plants=config.prefetch_plants,
+        ttl_hours=config.prefetch_plant_ttl_hours,
+        concurrency=config.prefetch_concurrency,
+        jitter_s=config.prefetch_jitter_s,
+        check_interval_s=config.prefetch_check_interval_s
+    )
@@ -1 +1,10 @@
-from .data_preprocessing import preprocess_datasets
\ No newline at end of file
+from .data_preprocessing import preprocess_datasets
+from ._feature_registry import (
+    FEATURES,
+    register_feature,
+    resolve_features,
+    required_columns,
+    build_feature_matrix,
+    feature_spec,
+    check_feature_spec
+)
@@ -1,18 +1,19 @@
 import pandas as pd
-import numpy as np
+from typing import Sequence
 
-def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Perform feature engineering on the dataset."""
-    df = df.copy()
+from ._feature_registry import FEATURES, build_feature_matrix
 
-    df['global_tilted_irradiance_instant_squared'] = df['global_tilted_irradiance_instant']**2 / 100
-    
-    # Add cyclical time features
-    df.loc[:, 'hour_sin'] = np.sin(2 * np.pi * df.index.hour / 24)
-    df.loc[:, 'hour_cos'] = np.cos(2 * np.pi * df.index.hour / 24)
-    df.loc[:, 'month_sin'] = np.sin(2 * np.pi * df.index.month / 12)
-    df.loc[:, 'month_cos'] = np.cos(2 * np.pi * df.index.month / 12)
+def engineer_features(df: pd.DataFrame, features: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Perform feature engineering on the dataset.
+    Derived features are computed by the models from the feature registry, only the requested registered
+    features are added as columns here (e.g. for inspection).
+    """
+    df = df.dropna()
 
-    df.dropna(inplace=True)
-    
-    return df
\ No newline at end of file
+    derived = [name for name in features if name in FEATURES]
+    if derived:
+        df = df.copy()
+        df[derived] = build_feature_matrix(df, derived)
+
+    return df
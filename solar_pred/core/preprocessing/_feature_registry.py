@@ -0,0 +1,155 @@
+"""
+Feature registry.
+Every derived feature is declared once with its inputs (columns, other features or the timestamp index) and a
+vectorized numpy kernel. The model's `features_to_use` are resolved to the features they depend on and only those
+are computed, straight into a preallocated float32 matrix. Names that are not registered are input columns.
+Training and inference build their matrices with the same function, and the spec of the features is saved with the model.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# pseudo input passing the DatetimeIndex of the frame to a kernel
+INDEX = "__index__"
+FEATURE_SPEC_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Feature:
+    name: str
+    inputs: Tuple[str, ...]
+    kernel: Callable[..., np.ndarray]
+    # bump when the kernel changes, models saved with another version are refused
+    version: int = 1
+
+
+FEATURES: Dict[str, Feature] = {}
+
+
+def register_feature(name: str, inputs: Sequence[str], version: int = 1) -> Callable:
+    """Register the decorated kernel as feature `name`. The kernel gets the values of `inputs` as positional arguments."""
+    def decorator(kernel: Callable) -> Callable:
+        if name in FEATURES:
+            raise ValueError(f"Feature {name} is already registered")
+        FEATURES[name] = Feature(name=name, inputs=tuple(inputs), kernel=kernel, version=version)
+        return kernel
+    return decorator
+
+
+@register_feature("global_tilted_irradiance_instant_squared", ["global_tilted_irradiance_instant"])
+def _irradiance_squared(irradiance: np.ndarray) -> np.ndarray:
+    return irradiance ** 2 / 100
+
+
+@register_feature("hour", [INDEX])
+def _hour(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.hour.to_numpy()
+
+
+@register_feature("month", [INDEX])
+def _month(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.month.to_numpy()
+
+
+# cyclical time features
+@register_feature("hour_sin", ["hour"])
+def _hour_sin(hour: np.ndarray) -> np.ndarray:
+    return np.sin(2 * np.pi * hour / 24)
+
+
+@register_feature("hour_cos", ["hour"])
+def _hour_cos(hour: np.ndarray) -> np.ndarray:
+    return np.cos(2 * np.pi * hour / 24)
+
+
+@register_feature("month_sin", ["month"])
+def _month_sin(month: np.ndarray) -> np.ndarray:
+    return np.sin(2 * np.pi * month / 12)
+
+
+@register_feature("month_cos", ["month"])
+def _month_cos(month: np.ndarray) -> np.ndarray:
+    return np.cos(2 * np.pi * month / 12)
+
+
+def resolve_features(features: Sequence[str]) -> List[str]:
+    """The features and everything they depend on, in computation order."""
+    order = []
+    done = set()
+    visiting = set()
+
+    def visit(name: str) -> None:
+        if name in done or name == INDEX:
+            return
+        if name in visiting:
+            raise ValueError(f"Feature {name} depends on itself")
+        visiting.add(name)
+        feature = FEATURES.get(name)
+        if feature is not None:
+            for dependency in feature.inputs:
+                visit(dependency)
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in features:
+        visit(name)
+    return order
+
+
+def required_columns(features: Sequence[str]) -> List[str]:
+    """Input columns a frame needs to compute the features."""
+    return [name for name in resolve_features(features) if name not in FEATURES]
+
+
+def build_feature_matrix(df: pd.DataFrame, features: Sequence[str], out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Compute the features of df into a (rows, features) float32 matrix, in the order of `features`.
+    Only the features and their dependencies are computed, intermediate results are not added to df.
+
+    Args:
+        df (pd.DataFrame): Frame with the input columns and a DatetimeIndex
+        features (Sequence[str]): Feature and column names
+        out (np.ndarray): Optional preallocated matrix to write into
+
+    Returns:
+        np.ndarray: The feature matrix
+    """
+    if out is None:
+        out = np.empty((len(df), len(features)), dtype=np.float32)
+    positions = {name: i for i, name in enumerate(features)}
+
+    values = {}
+    for name in resolve_features(features):
+        feature = FEATURES.get(name)
+        if feature is None:
+            # an input column, raises KeyError like indexing the frame would
+            values[name] = df[name].to_numpy()
+        else:
+            values[name] = feature.kernel(*(df.index if dependency == INDEX else values[dependency] for dependency in feature.inputs))
+        if name in positions:
+            out[:, positions[name]] = values[name]
+    return out
+
+
+def feature_spec(features: Sequence[str]) -> dict:
+    """Description of the features saved with a model: the names, and inputs and version of every derived feature used."""
+    return {
+        "version": FEATURE_SPEC_VERSION,
+        "features": list(features),
+        "derived": {
+            name: {"inputs": list(FEATURES[name].inputs), "version": FEATURES[name].version}
+            for name in resolve_features(features) if name in FEATURES
+        }
+    }
+
+
+def check_feature_spec(spec: dict) -> None:
+    """Raise ValueError if this registry computes a feature of a saved spec differently."""
+    for name, saved in spec.get("derived", {}).items():
+        feature = FEATURES.get(name)
+        if feature is None or feature.version != saved["version"] or list(feature.inputs) != saved["inputs"]:
+            raise ValueError(f"Feature {name} of the saved model does not match the feature registry")
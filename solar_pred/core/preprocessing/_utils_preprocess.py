@@ -15,28 +15,19 @@ def merge_datasets(df1, df2, method='inner'):
 
 def filter_daylight_hours(df, sunset_sunrise):
     df = df.copy()
-    sunset_sunrise = sunset_sunrise.copy()
 
-    df_index = pd.Index(df.index.date)
-    sunset_sunrise_index = pd.Index(sunset_sunrise.index.date)
+    # Look up sunrise and sunset of each row's day. Days missing from sunset_sunrise get NaT and are dropped by the comparison below
+    days = df.index.normalize()
+    sunrise = sunset_sunrise['sunrise'].reindex(days).to_numpy()
+    sunset = sunset_sunrise['sunset'].reindex(days).to_numpy()
 
-    # Keep only the days present in sunset_sunrise_df
-    df = df[df_index.isin(sunset_sunrise_index)]
-
-    # Function to check if a timestamp is within daylight hours
-    def is_daylight(timestamp):
-        date = str(timestamp.date())
-        sunrise = sunset_sunrise.loc[date, 'sunrise']
-        sunset = sunset_sunrise.loc[date, 'sunset']
-
-        # Add an hour to sunrise and subtract an hour from sunset, otherwise the timestamps are not filtered properly
-        sunrise -= pd.Timedelta(hours=1)
-        sunset += pd.Timedelta(hours=1)
-
-        return sunrise <= timestamp <= sunset
+    # Add an hour to sunrise and subtract an hour from sunset, otherwise the timestamps are not filtered properly
+    sunrise = sunrise - pd.Timedelta(hours=1).to_timedelta64()
+    sunset = sunset + pd.Timedelta(hours=1).to_timedelta64()
 
     # Apply the filter
-    filtered_data = df[df.index.map(is_daylight)]
+    timestamps = df.index.to_numpy()
+    is_daylight = (sunrise <= timestamps) & (timestamps <= sunset)
+    filtered_data = df[is_daylight]
 
     return pd.DataFrame(filtered_data)
-
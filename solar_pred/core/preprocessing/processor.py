@@ -1,10 +1,12 @@
 import pandas as pd
 import pytz
 from datetime import date, timedelta
+from typing import Optional
 
 from solar_pred.core.logging_config import get_logger
+from solar_pred.core.metrics import stage_timer
 from solar_pred.core.preprocessing import preprocess_datasets
-from solar_pred.core.get_data import get_suntimes_by_date, get_suntimes_from_inverter, get_weather_data_by_date, get_weather_data_for_df
+from solar_pred.core.get_data import get_suntimes_by_date, get_suntimes_from_inverter, WeatherProvider, create_weather_provider
 
 
 
@@ -12,8 +14,11 @@ class DataProcessor:
     DATE_STRFORMAT = "%Y%m%d%H%M%S"
     TIMEZONE = pytz.timezone('Asia/Seoul')
 
-    @staticmethod
-    def preprocess_training_input(training_input):
+    def __init__(self, weather_provider: Optional[WeatherProvider] = None):
+        # the provider configured in Settings unless one is given, e.g. a replay provider for offline runs
+        self.weather_provider = weather_provider or create_weather_provider()
+
+    def preprocess_training_input(self, training_input):
         """
         Process raw inverter data
         Fetch weather data based on inv data dates
@@ -31,31 +36,34 @@ class DataProcessor:
         
 
         # If you don't have the inverter data, you can use the the other function, to get the sunset and sunrise times for the period specified by the start and end dates.
-        sunset_sunrise_raw_df = get_suntimes_from_inverter(
-            latitude=panel_metadata['latitude'], 
-            longitude=panel_metadata['longitude'], 
-            altitude=panel_metadata['altitude'],
-            timezone=DataProcessor.TIMEZONE,
-            inverter_df=panel_output_resampled
-        )
+        with stage_timer("suntimes"):
+            sunset_sunrise_raw_df = get_suntimes_from_inverter(
+                latitude=panel_metadata['latitude'], 
+                longitude=panel_metadata['longitude'], 
+                altitude=panel_metadata['altitude'],
+                timezone=DataProcessor.TIMEZONE,
+                inverter_df=panel_output_resampled
+            )
 
-        weather_raw_df = get_weather_data_for_df(
-            latitude=panel_metadata['latitude'], 
-            longitude=panel_metadata['longitude'], 
-            df=panel_output_resampled
-        )
-        merged_dataset = preprocess_datasets(
-            weather=weather_raw_df, 
-            sunset_sunrise=sunset_sunrise_raw_df, 
-            inverter=panel_output_resampled
-        )
-        
-        merged_dataset.dropna(axis=0, inplace=True)
+        with stage_timer("weather_fetch"):
+            weather_raw_df = self.weather_provider.get_weather_for_df(
+                latitude=panel_metadata['latitude'], 
+                longitude=panel_metadata['longitude'], 
+                df=panel_output_resampled
+            )
+
+        with stage_timer("preprocessing"):
+            merged_dataset = preprocess_datasets(
+                weather=weather_raw_df, 
+                sunset_sunrise=sunset_sunrise_raw_df, 
+                inverter=panel_output_resampled
+            )
+            
+            merged_dataset.dropna(axis=0, inplace=True)
         return merged_dataset
 
 
-    @staticmethod
-    def preprocess_inference_input(inference_input):
+    def preprocess_inference_input(self, inference_input):
         # take dates for prediction
         # fetch weather data
         # fetch suntimes
@@ -64,21 +72,99 @@ class DataProcessor:
 
         panel_metadata = inference_input.model_dump()
         start_date, end_date = get_prediction_dates(panel_metadata['predict_days'])
-        sunset_sunrise_raw_df = get_suntimes_by_date(
-            latitude=panel_metadata['latitude'], 
-            longitude=panel_metadata['longitude'], 
+        return self._preprocess_location(
+            latitude=panel_metadata['latitude'],
+            longitude=panel_metadata['longitude'],
             altitude=panel_metadata['altitude'],
-            timezone=DataProcessor.TIMEZONE,
             start_date=start_date,
             end_date=end_date
         )
-        weather_raw_df = get_weather_data_by_date(
-            latitude=panel_metadata['latitude'], 
-            longitude=panel_metadata['longitude'], 
-            start_date=start_date,
-            end_date=end_date
-        )
-        weather_df = preprocess_datasets(weather_raw_df, sunset_sunrise_raw_df)
+
+    def preprocess_batch_inference_input(self, inference_inputs):
+        """
+        Preprocess inference input for many panels at once.
+        Panels at the same location share one weather fetch, one suntimes calculation and one preprocessing pass,
+        the result is then sliced to the prediction period of each panel.
+
+        Args:
+            inference_inputs (List[PanelMetadata]): Panels to predict for
+
+        Returns:
+            tuple: ({inverter_id: inference DataFrame}, {inverter_id: error message})
+        """
+        logger = get_logger(__name__)
+        inference_data = {}
+        errors = {}
+
+        # group panels by location
+        groups = {}
+        for panel in inference_inputs:
+            if panel.inverter_id in inference_data or panel.inverter_id in errors:
+                errors[panel.inverter_id] = "Duplicate inverter_id in batch"
+                inference_data.pop(panel.inverter_id, None)
+                continue
+            if panel.predict_days is None or panel.predict_days < 1:
+                errors[panel.inverter_id] = "predict_days must be a positive integer"
+                continue
+            location = (panel.latitude, panel.longitude, panel.altitude)
+            groups.setdefault(location, []).append(panel)
+            # placeholder to detect duplicates, replaced after preprocessing
+            inference_data[panel.inverter_id] = None
+
+        for (latitude, longitude, altitude), panels in groups.items():
+            # skip panels dropped as duplicates
+            panels = [panel for panel in panels if panel.inverter_id in inference_data]
+            if not panels:
+                continue
+
+            # fetch the longest period requested at this location once
+            start_date, end_date = get_prediction_dates(max(panel.predict_days for panel in panels))
+            try:
+                location_df = self._preprocess_location(
+                    latitude=latitude,
+                    longitude=longitude,
+                    altitude=altitude,
+                    start_date=start_date,
+                    end_date=end_date
+                )
+            except Exception as e:
+                logger.error(f"Batch preprocessing failed for location {(latitude, longitude, altitude)}: {str(e)}")
+                for panel in panels:
+                    inference_data.pop(panel.inverter_id, None)
+                    errors[panel.inverter_id] = "Failed to fetch or preprocess data for this location"
+                continue
+
+            for panel in panels:
+                # weather of a single request ends the day before its end date, slice the same way
+                _, panel_end_date = get_prediction_dates(panel.predict_days)
+                panel_df = location_df[location_df.index < pd.Timestamp(panel_end_date)]
+                if panel_df.empty:
+                    inference_data.pop(panel.inverter_id)
+                    errors[panel.inverter_id] = "No daylight weather data available for the prediction period"
+                    continue
+                inference_data[panel.inverter_id] = panel_df
+
+        return inference_data, errors
+
+    def _preprocess_location(self, latitude, longitude, altitude, start_date, end_date):
+        with stage_timer("suntimes"):
+            sunset_sunrise_raw_df = get_suntimes_by_date(
+                latitude=latitude, 
+                longitude=longitude, 
+                altitude=altitude,
+                timezone=DataProcessor.TIMEZONE,
+                start_date=start_date,
+                end_date=end_date
+            )
+        with stage_timer("weather_fetch"):
+            weather_raw_df = self.weather_provider.get_weather(
+                latitude=latitude, 
+                longitude=longitude, 
+                start_date=start_date,
+                end_date=end_date
+            )
+        with stage_timer("preprocessing"):
+            weather_df = preprocess_datasets(weather_raw_df, sunset_sunrise_raw_df)
         return weather_df
 
 
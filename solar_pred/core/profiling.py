@@ -0,0 +1,88 @@
+"""
+Opt-in profiling of single requests.
+A request is profiled when it sends the `profile_header` header or is picked by `profile_sample_rate`.
+A CPU profile (cProfile) and an allocation snapshot (tracemalloc) are written to
+`<volume_path>/profiles/<request_id>.prof` and `<request_id>.tracemalloc`.
+Inspect them with `python -m pstats <file>.prof` and `tracemalloc.Snapshot.load(<file>.tracemalloc)`.
+"""
+
+import os
+import uuid
+import random
+import cProfile
+import functools
+import threading
+import tracemalloc
+from typing import Callable
+
+from solar_pred.core.config import config
+from solar_pred.core.logging_config import get_logger, get_log_context, REQUEST_ID_HEADER
+
+PROFILE_DIR_NAME = "profiles"
+
+# only one profiler can be active per process, concurrent requests that want a profile are served unprofiled
+_profile_lock = threading.Lock()
+
+
+def _should_profile(request) -> bool:
+    if request is None:
+        return False
+    if config.profile_header and request.headers.get(config.profile_header, "").lower() in ("1", "true", "yes"):
+        return True
+    return config.profile_sample_rate > 0 and random.random() < config.profile_sample_rate
+
+
+def _get_request_id(request) -> str:
+    # same id as in the log lines of this request
+    request_id = get_log_context().get("request_id") or request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    # the id ends up in a file name
+    return "".join(c for c in request_id if c.isalnum() or c in "-_")[:64] or uuid.uuid4().hex
+
+
+def _write_profiles(request_id: str, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot) -> str:
+    profile_dir = os.path.join(config.volume_path, PROFILE_DIR_NAME)
+    os.makedirs(profile_dir, exist_ok=True)
+    profile_path = os.path.join(profile_dir, f"{request_id}.prof")
+    profiler.dump_stats(profile_path)
+    snapshot.dump(os.path.join(profile_dir, f"{request_id}.tracemalloc"))
+    return profile_path
+
+
+def profile_endpoint(handler: Callable) -> Callable:
+    """
+    Decorator for async endpoint handlers that take a `request` argument.
+    Unprofiled requests only pay for a header lookup (and a random draw if sampling is enabled).
+
+    Note: the profiler runs on the event loop thread, so other requests handled concurrently
+    on the same loop can show up in the CPU profile.
+    """
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        request = kwargs.get("request")
+        if not _should_profile(request) or not _profile_lock.acquire(blocking=False):
+            return await handler(*args, **kwargs)
+
+        logger = get_logger(__name__)
+        request_id = _get_request_id(request)
+        started_tracemalloc = not tracemalloc.is_tracing()
+        profiler = cProfile.Profile()
+        try:
+            if started_tracemalloc:
+                tracemalloc.start()
+            profiler.enable()
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                profiler.disable()
+                snapshot = tracemalloc.take_snapshot()
+                if started_tracemalloc:
+                    tracemalloc.stop()
+                try:
+                    profile_path = _write_profiles(request_id, profiler, snapshot)
+                    logger.info(f"Profile of request {request_id} to {request.url.path} written to {profile_path}")
+                except OSError as e:
+                    logger.error(f"Failed to write profile of request {request_id}: {str(e)}")
+        finally:
+            _profile_lock.release()
+
+    return wrapper
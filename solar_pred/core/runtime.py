@@ -0,0 +1,162 @@
+"""
+Runtime resource configuration.
+torch, numpy and sklearn each default to one thread per core. With several uvicorn workers and
+executor pools running model work in parallel, that oversubscribes the CPU, so the threads of every
+library are sized from the CPUs available to the container divided by the number of parallel jobs.
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict, replace
+from typing import Callable, Optional, Set
+
+from solar_pred.core.config import config
+from solar_pred.core.logging_config import get_logger
+
+# read by the OpenMP/BLAS runtimes when numpy, sklearn and torch are first imported
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    cpus: int
+    workers: int
+    executor_workers: int
+    torch_threads: int
+    torch_interop_threads: int
+    blas_threads: int
+    cpu_affinity: Optional[str] = None
+
+
+def parse_cpu_list(cpu_list: str) -> Set[int]:
+    """Parse a CPU list like "0-3,6" into a set of CPU ids."""
+    cpus = set()
+    for part in cpu_list.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: the affinity mask, capped by the cgroup CPU quota of the container."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max", "r") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def resolve_runtime_config() -> RuntimeConfig:
+    """
+    Compute thread counts from Settings. Counts set to 0 in Settings are derived:
+    every worker gets cpus / workers CPUs, split between its `executor_workers` parallel jobs.
+    """
+    cpus = len(parse_cpu_list(config.cpu_affinity)) if config.cpu_affinity else available_cpus()
+    workers = max(1, config.workers)
+    executor_workers = max(1, config.executor_workers)
+    threads_per_job = max(1, cpus // (workers * executor_workers))
+
+    return RuntimeConfig(
+        cpus=cpus,
+        workers=workers,
+        executor_workers=executor_workers,
+        torch_threads=config.torch_threads or threads_per_job,
+        # the MLP has no independent ops to run in parallel, one inter-op thread is enough
+        torch_interop_threads=config.torch_interop_threads or 1,
+        blas_threads=config.blas_threads or threads_per_job,
+        cpu_affinity=config.cpu_affinity
+    )
+
+
+def configure_process(runtime: RuntimeConfig) -> None:
+    """
+    Apply CPU affinity and BLAS thread limits to the current process.
+    Call it before numpy/torch are imported (server startup, process pool initializers),
+    the environment variables are ignored once the libraries are loaded.
+    """
+    if runtime.cpu_affinity and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, parse_cpu_list(runtime.cpu_affinity))
+
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(runtime.blas_threads)
+
+    # thread pools that are already running have to be limited through threadpoolctl
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=runtime.blas_threads)
+    except ImportError:
+        pass
+
+
+def configure_torch(runtime: RuntimeConfig) -> None:
+    """Size torch's thread pools. Imports torch, so it runs where the model is loaded."""
+    logger = get_logger(__name__)
+    import torch
+
+    torch.set_num_threads(runtime.torch_threads)
+    try:
+        torch.set_num_interop_threads(runtime.torch_interop_threads)
+    except RuntimeError:
+        # can only be set once, before torch runs any parallel work
+        logger.warning(f"torch inter-op threads already initialised, keeping {torch.get_num_interop_threads()}")
+    logger.info(
+        f"torch threads: intra-op {torch.get_num_threads()}, inter-op {torch.get_num_interop_threads()}"
+    )
+
+
+def configure_runtime() -> RuntimeConfig:
+    """Resolve and apply the runtime configuration of a server worker, log the effective values."""
+    runtime = resolve_runtime_config()
+    configure_process(runtime)
+    get_logger(__name__).info(f"Runtime configuration: {asdict(runtime)}")
+    return runtime
+
+
+def init_worker_process(runtime: RuntimeConfig) -> None:
+    """Initializer for executor pool processes: each job gets the share of CPUs computed in `runtime`."""
+    configure_process(runtime)
+    configure_torch(runtime)
+
+
+def worker_process_runtime(n_jobs: int) -> RuntimeConfig:
+    """Runtime of pool processes running up to n_jobs jobs in parallel: the CPUs of this worker split between them."""
+    runtime = resolve_runtime_config()
+    cpus_per_worker = max(1, runtime.cpus // runtime.workers)
+    n_processes = max(1, min(n_jobs, cpus_per_worker))
+    threads = max(1, cpus_per_worker // n_processes)
+    return replace(
+        runtime, executor_workers=n_processes, torch_threads=threads, torch_interop_threads=1, blas_threads=threads
+    )
+
+
+def _init_pool_process(runtime: RuntimeConfig, initializer: Optional[Callable], initargs: tuple) -> None:
+    init_worker_process(runtime)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def create_process_pool(n_jobs: int, initializer: Optional[Callable] = None, initargs: tuple = ()) -> ProcessPoolExecutor:
+    """Process pool for CPU-bound model work, sized and thread-limited by `worker_process_runtime`."""
+    runtime = worker_process_runtime(n_jobs)
+    return ProcessPoolExecutor(
+        max_workers=runtime.executor_workers,
+        # fork is not safe once torch has started its thread pools
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_pool_process,
+        initargs=(runtime, initializer, initargs)
+    )
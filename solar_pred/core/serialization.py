@@ -0,0 +1,87 @@
+"""
+Prediction serialization.
+The compact format stores a prediction as a start timestamp, a frequency, the offsets of the
+(daylight) rows from the start and a list of values, which is much cheaper to build, cache and
+encode than one `{timestamp: value}` entry per row.
+"""
+
+import json
+from typing import Any, TYPE_CHECKING
+
+from starlette.responses import JSONResponse
+
+# numpy and pandas are imported lazily to keep the API server's import time low
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library encoder
+    orjson = None
+
+DATE_STRFORMAT = "%Y%m%d%H%M%S"
+PREDICTION_FREQ = "1h"
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content to JSON bytes with orjson if available."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that skips FastAPI's response model validation and encodes with `dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def format_timestamps(index: "pd.DatetimeIndex") -> "np.ndarray":
+    """Format timestamps as yyyymmddhhmmss strings without calling strftime on every row."""
+    import numpy as np
+
+    stamps = (
+        index.year.to_numpy(dtype=np.int64) * 10**10
+        + index.month.to_numpy(dtype=np.int64) * 10**8
+        + index.day.to_numpy(dtype=np.int64) * 10**6
+        + index.hour.to_numpy(dtype=np.int64) * 10**4
+        + index.minute.to_numpy(dtype=np.int64) * 10**2
+        + index.second.to_numpy(dtype=np.int64)
+    )
+    return stamps.astype(str)
+
+
+def compact_prediction(index: "pd.DatetimeIndex", values: list) -> dict:
+    """
+    Build a compact prediction.
+
+    Args:
+        index (pd.DatetimeIndex): Timestamps of the predicted rows
+        values (list): Predicted values, one per timestamp
+
+    Returns:
+        dict: {"start": str, "freq": str, "offsets": List[int], "values": List[float]}
+    """
+    import pandas as pd
+
+    start = index[0]
+    offsets = (index - start) // pd.Timedelta(PREDICTION_FREQ)
+    return {
+        "start": start.strftime(DATE_STRFORMAT),
+        "freq": PREDICTION_FREQ,
+        "offsets": offsets.tolist(),
+        "values": values
+    }
+
+
+def expand_prediction(compact: dict) -> dict:
+    """Convert a compact prediction back to the default {timestamp: value} format."""
+    import numpy as np
+    import pandas as pd
+
+    start = pd.to_datetime(compact["start"], format=DATE_STRFORMAT)
+    offsets = np.asarray(compact["offsets"], dtype=np.int64)
+    index = pd.DatetimeIndex(start + offsets * pd.Timedelta(compact["freq"]))
+    return dict(zip(format_timestamps(index).tolist(), compact["values"]))
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from solar_pred.core.input_validation import BacktestInput
+from solar_pred.core.exceptions import ValidationError
+from solar_pred.core.logging_config import get_logger, bind_log_context
+from solar_pred.core.profiling import profile_endpoint
+
+ORIGIN_FORMATS = {8: "%Y%m%d", 14: "%Y%m%d%H%M%S"}
+
+router = APIRouter()
+
+@router.post("/backtest", name="backtest")
+@profile_endpoint
+async def backtest(
+        request: Request,
+        input_data: BacktestInput)->dict:
+    """Rolling-origin backtest on the stored history of an inverter."""
+    logger = get_logger()
+    try:
+        bind_log_context(inverter_id=input_data.inverter_id)
+        # the training pipeline is imported on first use to keep server startup fast
+        from solar_pred.core.ai_models.backtest import run_backtest
+
+        origins = [_parse_origin(origin) for origin in input_data.origins]
+        history = request.app.state.history_store.read(input_data.inverter_id)
+        if history.empty:
+            raise ValidationError(f"No stored history for inverter {input_data.inverter_id}")
+
+        # one model is trained per origin, keep the event loop free for predictions and health checks
+        return await run_in_threadpool(run_backtest, history, origins, predict_days=input_data.predict_days)
+
+    except ValidationError as e:
+        logger.error(f"Validation error in backtest: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid input data provided"
+        )
+    except Exception as e:
+        logger.exception("Unexpected error in backtest endpoint")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+def _parse_origin(origin: str):
+    import pandas as pd
+
+    strformat = ORIGIN_FORMATS.get(len(origin))
+    try:
+        if strformat is None:
+            raise ValueError
+        return pd.to_datetime(origin, format=strformat)
+    except ValueError:
+        raise ValidationError(f"Invalid origin {origin}, expected yyyymmdd or yyyymmddhhmmss")
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Request, HTTPException, status
 
 from solar_pred.core.input_validation import HealthCheckOutput
 from solar_pred.core.logging_config import get_logger
-from solar_pred.core.healthcheck import check_filesystem_health, check_model_health
+from solar_pred.core.healthcheck import check_filesystem_health, check_model_health, check_model_readiness
 router = APIRouter()
 
 
@@ -45,4 +45,28 @@ async def get_healthcheck(request: Request) -> HealthCheckOutput:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Health check failed"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/healthcheck/live", response_model=HealthCheckOutput, name="liveness")
+async def get_liveness() -> HealthCheckOutput:
+    """Liveness: the server is up and its event loop responds. Does not wait for the model."""
+    return HealthCheckOutput(status="alive", is_healthy=True)
+
+
+@router.get("/healthcheck/ready", response_model=HealthCheckOutput, name="readiness")
+async def get_readiness(request: Request) -> HealthCheckOutput:
+    """Readiness: the model is loaded and warmed up, so requests can be routed to this instance."""
+    readiness = await check_model_readiness(request.app.state)
+    is_ready = readiness["status"] == "healthy"
+    response = HealthCheckOutput(
+        status="ready" if is_ready else "not_ready",
+        is_healthy=is_ready,
+        details={"model": readiness}
+    )
+    if not is_ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=response.model_dump(mode="json")
+        )
+    return response
@@ -1,32 +1,57 @@
 import traceback
+from collections import Counter
+from typing import List
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 from starlette.requests import Request
 
-from solar_pred.core.input_validation import PanelMetadata, PredictionOutput
-from solar_pred.core.preprocessing.processor import DataProcessor
-from solar_pred.core.exceptions import ValidationError, DataProcessingError, ModelTrainingError
-from solar_pred.core.logging_config import get_logger
+from solar_pred.core.input_validation import PanelMetadata, PredictionOutput, BatchPredictionOutput
+from solar_pred.core.exceptions import ValidationError, DataProcessingError, ModelTrainingError, ModelNotReadyError
+from solar_pred.core.choose_models import get_loaded_model
+from solar_pred.core.logging_config import get_logger, bind_log_context
+from solar_pred.core.serialization import FastJSONResponse, expand_prediction
+from solar_pred.core.metrics import stage_timer
+from solar_pred.core.profiling import profile_endpoint
+
+RESPONSE_FORMATS = ("dict", "compact")
 
 router = APIRouter()
 
 @router.post("/predict", response_model=PredictionOutput, name="predict")
+@profile_endpoint
 async def predict(
         request: Request, 
-        input_data: PanelMetadata
+        input_data: PanelMetadata,
+        response_format: str = Query("dict", alias="format", description="'dict' ({timestamp: value}) or 'compact' (start, freq, offsets, values)")
     )->PredictionOutput:
     logger = get_logger()
 
     try:
+        bind_log_context(plant_id=input_data.plant_id, inverter_id=input_data.inverter_id)
+        _check_response_format(response_format)
         # load the model from app state
-        model = request.app.state.model
-        processor = DataProcessor()
+        model = get_loaded_model(request.app.state)
+        cache = request.app.state.prediction_cache
+
+        # same location, horizon, model and forecast give the same prediction
+        cache_key = cache.make_key(input_data, model.model_version)
+        output = cache.get(cache_key)
+        if output is None:
+            # the data pipeline is imported on first use to keep server startup fast
+            from solar_pred.core.preprocessing.processor import DataProcessor
+            processor = DataProcessor()
 
-        inference_data = processor.preprocess_inference_input(input_data)
-        # run prediction
-        output = model.predict(inference_data)
-        
-        return PredictionOutput(prediction=output)
+            inference_data = processor.preprocess_inference_input(input_data)
+            # run prediction, predictions are cached in the compact format
+            output = model.predict_compact(inference_data)
+            cache.set(cache_key, output)
+        _register_plants(request.app.state, [(input_data, cache_key)])
+
+        # the response is encoded here rather than after the return, so the stage covers the whole encoding
+        with stage_timer("serialization"):
+            if response_format == "compact":
+                return FastJSONResponse(content={"prediction": output})
+            return FastJSONResponse(content=PredictionOutput(prediction=expand_prediction(output)).model_dump())
     
     except (ValidationError, DataProcessingError) as e:
         logger.error(f"Validation error in prediction: {str(e)}")
@@ -34,9 +59,108 @@ async def predict(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid input data provided"
         )
+    except ModelNotReadyError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Model is not ready"
+        )
     except Exception as e:
         logger.exception("Unexpected error in prediction endpoint")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/predict/batch", response_model=BatchPredictionOutput, name="predict_batch")
+@profile_endpoint
+async def predict_batch(
+        request: Request,
+        input_data: List[PanelMetadata],
+        response_format: str = Query("dict", alias="format", description="'dict' ({timestamp: value}) or 'compact' (start, freq, offsets, values)")
+    )->BatchPredictionOutput:
+    """Predict for many inverters in one call. Errors of single inverters are returned in `errors` instead of failing the batch."""
+    logger = get_logger()
+
+    try:
+        bind_log_context(batch_size=len(input_data))
+        _check_response_format(response_format)
+        # load the model from app state
+        model = get_loaded_model(request.app.state)
+        cache = request.app.state.prediction_cache
+
+        # serve what we can from the cache, only the rest goes through the pipeline
+        # duplicated ids are left to the processor, which reports them as errors
+        id_counts = Counter(panel.inverter_id for panel in input_data)
+        predictions = {}
+        cache_keys = {}
+        uncached = []
+        for panel in input_data:
+            if panel.predict_days is not None and id_counts[panel.inverter_id] == 1:
+                cache_keys[panel.inverter_id] = cache.make_key(panel, model.model_version)
+                output = cache.get(cache_keys[panel.inverter_id])
+                if output is not None:
+                    predictions[panel.inverter_id] = output
+                    continue
+            uncached.append(panel)
+
+        from solar_pred.core.preprocessing.processor import DataProcessor
+        processor = DataProcessor()
+
+        # weather and suntimes are fetched once per location
+        inference_data, errors = processor.preprocess_batch_inference_input(uncached)
+
+        # run one forward pass for the whole batch
+        if inference_data:
+            computed = model.predict_batch(inference_data, compact=True)
+            for inverter_id, output in computed.items():
+                cache.set(cache_keys[inverter_id], output)
+            predictions.update(computed)
+
+        _register_plants(request.app.state, [
+            (panel, cache_keys[panel.inverter_id]) for panel in input_data
+            if panel.inverter_id in cache_keys and panel.inverter_id in predictions
+        ])
+
+        if errors:
+            logger.warning(f"Batch prediction finished with {len(errors)} failed out of {len(input_data)} inverters")
+
+        with stage_timer("serialization"):
+            if response_format == "compact":
+                return FastJSONResponse(content={"predictions": predictions, "errors": errors})
+            predictions = {inverter_id: expand_prediction(output) for inverter_id, output in predictions.items()}
+            return FastJSONResponse(content=BatchPredictionOutput(predictions=predictions, errors=errors).model_dump())
+
+    except (ValidationError, DataProcessingError) as e:
+        logger.error(f"Validation error in batch prediction: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid input data provided"
+        )
+    except ModelNotReadyError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Model is not ready"
+        )
+    except Exception as e:
+        logger.exception("Unexpected error in batch prediction endpoint")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+def _register_plants(app_state, served) -> None:
+    """Remember the plants that were served, with their cache keys, for the forecast prefetcher."""
+    prefetcher = getattr(app_state, "prefetcher", None)
+    if prefetcher is None:
+        return
+    for panel, cache_key in served:
+        prefetcher.register(panel, cache_key)
+
+
+def _check_response_format(response_format: str) -> None:
+    if response_format not in RESPONSE_FORMATS:
+        raise ValidationError(f"Unknown response format {response_format}. Available formats: {RESPONSE_FORMATS}")
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Request, status
+
+from solar_pred.core.input_validation import PrefetchStatusOutput
+from solar_pred.core.logging_config import get_logger
+
+router = APIRouter()
+
+
+@router.get("/prefetch", response_model=PrefetchStatusOutput, name="prefetch_status")
+async def get_prefetch_status(request: Request) -> PrefetchStatusOutput:
+    """Plants whose predictions are prefetched, and how fresh their cached predictions are."""
+    prefetcher = getattr(request.app.state, "prefetcher", None)
+    if prefetcher is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Prefetching is disabled")
+    try:
+        return PrefetchStatusOutput(**prefetcher.status())
+    except Exception:
+        get_logger().exception("Unexpected error in prefetch status endpoint")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
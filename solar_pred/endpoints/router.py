@@ -1,8 +1,11 @@
 from fastapi import APIRouter
 
-from solar_pred.endpoints import train, predict, healthcheck
+from solar_pred.endpoints import train, predict, healthcheck, metrics, backtest, prefetch
 
 api_router = APIRouter()
 api_router.include_router(healthcheck.router, tags=["healthcheck"])
 api_router.include_router(train.router, tags=["train"])
-api_router.include_router(predict.router, tags=["predict"])
\ No newline at end of file
+api_router.include_router(predict.router, tags=["predict"])
+api_router.include_router(metrics.router, tags=["metrics"])
+api_router.include_router(backtest.router, tags=["backtest"])
+api_router.include_router(prefetch.router, tags=["prefetch"])
\ No newline at end of file
@@ -1,33 +1,56 @@
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
 
 from solar_pred.core.input_validation import TrainingInput
-from solar_pred.core.preprocessing.processor import DataProcessor
-from solar_pred.core.exceptions import ValidationError, DataProcessingError, ModelTrainingError
-from solar_pred.core.logging_config import get_logger
+from solar_pred.core.exceptions import (
+    ValidationError, DataProcessingError, ModelTrainingError, ModelNotReadyError, TrainingInProgressError, TrainSizeError,
+    TrainingDisabledError
+)
+from solar_pred.core.choose_models import exclusive_training, get_loaded_model, check_training_enabled
+from solar_pred.core.logging_config import get_logger, bind_log_context
+from solar_pred.core.profiling import profile_endpoint
+
+TRAINING_MODES = ("full", "incremental")
 
 router = APIRouter()
 
 @router.post("/train", name="train")
+@profile_endpoint
 async def train(
         request: Request,
-        input_data: TrainingInput)->dict:
+        input_data: TrainingInput,
+        mode: str = Query("full", description="'full' retrains on the payload, 'incremental' updates the model with the new rows only")
+    )->dict:
     
     logger = get_logger()
     try:
-        # load the model from app state
-        model = request.app.state.model
+        bind_log_context(plant_id=input_data.panel_metadata.plant_id, inverter_id=input_data.panel_metadata.inverter_id)
+        if mode not in TRAINING_MODES:
+            raise ValidationError(f"Unknown training mode {mode}, expected one of {TRAINING_MODES}")
+        # refuse before the rows are stored
+        check_training_enabled()
+        # the data pipeline is imported on first use to keep server startup fast
+        from solar_pred.core.preprocessing.processor import DataProcessor
         data_processor = DataProcessor()
 
-        train_data = data_processor.preprocess_training_input(input_data)
+        new_rows = data_processor.preprocess_training_input(input_data)
+
+        # clients only send readings added since their last call, the model is trained on the stored history
+        history_store = request.app.state.history_store
+        inverter_id = input_data.panel_metadata.inverter_id
+        history_store.append(inverter_id, new_rows)
+        history = history_store.read(inverter_id)
 
-        # train the model
-        model.fit_model(train_data)
+        # training on the whole history takes a while, keep the event loop free for predictions and health checks
+        fit_mode = await run_in_threadpool(_train_and_publish, request.app.state, mode, new_rows, history)
         
         return {
                 "status": "OK", 
-                "status_code": 200
+                "status_code": 200,
+                "mode": fit_mode
             }
         
     except (ValidationError, DataProcessingError) as e:
@@ -36,6 +59,24 @@ async def train(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid input data provided"
         )
+    except ModelNotReadyError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Model is not ready"
+        )
+    except TrainingDisabledError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Training is disabled on this replica"
+        )
+    except TrainingInProgressError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another training run is in progress"
+        )
     except ModelTrainingError as e:
         logger.error(f"Model training failed: {str(e)}")
         raise HTTPException(
@@ -47,4 +88,103 @@ async def train(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
-        )
\ No newline at end of file
+        )
+
+
+def _train_and_publish(app_state, mode: str, new_rows, history) -> str:
+    """Train the served model under the training lock. Blocks, call it from a worker thread. Returns the fit mode used."""
+    # only one replica trains at a time, the new version is saved in the background and published to the others
+    with exclusive_training(app_state) as model:
+        if mode == "incremental":
+            model.fit_incremental(new_rows, history=history)
+        else:
+            model.fit_model(history)
+
+        # predictions of the previous model are stale now
+        app_state.prediction_cache.invalidate(model.model_version)
+    return model.last_fit_mode
+
+
+@router.post("/train/search", name="train_search")
+@profile_endpoint
+async def train_search(
+        request: Request,
+        input_data: TrainingInput,
+        trials: Optional[int] = Query(None, ge=1, le=1000, description="Configurations to sample, defaults to SEARCH_TRIALS"),
+        cpu_budget_s: Optional[float] = Query(None, gt=0, description="CPU seconds the search may use, defaults to SEARCH_CPU_BUDGET_S")
+    )->dict:
+    """Search hyperparameters on the training data and publish the best model."""
+    logger = get_logger()
+    try:
+        bind_log_context(plant_id=input_data.panel_metadata.plant_id, inverter_id=input_data.panel_metadata.inverter_id)
+        # fail fast while the model is still loading
+        check_training_enabled()
+        get_loaded_model(request.app.state)
+        from solar_pred.core.preprocessing.processor import DataProcessor
+        data_processor = DataProcessor()
+
+        new_rows = data_processor.preprocess_training_input(input_data)
+        history_store = request.app.state.history_store
+        history_store.append(input_data.panel_metadata.inverter_id, new_rows)
+        history = history_store.read(input_data.panel_metadata.inverter_id)
+
+        # the search runs for minutes, keep the event loop free for predictions and health checks
+        result = await run_in_threadpool(_search_and_publish, request.app.state, history, trials, cpu_budget_s)
+
+        return {
+                "status": "OK",
+                "status_code": 200,
+                "best_params": result.best_params,
+                "val_loss": result.val_loss,
+                "cpu_seconds": result.cpu_seconds
+            }
+
+    except (ValidationError, DataProcessingError) as e:
+        logger.error(f"Validation error in hyperparameter search: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid input data provided"
+        )
+    except ModelNotReadyError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Model is not ready"
+        )
+    except TrainingDisabledError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Training is disabled on this replica"
+        )
+    except TrainingInProgressError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another training run is in progress"
+        )
+    except (TrainSizeError, ModelTrainingError) as e:
+        logger.error(f"Hyperparameter search failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Hyperparameter search failed"
+        )
+    except Exception as e:
+        logger.exception("Unexpected error in hyperparameter search endpoint")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+def _search_and_publish(app_state, history, trials: Optional[int], cpu_budget_s: Optional[float]):
+    """Run the search under the training lock and publish the best model. Blocks, call it from a worker thread."""
+    from solar_pred.core.ai_models.search import run_search, save_best_config
+
+    with exclusive_training(app_state):
+        result = run_search(history, n_trials=trials, cpu_budget_s=cpu_budget_s)
+        # the winner replaces the served model and is published when the block ends
+        app_state.model = result.model
+        app_state.prediction_cache.invalidate(result.model.model_version)
+        save_best_config(result, app_state.weights_dir)
+    return result
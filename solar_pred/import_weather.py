@@ -0,0 +1,83 @@
+"""
+Fill the local weather store read by WEATHER_PROVIDER=local.
+Weather of the given locations is fetched from Open-Meteo for a date range, or imported from a CSV/Parquet file
+(a timestamp column and one column per weather variable, as returned by the API), and merged into
+`<weather_store_path>/local/<latitude>_<longitude>.parquet`. Re-running it for new dates extends the files, rows with
+the same timestamp are replaced.
+
+Usage: python -m solar_pred.import_weather --location 35.68 139.76 [--location LAT LON ...] [--start 2025-01-01] [--end 2025-12-31]
+       python -m solar_pred.import_weather --location 35.68 139.76 --file weather.parquet
+"""
+
+import sys
+import argparse
+from datetime import date, timedelta
+from typing import List, Tuple
+
+import pandas as pd
+
+from solar_pred.core.exceptions import ValidationError, DataProcessingError
+from solar_pred.core.logging_config import get_logger
+
+# the forecast API returns at most 16 days ahead, longer ranges are fetched in windows of this many days
+FETCH_WINDOW_DAYS = 31
+FORECAST_DAYS = 16
+
+
+def fetch_windows(start: date, end: date, window_days: int = FETCH_WINDOW_DAYS) -> List[Tuple[date, date]]:
+    windows = []
+    while start <= end:
+        windows.append((start, min(start + timedelta(days=window_days - 1), end)))
+        start += timedelta(days=window_days)
+    return windows
+
+
+def import_weather(locations: List[Tuple[float, float]], start: date = None, end: date = None, file: str = None) -> int:
+    """Fetch (or read from file) the weather of the locations and merge it into the local store. Returns rows stored."""
+    from solar_pred.core.get_data import OpenMeteoProvider, create_local_store
+
+    logger = get_logger(__name__)
+    store = create_local_store()
+    if file is not None:
+        if len(locations) != 1:
+            raise ValidationError("A weather file is imported for exactly one location")
+        weather = pd.read_parquet(file) if file.endswith(".parquet") else pd.read_csv(file, parse_dates=["timestamp"])
+        if "timestamp" not in weather.columns:
+            raise ValidationError(f"{file} has no timestamp column")
+        store.save(*locations[0], weather)
+        return len(weather)
+
+    start = start or date.today()
+    end = end or start + timedelta(days=FORECAST_DAYS)
+    upstream = OpenMeteoProvider()
+    rows = 0
+    for latitude, longitude in locations:
+        frames = [upstream.get_weather(latitude, longitude, window_start, window_end + timedelta(days=1))
+                  for window_start, window_end in fetch_windows(start, end)]
+        weather = pd.concat(frames, ignore_index=True)
+        store.save(latitude, longitude, weather)
+        rows += len(weather)
+        logger.info(f"Stored {len(weather)} hours of weather for {(latitude, longitude)}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the local weather store used by WEATHER_PROVIDER=local")
+    parser.add_argument("--location", nargs=2, type=float, action="append", required=True, metavar=("LAT", "LON"),
+                        help="Location to store weather for, can be repeated")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day, defaults to today")
+    parser.add_argument("--end", type=date.fromisoformat, help=f"Last day, defaults to {FORECAST_DAYS} days after the start")
+    parser.add_argument("--file", help="Import this CSV or Parquet file instead of fetching from Open-Meteo")
+    args = parser.parse_args()
+
+    try:
+        rows = import_weather([tuple(location) for location in args.location], args.start, args.end, args.file)
+    except (ValidationError, DataProcessingError, FileNotFoundError) as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    print(f"Stored {rows} hours of weather for {len(args.location)} location(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,10 +4,14 @@ from fastapi import FastAPI
 from solar_pred.endpoints.router import api_router
 from solar_pred.core.event_handlers import start_app_handler, stop_app_handler
 from solar_pred.core.config import config
+from solar_pred.core.metrics import MetricsMiddleware
+from solar_pred.core.logging_config import RequestContextMiddleware
 
 def get_api_app() -> FastAPI:
     api_app = FastAPI(title="ML API", version="1.0.0", debug=False)
     api_app.include_router(api_router)
+    api_app.add_middleware(MetricsMiddleware)
+    api_app.add_middleware(RequestContextMiddleware)
 
     # add event handlers
     api_app.add_event_handler("startup", start_app_handler(api_app))
@@ -19,4 +23,11 @@ app = get_api_app()
 
 if __name__=="__main__":
     """Initialize the endpoint"""
-    uvicorn.run("solar_pred.main:app", host="0.0.0.0", port=config.port, reload=config.is_dev)
\ No newline at end of file
+    # reload runs a single process, workers only apply outside of dev mode
+    uvicorn.run(
+        "solar_pred.main:app",
+        host="0.0.0.0",
+        port=config.port,
+        reload=config.is_dev,
+        workers=None if config.is_dev else config.workers
+    )
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Fleet-wide training on the stored history of many inverters, without holding the history in memory.
+The history is read one month partition at a time (all inverters of a month, oldest month first, rows in time order),
+converted to features and written to a memory-mapped dataset under `<volume_path>/datasets/<name>/`. The dataset is
+chronological across inverters, so the validation set is the most recent time window of the whole fleet. The model is then trained
+out of core from the maps and published to the model directory like a model trained through the API.
+
+Usage: python -m solar_pred.train_fleet [inverter_id ...] [--model-dir DIR] [--dataset fleet] [--reuse-dataset] [--chunk-rows 65536]
+"""
+
+import os
+import sys
+import time
+import argparse
+import resource
+from typing import Iterator, List
+
+import pandas as pd
+
+from solar_pred.core.config import config
+from solar_pred.core.exceptions import TrainSizeError, ValidationError
+from solar_pred.core.history_store import HistoryStore, create_history_store
+from solar_pred.core.logging_config import get_logger
+
+
+def iter_history(store: HistoryStore, inverter_ids: List[str]) -> Iterator[pd.DataFrame]:
+    """Stored rows of the inverters, one month of all inverters at a time, sorted by timestamp."""
+    months = sorted({month for inverter_id in inverter_ids for month in store.months(inverter_id)})
+    for month in months:
+        frames = [store.read_month(inverter_id, month) for inverter_id in inverter_ids if month in store.months(inverter_id)]
+        frames = [frame for frame in frames if not frame.empty]
+        if frames:
+            # stable, rows of one timestamp keep the inverter order
+            yield pd.concat(frames).sort_index(kind="stable")
+
+
+def train_fleet(inverter_ids: List[str], model_dir: str, dataset_name: str = "fleet", reuse_dataset: bool = False,
+                chunk_rows: int = None) -> dict:
+    """
+    Build (or reuse) the memory-mapped dataset of the inverters, train a new model on it and publish it.
+
+    Returns:
+        dict: rows, timings, validation loss, model version and peak RSS
+    """
+    from solar_pred.core.ai_models._models_config import get_model_config
+    from solar_pred.core.ai_models.neural_network.model import NeuralNetwork
+    from solar_pred.core.ai_models.out_of_core import open_memmap_dataset, write_memmap_dataset
+    from solar_pred.core.checkpoint import CheckpointManager
+    from solar_pred.core.choose_models import TrainingLock
+
+    logger = get_logger(__name__)
+    chunk_rows = chunk_rows or config.out_of_core_chunk_rows
+    model = NeuralNetwork(model_CONFIG=get_model_config(model_name="neural_network"))
+    dataset_root = os.path.join(config.volume_path, "datasets", dataset_name)
+
+    start = time.perf_counter()
+    if reuse_dataset:
+        dataset = open_memmap_dataset(dataset_root)
+        if list(dataset.features) != list(model.features_to_use):
+            raise ValidationError(f"Dataset {dataset_root} was written for other features, rebuild it")
+    else:
+        store = create_history_store()
+        dataset = write_memmap_dataset(
+            iter_history(store, inverter_ids or store.inverters()), dataset_root, model.features_to_use, model.target_col
+        )
+    prepare_s = time.perf_counter() - start
+    logger.info(f"Dataset {dataset_root} has {len(dataset)} rows")
+
+    # the same lock as /train, so a training replica does not publish over this model
+    lock = TrainingLock(model_dir)
+    if not lock.acquire():
+        raise RuntimeError("Another training run holds the model store lock")
+    try:
+        train_start = time.perf_counter()
+        model.fit_out_of_core(dataset, chunk_rows=chunk_rows, prefetch=config.out_of_core_prefetch)
+        train_s = time.perf_counter() - train_start
+        checkpoints = CheckpointManager(model_dir, keep_last=config.checkpoint_keep_last)
+        checkpoints.checkpoint(model)
+        checkpoints.close()
+    finally:
+        lock.release()
+
+    return {
+        "rows": len(dataset),
+        "prepare_s": prepare_s,
+        "train_s": train_s,
+        "val_loss": model.val_loss,
+        "model_version": model.model_version,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train one model on the stored history of many inverters, out of core")
+    parser.add_argument("inverters", nargs="*", help="Inverter ids, defaults to every inverter in the history store")
+    parser.add_argument("--model-dir", help="Model directory to publish to, defaults to MODEL_DIR")
+    parser.add_argument("--dataset", default="fleet", help="Name of the memory-mapped dataset under volume_path/datasets")
+    parser.add_argument("--reuse-dataset", action="store_true", help="Train on the existing dataset instead of rebuilding it")
+    parser.add_argument("--chunk-rows", type=int, help="Rows read at a time, defaults to OUT_OF_CORE_CHUNK_ROWS")
+    args = parser.parse_args()
+
+    try:
+        report = train_fleet(args.inverters, args.model_dir or config.model_dir, args.dataset, args.reuse_dataset, args.chunk_rows)
+    except (TrainSizeError, ValidationError, FileNotFoundError, RuntimeError) as e:
+        print(str(e), file=sys.stderr)
+        return 2
+
+    print(
+        f"Trained model {report['model_version']} on {report['rows']} rows "
+        f"(dataset {report['prepare_s']:.1f}s, training {report['train_s']:.1f}s), "
+        f"validation loss {report['val_loss']:.5f}, peak RSS {report['peak_rss_mb']:.0f} MB"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())